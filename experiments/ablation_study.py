@@ -8,8 +8,8 @@ from tqdm import tqdm
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from src.data.ingest import fetch_ohlcv_data
-from src.features.engine import compute_features
-from src.features.regime import detect_regime
+from src.features.cache import cached_compute_features, get_feature_store
+from src.features.hmm import current_regime
 from src.agent.langchain_planner import generate_strategy_proposals
 from src.backtest.runner import run_backtest
 from src.utils.config import config
@@ -20,8 +20,8 @@ def run_ablation_study(num_runs=5):
     print("Loading data...")
     ohlcv_data = fetch_ohlcv_data()
     ref_asset = config['reference_asset']
-    features_df = compute_features(ohlcv_data, ref_asset, config['vix_ticker'])
-    real_regime = detect_regime(features_df)
+    features_df = cached_compute_features(ohlcv_data, ref_asset, config['vix_ticker'])
+    real_regime = current_regime(features_df)
     
     results = []
     
@@ -76,6 +76,8 @@ def run_ablation_study(num_runs=5):
     print("\nAblation Results (Average Sharpe):")
     print(df.groupby('type')['sharpe'].mean())
     df.to_csv('experiments/ablation_results.csv', index=False)
+    stats = get_feature_store().stats()
+    print(f"Feature cache: {stats['hits']} hits, {stats['misses']} misses (hit rate {stats['hit_rate']:.0%})")
 
 if __name__ == "__main__":
     run_ablation_study()
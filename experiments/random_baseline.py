@@ -8,8 +8,8 @@ from tqdm import tqdm
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from src.data.ingest import fetch_ohlcv_data
-from src.features.engine import compute_features
-from src.features.regime import detect_regime
+from src.features.cache import cached_compute_features, get_feature_store
+from src.features.hmm import current_regime
 from src.agent.langchain_planner import generate_random_strategies
 from src.backtest.runner import run_backtest
 from src.utils.config import config
@@ -24,8 +24,8 @@ def run_random_baseline(num_runs=100):
         print(f"Error: {ref_asset} not found in data.")
         return
 
-    features_df = compute_features(ohlcv_data, ref_asset, config['vix_ticker'])
-    regime = detect_regime(features_df)
+    features_df = cached_compute_features(ohlcv_data, ref_asset, config['vix_ticker'])
+    regime = current_regime(features_df)
     
     results = []
     
@@ -72,6 +72,8 @@ def run_random_baseline(num_runs=100):
     print("\nRandom Baseline Results:")
     print(df.describe())
     df.to_csv('experiments/random_baseline_results.csv', index=False)
+    stats = get_feature_store().stats()
+    print(f"Feature cache: {stats['hits']} hits, {stats['misses']} misses (hit rate {stats['hit_rate']:.0%})")
     return df
 
 if __name__ == "__main__":
@@ -9,6 +9,9 @@ from tqdm import tqdm
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from src.data.ingest import fetch_ohlcv_data
+from src.features.filters import kama
+from src.features.indicators import indicator_index
+from src.strategies.multi_strategy import calculate_momentum_signal_grid
 from src.utils.config import config
 from dotenv import load_dotenv
 
@@ -37,30 +40,12 @@ def get_bootstrap_score(returns, n_samples=100, percentile=5):
     return np.percentile(sharpes, percentile)
 
 def kama_indicator(price, n=10, pow1=2, pow2=30):
-    """Calculates Kaufman Adaptive Moving Average"""
-    # Efficiency Ratio
-    change = price.diff(n).abs()
-    volatility = price.diff().abs().rolling(n).sum()
-    er = change / volatility
-    er = er.fillna(0)
-    
-    # Smoothing Constant
-    sc = (er * (2.0/(pow1+1) - 2.0/(pow2+1.0)) + 2.0/(pow2+1.0)) ** 2.0
-    
-    kama = pd.Series(index=price.index, dtype='float64')
-    kama.iloc[n-1] = price.iloc[n-1]
-    
-    # Iterative calculation (slow in python but necessary for recursive definition)
-    # Optimizing with numpy for speed
-    price_values = price.values.flatten()
-    sc_values = sc.values.flatten()
-    kama_values = np.zeros_like(price_values)
-    kama_values[n-1] = price_values[n-1]
-    
-    for i in range(n, len(price)):
-        kama_values[i] = kama_values[i-1] + sc_values[i] * (price_values[i] - kama_values[i-1])
-        
-    return pd.Series(kama_values, index=price.index)
+    """Calculates Kaufman Adaptive Moving Average (one column per n when n is a list)"""
+    if isinstance(price, pd.DataFrame):
+        price = price.iloc[:, 0]
+    kama_values = kama(price, n=n, fast=pow1, slow=pow2)
+    # Bars before the seed have always been reported as 0 here
+    return kama_values.fillna(0.0)
 
 # --- Strategy Implementations ---
 
@@ -78,17 +63,26 @@ def apply_costs(strat_returns, signal, cost_bps=10):
 
 def run_static_baseline(df, fast=50, slow=200, cost_bps=10):
     close = df['Close']
-    fast_ma = close.rolling(fast).mean()
-    slow_ma = close.rolling(slow).mean()
+    indicators = indicator_index(close)
+    fast_ma = indicators.sma(fast)
+    slow_ma = indicators.sma(slow)
     signal = (fast_ma > slow_ma).astype(int)
     returns = close.pct_change().fillna(0)
     strat_returns = returns * signal.shift(1).fillna(0)
     return apply_costs(strat_returns, signal, cost_bps)
 
+def run_static_baseline_grid(df, fast_windows, slow_windows, cost_bps=10):
+    """run_static_baseline for zipped (fast, slow) pairs at once; one column per pair."""
+    signal = (calculate_momentum_signal_grid(df, fast_windows, slow_windows, product=False) > 0).astype(int)
+    returns = df['Close'].pct_change().fillna(0)
+    strat_returns = signal.shift(1).fillna(0).mul(returns, axis=0)
+    return apply_costs(strat_returns, signal, cost_bps)
+
 def run_vol_adjusted_baseline(df, base_fast=50, base_slow=200, cost_bps=10):
     close = df['Close']
     # Calculate Volatility (21-day std dev)
-    vol = close.pct_change().rolling(21).std()
+    indicators = indicator_index(close)
+    vol = indicators.return_std(21)
     # Target Vol (average of the series to normalize)
     target_vol = vol.rolling(126, min_periods=21).mean() # 6-month average vol
     
@@ -98,14 +92,14 @@ def run_vol_adjusted_baseline(df, base_fast=50, base_slow=200, cost_bps=10):
     returns = close.pct_change().fillna(0)
     
     # Pre-calculate a few variations
-    ma_fast_short = close.rolling(int(base_fast * 0.5)).mean()
-    ma_slow_short = close.rolling(int(base_slow * 0.5)).mean()
+    ma_fast_short = indicators.sma(int(base_fast * 0.5))
+    ma_slow_short = indicators.sma(int(base_slow * 0.5))
     
-    ma_fast_base = close.rolling(base_fast).mean()
-    ma_slow_base = close.rolling(base_slow).mean()
+    ma_fast_base = indicators.sma(base_fast)
+    ma_slow_base = indicators.sma(base_slow)
     
-    ma_fast_long = close.rolling(int(base_fast * 1.5)).mean()
-    ma_slow_long = close.rolling(int(base_slow * 1.5)).mean()
+    ma_fast_long = indicators.sma(int(base_fast * 1.5))
+    ma_slow_long = indicators.sma(int(base_slow * 1.5))
     
     cond_high_vol = factor < 0.8
     cond_low_vol = factor > 1.2
@@ -121,14 +115,15 @@ def run_vol_adjusted_baseline(df, base_fast=50, base_slow=200, cost_bps=10):
     strat_returns = returns * signal.shift(1).fillna(0)
     return apply_costs(strat_returns, signal, cost_bps)
 
-def run_kama_strategy(df, n=10, cost_bps=10):
+def run_kama_strategy(df, n=10, cost_bps=10, kama_values=None):
     close = df['Close']
     # Ensure close is a Series
     if isinstance(close, pd.DataFrame):
         close = close.iloc[:, 0]
         
-    kama = kama_indicator(close, n=n)
-    signal = (close > kama).astype(int)
+    if kama_values is None:
+        kama_values = kama_indicator(close, n=n)
+    signal = (close > kama_values).astype(int)
     returns = close.pct_change().fillna(0)
     strat_returns = returns * signal.shift(1).fillna(0)
     return apply_costs(strat_returns, signal, cost_bps)
@@ -144,8 +139,9 @@ def run_regime_switching(df, vix_df, cost_bps=10):
     vix = vix_df['Close'].reindex(df.index).ffill()
     
     # Base Strategy
-    fast_ma = close.rolling(50).mean()
-    slow_ma = close.rolling(200).mean()
+    indicators = indicator_index(close)
+    fast_ma = indicators.sma(50)
+    slow_ma = indicators.sma(200)
     base_signal = (fast_ma > slow_ma).astype(int)
     
     # Regime Filter
@@ -234,9 +230,9 @@ def run_rigorous_baselines():
         # Evaluate on Train (excluding warmup)
         train_eval_mask = train_df.loc[train_start:train_end].index
         
+        grid_ret = run_static_baseline_grid(train_df, *zip(*param_grid))
         for f, s in param_grid:
-            ret = run_static_baseline(train_df, f, s)
-            train_ret = ret.loc[train_eval_mask]
+            train_ret = grid_ret[(f, s)].loc[train_eval_mask]
             score = get_bootstrap_score(train_ret)
             if score > best_score:
                 best_score = score
@@ -256,9 +252,11 @@ def run_rigorous_baselines():
         # Optimize 'n' on Train
         best_n = 10
         best_sharpe = -999
+        kama_windows = [10, 20, 30, 40]
+        kama_grid = kama_indicator(train_df['Close'], n=kama_windows)  # all n in one pass
         
-        for n in [10, 20, 30, 40]:
-            ret = run_kama_strategy(train_df, n)
+        for n in kama_windows:
+            ret = run_kama_strategy(train_df, n, kama_values=kama_grid[n])
             train_ret = ret.loc[train_eval_mask]
             score = calculate_sharpe(train_ret)
             if score > best_sharpe:
@@ -9,8 +9,9 @@ from datetime import timedelta
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from src.data.ingest import fetch_ohlcv_data
-from src.features.engine import compute_features
-from src.features.regime import detect_regime
+from src.features.cache import get_feature_store
+from src.features.point_in_time import PointInTimeFeatures
+from src.features.regime import label_regimes, latest_regime
 from src.agent.langchain_planner import generate_strategy_proposals
 from src.backtest.runner import run_backtest
 from src.utils.config import config
@@ -30,6 +31,10 @@ def run_walk_forward(window_months=6):
     start_date = full_df.index[0]
     end_date = full_df.index[-1]
     
+    # Features are causal, so compute them once and slice per window
+    pit_features = PointInTimeFeatures.from_ohlcv({ref_asset: full_df}, ref_asset, config['vix_ticker'])
+    regime_labels = label_regimes(pit_features.features)
+
     current_date = start_date
     window_size = timedelta(days=window_months*30)
     
@@ -56,8 +61,8 @@ def run_walk_forward(window_months=6):
             
         # 1. Train (Agent picks params)
         # We need features for the train set
-        train_features = compute_features({ref_asset: train_df}, ref_asset, config['vix_ticker'])
-        train_regime = detect_regime(train_features)
+        train_features = pit_features.window(train_start, train_end, warmup='history')
+        train_regime = latest_regime(regime_labels.loc[train_start:train_end])
         
         # Generate Proposal (LLM)
         proposals = generate_strategy_proposals(
@@ -175,6 +180,8 @@ def run_walk_forward(window_months=6):
     print("\nWalk-Forward Results:")
     print(df)
     df.to_csv('experiments/walk_forward_results.csv', index=False)
+    stats = get_feature_store().stats()
+    print(f"Feature cache: {stats['hits']} hits, {stats['misses']} misses (hit rate {stats['hit_rate']:.0%})")
 
 if __name__ == "__main__":
     run_walk_forward()
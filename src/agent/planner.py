@@ -3,6 +3,9 @@ import google.generativeai as genai
 from dotenv import load_dotenv
 import pandas as pd
 
+# Latest-row feature columns summarised in the prompt
+PLANNER_FEATURES = ['volatility_21d', 'momentum_63d', 'price_vs_sma63', 'vix_close']
+
 # This is a placeholder for the real tool. The LLM will learn to call this.
 # The actual backtesting is done elsewhere; this just defines the interface for the LLM.
 def backtest_tool(strategy_name: str, asset_ticker: str, fast_window: int, slow_window: int) -> dict:
@@ -49,14 +52,17 @@ def get_llm_planner():
     )
     return model
 
-def generate_prompt(regime, features_summary, baseline_stats):
+def generate_prompt(regime, features_summary, baseline_stats, asset_regimes=None):
     """Creates the detailed prompt for the Gemini planner."""
+    asset_lines = ""
+    if asset_regimes:
+        asset_lines = "\n    - **Per-Asset Regimes:** " + ", ".join(f"{t}: {r}" for t, r in asset_regimes.items())
     
     prompt = f"""
     You are an expert quantitative trading research assistant. Your goal is to propose alternative strategy parameters to improve performance in the current market environment.
 
     **Current Market Analysis:**
-    - **Detected Regime:** {regime}
+    - **Detected Regime:** {regime}{asset_lines}
     - **Key Market Features (latest data):**
     {features_summary}
 
@@ -75,21 +81,22 @@ def generate_prompt(regime, features_summary, baseline_stats):
     """
     return prompt
 
-def propose_actions(regime: str, features_df: pd.DataFrame, baseline_stats: pd.Series):
+def propose_actions(regime: str, features_df: pd.DataFrame, baseline_stats: pd.Series, asset_regimes: dict = None):
     """
     Uses the Gemini planner to propose new backtest actions.
     
+    Args:
+        asset_regimes: Optional {ticker: regime} for the universe (see regime.RegimePanel.latest).
+    
     Returns:
         list: A list of dictionaries, where each dict describes a backtest to be run.
     """
     planner = get_llm_planner()
     
     # Summarize features for the prompt
-    features_summary = features_df.iloc[-1][[
-        'volatility_21d', 'momentum_63d', 'price_vs_sma63', 'vix_close'
-    ]].round(3).to_string()
+    features_summary = features_df.iloc[-1][PLANNER_FEATURES].round(3).to_string()
 
-    prompt = generate_prompt(regime, features_summary, baseline_stats)
+    prompt = generate_prompt(regime, features_summary, baseline_stats, asset_regimes)
     
     print("\n----- Sending Prompt to Gemini Planner -----")
     print(prompt)
@@ -8,8 +8,11 @@ import pandas as pd
 from src.utils.config import config
 from src.utils.logging import setup_logging
 from src.data.ingest import fetch_ohlcv_data, fetch_fred_data
-from src.features.engine import compute_features
-from src.features.regime import detect_regime
+from src.features.cross_section import cross_sectional_features
+from src.features.engine import compute_panel_features
+from src.features.hmm import current_regime
+from src.features.online import incremental_features
+from src.features.regime import BREADTH_FEATURE, label_regime_panel
 from src.backtest.runner import run_backtest
 from src.backtest.simple_backtest import basic_momentum_backtest
 from src.agent.planner import propose_actions
@@ -231,10 +234,21 @@ def main():
         logger.error(f"Reference asset '{ref_asset}' data not found. Aborting.")
         return
 
+    fred_data = fetch_fred_data()
+
     logger.info("Step 2: Computing features and detecting regime...")
-    features_df = compute_features(ohlcv_data, ref_asset, config['vix_ticker'])
-    current_regime = detect_regime(features_df)
-    logger.info(f"--> Current Detected Regime: {current_regime}")
+    features_df = incremental_features(ohlcv_data, ref_asset, config['vix_ticker'], macro_data=fred_data)
+    universe = [t for t in config.get('universe', []) if t in ohlcv_data]
+    asset_regimes = None
+    if len(universe) > 1:
+        panel_features = compute_panel_features(ohlcv_data, tickers=universe, vix_ticker=config['vix_ticker'])
+        _, market_features = cross_sectional_features(panel_features)
+        features_df = features_df.join(market_features)
+        asset_regimes = label_regime_panel(panel_features, market_features[BREADTH_FEATURE]).latest()
+    regime = current_regime(features_df)
+    logger.info(f"--> Current Detected Regime: {regime}")
+    if asset_regimes:
+        logger.info(f"--> Per-asset regimes: {asset_regimes}")
 
     # 3. Baseline backtest
     logger.info("Step 3: Running baseline backtest...")
@@ -272,14 +286,15 @@ def main():
     else:
         try:
             llm_proposals = propose_actions(
-                regime=current_regime,
+                regime=regime,
                 features_df=features_df,
-                baseline_stats=baseline_for_planner
+                baseline_stats=baseline_for_planner,
+                asset_regimes=asset_regimes
             ) or []
         except Exception as e:
             logger.error("Error while querying LLM planner: %s", e, exc_info=True)
             logger.info("Falling back to deterministic proposals so the pipeline can continue.")
-            llm_proposals = _fallback_propose_actions(current_regime, features_df, baseline_strategy.get('default_params', {}))
+            llm_proposals = _fallback_propose_actions(regime, features_df, baseline_strategy.get('default_params', {}))
 
     # 5. Test & Evaluate proposals
     all_results = []
@@ -34,10 +34,11 @@ from typing import Dict, List, Any, Optional
 
 # Internal module imports for core functionality
 from src.agent.simple_planner import generate_strategy_proposals
-from src.backtest.runner import run_backtest
+from src.backtest.runner import run_backtest, run_momentum_grid_backtest
+from src.data.catalog import get_catalog
 from src.data.ingest import fetch_ohlcv_data
 from src.features.engine import compute_features
-from src.features.regime import detect_regime
+from src.features.hmm import current_regime
 from src.utils.config import config
 from src.visualization.plots import (
     plot_portfolio_performance,
@@ -60,10 +61,15 @@ st.set_page_config(
 
 def load_available_assets() -> List[str]:
     """
-    Load available assets from the data store directory.
+    Load available assets from the data catalog.
     
-    Scans the data_store directory for parquet files and extracts asset symbols.
-    This allows the UI to dynamically populate available assets without hardcoding.
+    Reads the data_store manifest maintained by the ingest layer, so the UI can
+    populate available assets without opening or even listing data files.
+    Falls back to scanning data_store for legacy parquet files when no
+    manifest exists yet.
+    
+    Symbols are shown as the legacy file names were ('^VIX' -> 'VIX'), so
+    saved selections and lookups keyed on those names keep working.
     
     Returns:
         List[str]: List of available asset symbols (e.g., ['SPY', 'QQQ', 'TLT'])
@@ -71,12 +77,14 @@ def load_available_assets() -> List[str]:
     Note:
         Returns empty list if data_store directory doesn't exist or contains no parquet files.
     """
+    assets = sorted({symbol.replace('^', '') for symbol in get_catalog().symbols('ohlcv')})
+    if assets:
+        return assets
+
     data_dir = os.path.join(os.getcwd(), "data_store")
-    assets = []
-    
     if os.path.exists(data_dir):
         for file in os.listdir(data_dir):
-            if file.endswith(".parquet"):
+            if file.endswith(".parquet") and not file.startswith("FRED_"):
                 # Extract symbol by removing .parquet extension
                 assets.append(file.split(".")[0])
     
@@ -151,6 +159,28 @@ def optimize_strategy_parameters(strategy_info, data, num_trials=50):
     best_params = params.copy()
     results = []
     
+    if strategy_type == "momentum" and {"fast_window", "slow_window"} <= set(params):
+        # All trials in one vectorised grid backtest instead of one backtest per trial
+        fast = np.random.randint(param_spaces["fast_window"]["min"], param_spaces["fast_window"]["max"], num_trials)
+        slow = np.random.randint(param_spaces["slow_window"]["min"], param_spaces["slow_window"]["max"], num_trials)
+        try:
+            grid = run_momentum_grid_backtest(data, assets, fast, slow, product=False,
+                                              allocation_weights=strategy_info.get("allocation_weights"))
+        except Exception as e:
+            st.error(f"Error during optimization: {str(e)}")
+            grid = pd.DataFrame(columns=["sharpe_ratio"])
+        for (fast_window, slow_window), sharpe in grid["sharpe_ratio"].items():
+            trial_params = {**params, "fast_window": int(fast_window), "slow_window": int(slow_window)}
+            results.append({"params": trial_params, "sharpe": sharpe})
+            if sharpe > best_sharpe:
+                best_sharpe = sharpe
+                best_params = trial_params.copy()
+        return {
+            "optimized_params": best_params,
+            "trials": results,
+            "best_sharpe": best_sharpe
+        }
+    
     for _ in range(num_trials):
         trial_params = params.copy()
         
@@ -284,7 +314,7 @@ def main():
                 features_df = compute_features(data, ref_asset_ticker='SPY')
                 
                 # Detect market regime
-                regime = detect_regime(features_df)
+                regime = current_regime(features_df)
                 
                 # Run a baseline momentum strategy for comparison
                 baseline_params = {"fast_window": 21, "slow_window": 63}
@@ -1,4 +1,43 @@
 import numpy as np
+import pandas as pd
+
+from src.utils.frequency import annualization_factor, periods_per_year
+
+
+def sharpe_ratio(returns, bar_freq=None, risk_free_rate=0.0):
+    """
+    Annualised Sharpe ratio of per-bar returns.
+
+    Args:
+        returns (pd.Series): Per-bar simple returns.
+        bar_freq (str, optional): Bar size ('1m', '1h', '1d', ...). Inferred from the index if None.
+        risk_free_rate (float): Annual risk-free rate.
+
+    Returns:
+        float: 0.0 when the returns have no dispersion.
+    """
+    returns = pd.Series(returns).dropna()
+    if len(returns) < 2 or returns.std() == 0:
+        return 0.0
+    excess = returns - risk_free_rate / periods_per_year(bar_freq, returns.index)
+    return float(excess.mean() / excess.std() * annualization_factor(bar_freq, returns.index))
+
+
+def annualized_volatility(returns, bar_freq=None):
+    """Standard deviation of per-bar returns scaled to one year."""
+    returns = pd.Series(returns).dropna()
+    return float(returns.std() * annualization_factor(bar_freq, returns.index))
+
+
+def annualized_return(equity_curve, bar_freq=None):
+    """Compound annual growth rate of an equity curve sampled once per bar."""
+    equity_curve = pd.Series(equity_curve).dropna()
+    if len(equity_curve) < 2:
+        return 0.0
+    total_return = equity_curve.iloc[-1] / equity_curve.iloc[0]
+    years = len(equity_curve) / periods_per_year(bar_freq, equity_curve.index)
+    return float(total_return ** (1.0 / years) - 1.0)
+
 
 def calculate_custom_metrics(portfolio):
     """
@@ -45,11 +45,60 @@ except Exception:
 import pandas as pd
 import numpy as np
 import inspect
+import logging
 
+from src.backtest.metrics import sharpe_ratio
+from src.data.schemas import is_canonical_ohlcv
 from src.strategies.strategy_registry import get_strategy_function
 from src.utils.config import config
+from src.utils.frequency import (annualization_factor, bar_timedelta, default_bar_freq, infer_bar_freq,
+                                 parse_bar_freq)
 
-def run_backtest(ohlcv_data, assets, strategy_name, params, allocation_weights=None):
+logger = logging.getLogger(__name__)
+
+
+def _get_close_series(x: pd.DataFrame | pd.Series) -> pd.Series:
+    """Close-like price series from various input shapes / column names."""
+    if isinstance(x, pd.Series):
+        return pd.to_numeric(x, errors='coerce').dropna()
+    if is_canonical_ohlcv(x):
+        # Canonical frames from the ingest layer: 'Close' is already float64
+        return x['Close'].dropna()
+    try:
+        cols_list = list(x.columns)
+    except Exception:
+        cols_list = []
+    logger.debug("Available columns in data: %s", cols_list)
+    # Prepare a map of lowercased stringified column names to original
+    col_map = {str(c).lower(): c for c in x.columns}
+    # Try common column names first
+    for cand in ('close', 'adj close', 'adjclose', 'price'):
+        if cand in col_map:
+            c = col_map[cand]
+            return pd.to_numeric(x[c], errors='coerce').dropna()
+    # Fallback: first numeric column
+    for col in x.columns:
+        try:
+            s = pd.to_numeric(x[col], errors='coerce')
+        except Exception:
+            try:
+                s = pd.to_numeric(x.loc[:, col], errors='coerce')
+            except Exception:
+                continue
+        if s.notna().any():
+            return s.dropna()
+    raise KeyError(f"No close-like column found. Available columns: {cols_list}")
+
+
+def _allocation_weights(assets, allocation_weights=None):
+    """Per-asset weights summing to 1 (equal weights when none are given)."""
+    if allocation_weights is None:
+        return {asset: 1.0 / len(assets) for asset in assets}
+    total_weight = sum(allocation_weights.values())
+    return {asset: allocation_weights.get(asset, 0) / total_weight for asset in assets}
+
+
+def run_backtest(ohlcv_data, assets, strategy_name, params, allocation_weights=None, bar_freq=None):
     """
     Execute a comprehensive backtest for a given strategy and asset universe.
     
@@ -63,6 +112,8 @@ def run_backtest(ohlcv_data, assets, strategy_name, params, allocation_weights=N
         strategy_name (str): Name of the strategy to execute
         params (Dict): Strategy parameters and configuration
         allocation_weights (Dict, optional): Asset allocation weights for portfolio
+        bar_freq (str, optional): Bar size of the data ('1m', '1h', '1d', ...). Inferred
+            from the first asset's index if None; drives annualisation of all metrics.
         
     Returns:
         Dict: Comprehensive backtest results including:
@@ -100,53 +151,21 @@ def run_backtest(ohlcv_data, assets, strategy_name, params, allocation_weights=N
             print(f"Warning: Missing or empty OHLCV data for {asset}, cannot run backtest.")
             return None
 
+    # Bar size drives vectorbt's freq and every annualised metric
+    if bar_freq is None:
+        bar_freq = infer_bar_freq(ohlcv_dict[assets[0]].index) or default_bar_freq()
+    bar_freq = parse_bar_freq(bar_freq)
+
     # Retrieve the strategy signal generation function
     strategy_func = get_strategy_function(strategy_name)
     
-    # Helper: get a Close-like price series from various input shapes/column names
-    def _get_close_series(x: pd.DataFrame | pd.Series) -> pd.Series:
-        if isinstance(x, pd.Series):
-            return pd.to_numeric(x, errors='coerce').dropna()
-        # Debug: print available columns
-        try:
-            cols_list = list(x.columns)
-        except Exception:
-            cols_list = []
-        print(f"Available columns in data: {cols_list}")
-        # Prepare a map of lowercased stringified column names to original
-        col_map = {str(c).lower(): c for c in x.columns}
-        # Try common column names first
-        for cand in ('close', 'adj close', 'adjclose', 'price'):
-            if cand in col_map:
-                c = col_map[cand]
-                return pd.to_numeric(x[c], errors='coerce').dropna()
-        # Fallback: first numeric column
-        for col in x.columns:
-            try:
-                s = pd.to_numeric(x[col], errors='coerce')
-            except Exception:
-                try:
-                    s = pd.to_numeric(x.loc[:, col], errors='coerce')
-                except Exception:
-                    continue
-            if s.notna().any():
-                return s.dropna()
-        raise KeyError(f"No close-like column found. Available columns: {cols_list}")
-
     # For simplicity, we'll run the backtest on each asset separately and then combine the results
     # Future improvement: Implement proper portfolio allocation across assets
     
     all_results = {}
     combined_portfolio_value = None
     
-    # Determine allocation weights
-    if allocation_weights is None:
-        # Equal weighting if not provided
-        weights = {asset: 1.0 / len(assets) for asset in assets}
-    else:
-        # Normalize weights to ensure they sum to 1.0
-        total_weight = sum(allocation_weights.values())
-        weights = {asset: allocation_weights.get(asset, 0) / total_weight for asset in assets}
+    weights = _allocation_weights(assets, allocation_weights)
     
     def _normalize_params_for_strategy(name: str, func, params: dict) -> dict:
         p = dict(params or {})
@@ -178,14 +197,14 @@ def run_backtest(ohlcv_data, assets, strategy_name, params, allocation_weights=N
             p.setdefault('regime_data', 'neutral')
             p.setdefault('momentum_params', {'fast_window': 21, 'slow_window': 63})
             p.setdefault('mean_reversion_params', {'window': 20, 'num_std': 2.0})
-            print(f"DEBUG regime_based after defaults: {p}")
+            logger.debug("regime_based after defaults: %s", p)
             # Ensure regime_data is properly formatted
             if 'regime_data' in p:
                 rd = p['regime_data']
-                print(f"DEBUG regime_data before filtering: type={type(rd)}, value={rd}")
+                logger.debug("regime_data before filtering: type=%s, value=%s", type(rd), rd)
                 if isinstance(rd, (tuple, list)):
                     p['regime_data'] = str(rd[0]) if len(rd) > 0 else 'neutral'
-                    print(f"DEBUG regime_data converted from tuple/list to: {p['regime_data']}")
+                    logger.debug("regime_data converted from tuple/list to: %s", p['regime_data'])
                 elif isinstance(rd, dict):
                     name_val = rd.get('name', rd)
                     if isinstance(name_val, (tuple, list)):
@@ -196,7 +215,7 @@ def run_backtest(ohlcv_data, assets, strategy_name, params, allocation_weights=N
                     p['regime_data'] = rd
                 elif not isinstance(rd, str):
                     p['regime_data'] = str(rd)
-                    print(f"DEBUG regime_data converted to string: {p['regime_data']}")
+                    logger.debug("regime_data converted to string: %s", p['regime_data'])
         elif name == 'volatility':
             p.setdefault('window', 21)
             p.setdefault('vol_threshold', 0.2)
@@ -205,19 +224,16 @@ def run_backtest(ohlcv_data, assets, strategy_name, params, allocation_weights=N
             p.setdefault('num_std', 2.0)
 
         # Filter unknown keys to avoid unexpected keyword errors
-        print(f"DEBUG: Strategy {name}, original params: {p}")
-        print(f"DEBUG: Accepted params: {accepted}")
+        logger.debug("Strategy %s, original params: %s", name, p)
+        logger.debug("Accepted params: %s", accepted)
         filtered = {k: v for k, v in p.items() if k in accepted}
-        print(f"DEBUG: Filtered params: {filtered}")
+        logger.debug("Filtered params: %s", filtered)
         return filtered
 
     for asset in assets:
         df = ohlcv_dict[asset]
         
-        # Debug: Print dataframe info before backtesting
-        print(f"Asset: {asset}")
-        print(f"Columns: {df.columns}")
-        print(f"Data head:\n{df.head()}")
+        logger.debug("Asset: %s, columns: %s", asset, list(df.columns))
         
         # Generate signals for this asset depending on strategy type
         entries = None
@@ -251,7 +267,7 @@ def run_backtest(ohlcv_data, assets, strategy_name, params, allocation_weights=N
                     close=_get_close_series(ohlcv_dict[asset]),
                     entries=entries,
                     exits=exits,
-                    freq='D',  # Daily frequency
+                    freq=bar_timedelta(bar_freq),
                     init_cash=init_cash,  # Weighted allocation
                     fees=config['backtest']['commission'],
                     slippage=config['backtest']['slippage']
@@ -259,7 +275,8 @@ def run_backtest(ohlcv_data, assets, strategy_name, params, allocation_weights=N
                 # Store asset-specific results
                 all_results[asset] = {
                     'total_return': portfolio.total_return(),
-                    'sharpe_ratio': portfolio.sharpe_ratio(),
+                    # vectorbt annualises over 365-day years; use the bar-aware trading-year factor
+                    'sharpe_ratio': sharpe_ratio(portfolio.returns(), bar_freq),
                     'max_drawdown': portfolio.max_drawdown(),
                     'num_trades': portfolio.trades.count()
                 }
@@ -287,7 +304,7 @@ def run_backtest(ohlcv_data, assets, strategy_name, params, allocation_weights=N
                 # Metrics
                 total_return = (pv.iloc[-1] / pv.iloc[0]) - 1.0 if len(pv) > 1 else 0.0
                 try:
-                    sr = (strat_ret.mean() / (strat_ret.std() + 1e-12)) * np.sqrt(252.0)
+                    sr = sharpe_ratio(strat_ret, bar_freq)
                 except Exception:
                     sr = None
                 dd = (pv / pv.cummax() - 1.0).min() if len(pv) > 0 else None
@@ -316,10 +333,7 @@ def run_backtest(ohlcv_data, assets, strategy_name, params, allocation_weights=N
         # Calculate combined metrics
         # Calculate proper Sharpe ratio from combined portfolio returns
         portfolio_returns = combined_portfolio_value.pct_change().dropna()
-        if len(portfolio_returns) > 1 and portfolio_returns.std() > 0:
-            sharpe_ratio = (portfolio_returns.mean() / portfolio_returns.std()) * np.sqrt(252.0)
-        else:
-            sharpe_ratio = 0.0
+        combined_sharpe = sharpe_ratio(portfolio_returns, bar_freq)
         
         # Calculate max drawdown (as positive percentage)
         drawdown_series = (combined_portfolio_value / combined_portfolio_value.cummax() - 1)
@@ -327,7 +341,7 @@ def run_backtest(ohlcv_data, assets, strategy_name, params, allocation_weights=N
         
         metrics = {
             'total_return': (combined_portfolio_value.iloc[-1] / combined_portfolio_value.iloc[0]) - 1,
-            'sharpe_ratio': sharpe_ratio,
+            'sharpe_ratio': combined_sharpe,
             'max_drawdown': max_drawdown,
             'num_trades': sum(result['num_trades'] for result in all_results.values())
         }
@@ -344,4 +358,66 @@ def run_backtest(ohlcv_data, assets, strategy_name, params, allocation_weights=N
             "metrics": metrics
         }
     
-    return None
\ No newline at end of file
+    return None
+
+
+def run_momentum_grid_backtest(ohlcv_data, assets, fast_windows, slow_windows, product=True,
+                               allocation_weights=None, bar_freq=None):
+    """
+    Momentum crossover backtest of a whole (fast, slow) parameter grid in one vectorised pass.
+
+    Signals for every pair come from `create_momentum_signal_grid` and are
+    simulated like the pandas fallback of `run_backtest`: long from entry to
+    exit, one weighted sub-portfolio per asset, summed on common dates.
+
+    Args:
+        ohlcv_data (Dict[str, pd.DataFrame]): Market data for each asset
+        assets (List[str]): Asset symbols in the portfolio
+        fast_windows, slow_windows: Window values (see `momentum_grid_pairs`)
+        product (bool): Sweep all fast < slow combinations (True) or zip the windows
+        allocation_weights (Dict, optional): Asset allocation weights
+        bar_freq (str, optional): Bar size; inferred from the first asset's index if None
+
+    Returns:
+        pd.DataFrame: One row per (fast_window, slow_window) pair with the
+        total_return, sharpe_ratio, max_drawdown and num_trades of `run_backtest`.
+    """
+    from src.strategies.momentum import create_momentum_signal_grid
+
+    missing = [asset for asset in assets if asset not in ohlcv_data or ohlcv_data[asset].empty]
+    if missing:
+        raise ValueError(f"Missing or empty OHLCV data for {missing}")
+    if bar_freq is None:
+        bar_freq = infer_bar_freq(ohlcv_data[assets[0]].index) or default_bar_freq()
+    bar_freq = parse_bar_freq(bar_freq)
+    weights = _allocation_weights(assets, allocation_weights)
+
+    combined = None
+    num_trades = 0
+    for asset in assets:
+        close = _get_close_series(ohlcv_data[asset])
+        entries, exits = create_momentum_signal_grid(close, fast_windows, slow_windows, product)
+        # Exits win over same-bar entries, as in run_backtest's position series
+        state = np.where(exits.to_numpy(), 0.0, np.where(entries.to_numpy(), 1.0, np.nan))
+        pos = pd.DataFrame(state, index=close.index).ffill().fillna(0.0).to_numpy()
+        strat_ret = np.zeros_like(pos)
+        strat_ret[1:] = close.pct_change().to_numpy()[1:, None] * pos[:-1]
+        init_cash = config['backtest']['initial_cash'] * weights[asset]
+        pv = pd.DataFrame(init_cash * np.cumprod(1.0 + strat_ret, axis=0), index=close.index,
+                          columns=entries.columns)
+        if combined is None:
+            combined = pv
+        else:
+            common_idx = combined.index.intersection(pv.index)
+            combined = combined.loc[common_idx] + pv.loc[common_idx]
+        num_trades = num_trades + entries.sum().to_numpy()
+
+    returns = combined.pct_change().iloc[1:]
+    std = returns.std()
+    sharpe = returns.mean() / std * annualization_factor(bar_freq, combined.index)
+    return pd.DataFrame({
+        'total_return': combined.iloc[-1] / combined.iloc[0] - 1,
+        'sharpe_ratio': sharpe.where(std > 0, 0.0),
+        'max_drawdown': (combined / combined.cummax() - 1).min().abs(),
+        'num_trades': num_trades,
+    })
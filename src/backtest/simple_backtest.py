@@ -3,6 +3,8 @@ from typing import Dict, Any
 import numpy as np
 import pandas as pd
 
+from src.utils.frequency import periods_per_year as bars_per_year
+
 def max_drawdown_from_equity(equity: pd.Series) -> float:
     equity = equity.dropna()
     if equity.empty:
@@ -20,15 +22,15 @@ def ensure_equity_from_returns(maybe_series: pd.Series) -> pd.Series:
         return (1 + s).cumprod()
     return s
 
-def calculate_sharpe(daily_returns: pd.Series, risk_free_rate: float = 0.0) -> float:
+def calculate_sharpe(daily_returns: pd.Series, risk_free_rate: float = 0.0, periods_per_year: float = 252) -> float:
     """
-    Calculate annualized Sharpe Ratio from daily returns.
+    Calculate annualized Sharpe Ratio from per-bar returns (daily by default).
     """
     if daily_returns.empty or daily_returns.std() == 0:
         return 0.0
-    excess_returns = daily_returns - (risk_free_rate / 252)
+    excess_returns = daily_returns - (risk_free_rate / periods_per_year)
     # Annualized Sharpe
-    return (excess_returns.mean() / excess_returns.std()) * np.sqrt(252)
+    return (excess_returns.mean() / excess_returns.std()) * np.sqrt(periods_per_year)
 
 def basic_momentum_backtest(ohlcv_df: pd.DataFrame, params: Dict[str, Any]) -> Dict[str, Any]:
     """
@@ -70,7 +72,7 @@ def basic_momentum_backtest(ohlcv_df: pd.DataFrame, params: Dict[str, Any]) -> D
     total_return = float(equity.iloc[-1] - 1.0)
     
     # Use the robust Sharpe calculation
-    sharpe = calculate_sharpe(strat_returns)
+    sharpe = calculate_sharpe(strat_returns, periods_per_year=bars_per_year(index=close.index))
 
     max_dd = max_drawdown_from_equity(equity)
 
@@ -0,0 +1,206 @@
+"""
+Data Catalog Manifest
+=====================
+
+A single JSON manifest (data_store/manifest.json) describing everything the
+ingest layer has stored, so coverage and staleness questions are answered
+from metadata instead of opening Parquet files.
+
+Per (kind, symbol) entry:
+- first / last: first and last timestamp stored
+- rows: number of stored bars / observations
+- schema: {column: dtype}
+- checksum: content digest, chained across incremental appends; changes
+  whenever the stored data changes, so it doubles as a cache-validation key
+- source: provider the data came from
+- updated_at: UTC time of the last write
+
+Usage:
+    from src.data.catalog import get_catalog
+    catalog = get_catalog()
+    catalog.coverage('SPY')          # {'first': ..., 'last': ..., 'rows': ...}
+    catalog.stale(max_age_bdays=1)   # tickers that need a refresh
+
+Author: AgentQuant Development Team
+License: MIT
+"""
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Union
+
+import pandas as pd
+from pandas.tseries.offsets import BDay
+
+from src.utils.config import config
+
+MANIFEST_FILE = "manifest.json"
+MANIFEST_VERSION = 1
+
+
+def frame_digest(df: pd.DataFrame) -> str:
+    """Stable content digest of a frame (values and index)."""
+    hashed = pd.util.hash_pandas_object(df, index=True).to_numpy()
+    return hashlib.sha256(hashed.tobytes()).hexdigest()[:32]
+
+
+class DataCatalog:
+    """
+    In-memory view of the manifest with thread-safe updates.
+
+    `record` / `record_append` only touch memory; call `save()` once a batch
+    of writes is done (ingest does this at the end of every fetch/refresh).
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._mtime_ns = None
+        self.entries: Dict[str, dict] = {}
+        self.reload()
+
+    @staticmethod
+    def _key(kind: str, symbol: str) -> str:
+        return f"{kind}/{symbol}"
+
+    def reload(self) -> None:
+        """Re-reads the manifest from disk, discarding unsaved changes."""
+        with self._lock:
+            if self.path.exists():
+                payload = json.loads(self.path.read_text())
+                self.entries = payload.get("entries", {})
+                self._mtime_ns = self.path.stat().st_mtime_ns
+            else:
+                self.entries = {}
+                self._mtime_ns = None
+            self._dirty = False
+
+    def is_outdated(self) -> bool:
+        """True if another process rewrote the manifest since it was loaded."""
+        mtime = self.path.stat().st_mtime_ns if self.path.exists() else None
+        return mtime != self._mtime_ns
+
+    def save(self) -> None:
+        """Atomically writes pending changes to disk."""
+        with self._lock:
+            if not self._dirty:
+                return
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+            tmp.write_text(json.dumps({"version": MANIFEST_VERSION, "entries": self.entries}, indent=2, sort_keys=True))
+            os.replace(tmp, self.path)
+            self._mtime_ns = self.path.stat().st_mtime_ns
+            self._dirty = False
+
+    # --- Updates ---
+
+    def record(self, kind: str, symbol: str, df: pd.DataFrame, source: Optional[str] = None) -> dict:
+        """Registers a full (re)write of `symbol`."""
+        entry = {
+            "kind": kind,
+            "symbol": symbol,
+            "first": df.index.min().isoformat() if len(df) else None,
+            "last": df.index.max().isoformat() if len(df) else None,
+            "rows": int(len(df)),
+            "schema": {str(c): str(t) for c, t in df.dtypes.items()},
+            "checksum": frame_digest(df),
+            "source": source,
+            "updated_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        }
+        with self._lock:
+            self.entries[self._key(kind, symbol)] = entry
+            self._dirty = True
+        return entry
+
+    def record_append(self, kind: str, symbol: str, tail: pd.DataFrame, source: Optional[str] = None) -> dict:
+        """Registers bars appended after the currently recorded `last`."""
+        with self._lock:
+            entry = self.entries.get(self._key(kind, symbol))
+        if entry is None or entry.get("rows") is None:
+            raise KeyError(f"No catalog entry for {kind}/{symbol}; record the full history first.")
+        if tail.empty:
+            return entry
+        entry = dict(entry)
+        entry.update({
+            "last": tail.index.max().isoformat(),
+            "rows": entry["rows"] + int(len(tail)),
+            "checksum": hashlib.sha256((entry["checksum"] + frame_digest(tail)).encode()).hexdigest()[:32],
+            "source": source or entry.get("source"),
+            "updated_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        })
+        with self._lock:
+            self.entries[self._key(kind, symbol)] = entry
+            self._dirty = True
+        return entry
+
+    def remove(self, kind: str, symbol: str) -> None:
+        with self._lock:
+            if self.entries.pop(self._key(kind, symbol), None) is not None:
+                self._dirty = True
+
+    # --- Queries ---
+
+    def get(self, symbol: str, kind: str = "ohlcv") -> Optional[dict]:
+        return self.entries.get(self._key(kind, symbol))
+
+    def symbols(self, kind: str = "ohlcv") -> List[str]:
+        """All symbols of `kind` in the manifest."""
+        return sorted(e["symbol"] for e in self.entries.values() if e.get("kind") == kind)
+
+    def coverage(self, symbol: str, kind: str = "ohlcv") -> Optional[dict]:
+        """{'first', 'last' (Timestamps), 'rows'} for `symbol`, or None if unknown."""
+        entry = self.get(symbol, kind)
+        if entry is None:
+            return None
+        return {
+            "first": pd.Timestamp(entry["first"]) if entry.get("first") else None,
+            "last": pd.Timestamp(entry["last"]) if entry.get("last") else None,
+            "rows": entry.get("rows"),
+        }
+
+    def stale(
+        self,
+        symbols: Optional[Sequence[str]] = None,
+        kind: str = "ohlcv",
+        as_of=None,
+        max_age_bdays: int = 1,
+    ) -> List[str]:
+        """
+        Symbols whose last stored timestamp is more than `max_age_bdays`
+        business days before `as_of` (default: today). Symbols missing from
+        the manifest are always stale.
+        """
+        cutoff = pd.Timestamp(as_of or pd.Timestamp.today()).normalize() - BDay(max_age_bdays)
+        symbols = self.symbols(kind) if symbols is None else list(symbols)
+        out = []
+        for s in symbols:
+            cov = self.coverage(s, kind)
+            if cov is None or cov["last"] is None or cov["last"].normalize() < cutoff:
+                out.append(s)
+        return out
+
+    def fingerprint(self, symbols: Sequence[str], kind: str = "ohlcv") -> str:
+        """Digest over the checksums of `symbols`, for keying downstream caches."""
+        parts = [f"{s}:{(self.get(s, kind) or {}).get('checksum')}" for s in symbols]
+        return hashlib.sha256("|".join(parts).encode()).hexdigest()[:32]
+
+
+_catalogs: Dict[Path, DataCatalog] = {}
+_catalogs_lock = threading.Lock()
+
+
+def get_catalog(data_path: Optional[Union[str, Path]] = None) -> DataCatalog:
+    """Process-wide catalog for `data_path`, reloaded if another process rewrote it."""
+    path = (Path(data_path or config['data_path']) / MANIFEST_FILE).resolve()
+    with _catalogs_lock:
+        catalog = _catalogs.get(path)
+        if catalog is None:
+            catalog = _catalogs[path] = DataCatalog(path)
+            return catalog
+    if catalog.is_outdated() and not catalog._dirty:
+        catalog.reload()
+    return catalog
@@ -0,0 +1,174 @@
+"""
+Concurrent Fetch Engine
+=======================
+
+Bounded, rate-limited, retrying fan-out used by the ingest layer to download
+many tickers / series at once without hammering a single provider.
+
+Key Features:
+- Bounded thread pool (network calls release the GIL)
+- Token-bucket rate limiter shared per provider
+- Retries with full-jitter exponential backoff
+- Per-key failure isolation: one bad ticker never aborts the batch
+
+Usage:
+    from src.data.fetcher import fetch_many, get_rate_limiter
+    limiter = get_rate_limiter('yfinance')
+    results, errors = fetch_many(tickers, limiter.wrap(download_one))
+
+Author: AgentQuant Development Team
+License: MIT
+"""
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional, Tuple
+
+from src.utils.config import config
+
+logger = logging.getLogger(__name__)
+
+_DEFAULT_FETCH_CONFIG = {
+    'max_workers': 8,
+    'max_retries': 3,
+    'backoff_seconds': 0.5,
+    'max_backoff_seconds': 8.0,
+    'rate_limits': {},
+}
+
+
+def _fetch_config() -> Dict[str, Any]:
+    """Returns the `data.fetch` config section merged over defaults."""
+    merged = dict(_DEFAULT_FETCH_CONFIG)
+    merged.update(config.get('data', {}).get('fetch', {}) or {})
+    return merged
+
+
+class RateLimiter:
+    """
+    Thread-safe token bucket.
+
+    Allows `rate` acquisitions per second on average with bursts of up to
+    `burst` calls. A `rate` of None or <= 0 disables limiting.
+    """
+
+    def __init__(self, rate: Optional[float], burst: Optional[int] = None):
+        self.rate = float(rate) if rate else 0.0
+        self.capacity = float(burst if burst is not None else max(1.0, self.rate))
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Blocks until a token is available."""
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return
+                wait = (1.0 - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def wrap(self, fn: Callable) -> Callable:
+        """Returns `fn` with every call gated by this limiter."""
+        def _limited(*args, **kwargs):
+            self.acquire()
+            return fn(*args, **kwargs)
+        _limited.__name__ = getattr(fn, '__name__', type(fn).__name__)
+        return _limited
+
+
+_rate_limiters: Dict[str, RateLimiter] = {}
+_rate_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(provider: str) -> RateLimiter:
+    """
+    Returns the process-wide limiter for `provider`.
+
+    Rates come from `data.fetch.rate_limits` in config.yaml (requests per
+    second); unknown providers fall back to the `default` entry, if any.
+    """
+    with _rate_limiters_lock:
+        if provider not in _rate_limiters:
+            limits = _fetch_config()['rate_limits'] or {}
+            _rate_limiters[provider] = RateLimiter(limits.get(provider, limits.get('default')))
+        return _rate_limiters[provider]
+
+
+def _call_with_retries(fn: Callable, key: Hashable, max_retries: int,
+                       backoff: float, max_backoff: float,
+                       rate_limiter: Optional[RateLimiter]) -> Any:
+    attempt = 0
+    while True:
+        if rate_limiter is not None:
+            rate_limiter.acquire()
+        try:
+            return fn(key)
+        except Exception as e:
+            if attempt >= max_retries:
+                raise
+            # Full jitter keeps many failing workers from retrying in lockstep.
+            delay = random.uniform(0.0, min(max_backoff, backoff * (2 ** attempt)))
+            logger.debug("Fetch of %r failed (%s); retry %d/%d in %.2fs", key, e, attempt + 1, max_retries, delay)
+            time.sleep(delay)
+            attempt += 1
+
+
+def fetch_many(
+    keys: Iterable[Hashable],
+    fetch_fn: Callable[[Hashable], Any],
+    max_workers: Optional[int] = None,
+    rate_limiter: Optional[RateLimiter] = None,
+    max_retries: Optional[int] = None,
+    backoff: Optional[float] = None,
+) -> Tuple[Dict[Hashable, Any], Dict[Hashable, Exception]]:
+    """
+    Runs `fetch_fn(key)` for every key on a bounded thread pool.
+
+    Args:
+        keys: Tickers / series ids to fetch.
+        fetch_fn: Callable returning the payload for one key; None means "no data".
+        max_workers: Pool size. Defaults to `data.fetch.max_workers`.
+        rate_limiter: Optional limiter acquired before every attempt.
+        max_retries: Retries per key after the first failure.
+        backoff: Base delay in seconds for the jittered exponential backoff.
+
+    Returns:
+        (results, errors): payloads keyed in input order (None payloads are
+        dropped) and the final exception for every key that kept failing.
+    """
+    cfg = _fetch_config()
+    keys = list(dict.fromkeys(keys))
+    max_workers = max_workers or cfg['max_workers']
+    max_retries = cfg['max_retries'] if max_retries is None else max_retries
+    backoff = cfg['backoff_seconds'] if backoff is None else backoff
+    max_backoff = cfg['max_backoff_seconds']
+
+    results: Dict[Hashable, Any] = {}
+    errors: Dict[Hashable, Exception] = {}
+    if not keys:
+        return results, errors
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(keys))) as pool:
+        futures = {
+            key: pool.submit(_call_with_retries, fetch_fn, key, max_retries, backoff, max_backoff, rate_limiter)
+            for key in keys
+        }
+        for key, future in futures.items():
+            try:
+                value = future.result()
+            except Exception as e:
+                errors[key] = e
+                continue
+            if value is not None:
+                results[key] = value
+
+    return results, errors
@@ -8,11 +8,19 @@ sources including yfinance for equity/ETF data and FRED for macroeconomic indica
 
 Key Features:
 - Multi-source data integration (yfinance, FRED APIs)
+- Pluggable data sources incl. offline local-directory and synthetic providers (see src.data.sources)
 - Automatic data caching using Parquet format for efficiency
 - Comprehensive OHLCV data fetching for multiple assets
 - Macroeconomic indicators integration for regime analysis
 - Robust error handling and data validation
 - Configurable date ranges and update frequencies
+- Incremental tail-append refresh of cached tickers with overlap validation
+- Concurrent, rate-limited downloads with retries (see src.data.fetcher)
+- Optional year-partitioned store with date/column pushdown (see src.data.store)
+- Memory-mapped, calendar-aligned price panel for the universe (see src.data.panel)
+- In-process LRU cache of decoded frames keyed by file fingerprint
+- Manifest of stored coverage/checksums for O(1) staleness checks (see src.data.catalog)
+- Intraday bars in per-interval partitioned stores (see src.data.resample for aggregation)
 
 The module supports various asset types including:
 - Stocks and ETFs (via yfinance)
@@ -21,7 +29,9 @@ The module supports various asset types including:
 - Volatility indicators (VIX, etc.)
 
 Data is automatically cached in the data_store directory using Parquet format
-for fast loading and minimal storage requirements. The module handles missing
+for fast loading and minimal storage requirements, either as one
+<TICKER>.parquet file per asset or, with `data.store_layout: partitioned`,
+as ticker/year partitions under data_store/ohlcv. The module handles missing
 data, API errors, and provides fallback mechanisms for robust operation.
 
 Dependencies:
@@ -34,15 +44,37 @@ Dependencies:
 Author: AgentQuant Development Team
 License: MIT
 """
-import yfinance as yf
 import pandas as pd
-from fredapi import Fred
 from pathlib import Path
-from dotenv import load_dotenv
 import os
+import hashlib
+import json
+import threading
+import numpy as np
+from collections import OrderedDict
 from datetime import date
 
+from src.data.catalog import get_catalog
+from src.data.fetcher import fetch_many, get_rate_limiter
+from src.data.schemas import normalize_ohlcv
+from src.data.panel import PANEL_DIR, build_panel, load_panel, save_panel
+from src.data.sources import DataSource, YFinanceSource, get_source
+from src.data.store import (
+    append_ohlcv,
+    get_store_root,
+    has_ticker,
+    last_timestamp,
+    list_tickers,
+    read_ohlcv,
+    write_ohlcv,
+)
 from src.utils.config import config
+from src.utils.frequency import parse_bar_freq
+
+# Number of already-cached bars re-fetched on an incremental refresh so the
+# provider's view of recent history can be checked against the store.
+REFRESH_OVERLAP_BARS = 5
+
 
 def get_data_path():
     """Creates and returns the data storage path."""
@@ -50,7 +82,311 @@ def get_data_path():
     path.mkdir(parents=True, exist_ok=True)
     return path
 
-def fetch_ohlcv_data(ticker=None, start_date=None, end_date=None, force_download=False):
+
+# The yfinance source as a plain provider callable, kept for callers that pass
+# it explicitly. Any callable with this signature can be injected into
+# `fetch_ohlcv_data` / `refresh_ohlcv_data`; see src.data.sources.
+yfinance_provider = YFinanceSource()
+
+
+def _provider_name(provider):
+    """Name used for rate limiting and recorded as `source` in the data catalog."""
+    if isinstance(provider, DataSource):
+        return provider.name
+    return getattr(provider, '__name__', type(provider).__name__)
+
+
+def _rate_limited(provider):
+    """Gates every call to `provider` through its process-wide rate limiter."""
+    return get_rate_limiter(_provider_name(provider)).wrap(provider)
+
+
+def _write_parquet_atomic(df, file_path):
+    """Writes `df` next to `file_path` and renames it into place, so readers never see a partial file."""
+    file_path = Path(file_path)
+    tmp_path = file_path.with_name(f".{file_path.name}.{os.getpid()}.tmp")
+    try:
+        df.to_parquet(tmp_path)
+        os.replace(tmp_path, file_path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+
+
+def _overlap_matches(cached, fresh, rtol=1e-6):
+    """
+    Checks that bars present in both `cached` and `fresh` agree.
+
+    Returns False when the column layouts differ or any shared value moved by
+    more than `rtol` (e.g. the provider re-adjusted history after a dividend).
+    """
+    if set(cached.columns) != set(fresh.columns):
+        return False
+    common = cached.index.intersection(fresh.index)
+    if common.empty:
+        return False
+    old = cached.loc[common, cached.columns].to_numpy(dtype='float64')
+    new = fresh.loc[common, cached.columns].to_numpy(dtype='float64')
+    return bool(np.allclose(old, new, rtol=rtol, atol=0.0, equal_nan=True))
+
+
+def _flat_path(data_path, t):
+    return data_path / f"{t.replace('^', '')}.parquet"
+
+
+def _partitioned_layout():
+    """True when new OHLCV writes go to the partitioned store (see src.data.store)."""
+    return config['data'].get('store_layout', 'flat') == 'partitioned'
+
+
+def _has_cached(t, data_path):
+    return has_ticker(t, get_store_root(data_path)) or _flat_path(data_path, t).exists()
+
+
+def _read_cached(t, data_path, start_date=None, end_date=None, columns=None):
+    """
+    Reads cached bars for `t` from whichever layout holds them.
+
+    The configured layout is tried first; the other one is a fallback so
+    stores that are only partly migrated keep working. With the partitioned
+    layout the date range and columns are pushed down to Arrow.
+    """
+    root = get_store_root(data_path)
+    flat_path = _flat_path(data_path, t)
+    if has_ticker(t, root) and (_partitioned_layout() or not flat_path.exists()):
+        return read_ohlcv(t, start_date, end_date, columns=columns, root=root)
+
+    df = normalize_ohlcv(pd.read_parquet(flat_path, columns=columns))
+    if start_date:
+        df = df[df.index >= pd.to_datetime(start_date)]
+    if end_date:
+        df = df[df.index <= pd.to_datetime(end_date)]
+    return df
+
+
+def _save_cached(t, df, data_path, source=None):
+    """Writes the full history of `t` in the configured layout and records it in the catalog."""
+    df = normalize_ohlcv(df)
+    if _partitioned_layout():
+        write_ohlcv(t, df, get_store_root(data_path))
+    else:
+        _write_parquet_atomic(df, _flat_path(data_path, t))
+    get_catalog(data_path).record('ohlcv', t, df, source)
+
+
+def _ticker_file_stats(t, data_path):
+    """(relative path, mtime_ns, size) for every stored file backing `t`, in a stable order."""
+    files = sorted((get_store_root(data_path) / f"ticker={t.replace('^', '')}").glob("year=*/*.parquet"))
+    flat = _flat_path(data_path, t)
+    if flat.exists():
+        files.append(flat)
+    stats = []
+    for f in files:
+        st = f.stat()
+        stats.append((str(f.relative_to(data_path)), st.st_mtime_ns, st.st_size))
+    return tuple(stats)
+
+
+class FrameCache:
+    """
+    Bounded, thread-safe LRU cache of decoded OHLCV frames.
+
+    Entries are keyed by the (path, mtime, size) of every file backing a
+    ticker plus the requested range, so a rewritten file is never served
+    stale. Cached columns are stored as read-only arrays; `get` wraps them
+    in a fresh DataFrame without copying, so callers can add columns freely
+    but any in-place write to cached values raises instead of corrupting
+    the cache.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = int(max_bytes)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _freeze(df):
+        columns = {}
+        for c in df.columns:
+            arr = np.array(df[c].to_numpy(), copy=True)
+            arr.flags.writeable = False
+            columns[c] = arr
+        nbytes = sum(a.nbytes for a in columns.values()) + df.index.nbytes
+        return (list(df.columns), columns, df.index), nbytes
+
+    @staticmethod
+    def _thaw(entry):
+        cols, columns, index = entry
+        return pd.DataFrame({c: columns[c] for c in cols}, index=index, copy=False)
+
+    @classmethod
+    def read_only(cls, df):
+        """`df` with the same read-only columns a cache hit would return, without caching it."""
+        return cls._thaw(cls._freeze(df)[0])
+
+    def get(self, key):
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return self._thaw(item[0])
+
+    def put(self, key, df):
+        entry, nbytes = self._freeze(df)
+        if nbytes > self.max_bytes:
+            return self._thaw(entry)
+        with self._lock:
+            if key in self._entries:
+                self.current_bytes -= self._entries.pop(key)[1]
+            self._entries[key] = (entry, nbytes)
+            self.current_bytes += nbytes
+            while self.current_bytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.current_bytes -= evicted
+        return self._thaw(entry)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'entries': len(self._entries),
+                'bytes': self.current_bytes,
+                'max_bytes': self.max_bytes,
+            }
+
+
+frame_cache = FrameCache(config['data'].get('frame_cache_mb', 256) * 1024 * 1024)
+
+
+def _read_cached_frame(t, data_path, start_date=None, end_date=None):
+    """`_read_cached` behind the in-process LRU; the returned frame is read-only."""
+    key = (str(data_path), t, _ticker_file_stats(t, data_path), start_date, end_date)
+    df = frame_cache.get(key)
+    if df is None:
+        df = frame_cache.put(key, _read_cached(t, data_path, start_date, end_date))
+    return df
+
+
+def _refresh_ticker(t, data_path, provider, overlap=REFRESH_OVERLAP_BARS, source=None):
+    """
+    Brings one cached ticker up to date by fetching only the missing tail.
+
+    Falls back to a full download when nothing is cached yet or when the
+    re-fetched overlap disagrees with the store. Returns the number of bars
+    written, or None if the provider returned nothing usable.
+    """
+    if not _has_cached(t, data_path):
+        data = provider(t)
+        if data is None or data.empty:
+            print(f"Warning: No data found for {t}. Skipping.")
+            return None
+        _save_cached(t, data, data_path, source)
+        return len(data)
+
+    root = get_store_root(data_path)
+    in_partitioned = has_ticker(t, root) and (_partitioned_layout() or not _flat_path(data_path, t).exists())
+    if in_partitioned:
+        # Only the newest partition(s) are needed to validate and extend the store.
+        last_ts = last_timestamp(t, root)
+        cached = read_ohlcv(t, start=last_ts - pd.Timedelta(days=31), root=root)
+        if len(cached) < overlap:
+            cached = read_ohlcv(t, root=root)
+    else:
+        cached = _read_cached(t, data_path)
+    if cached.empty:
+        return len(_refetch_in_full(t, data_path, provider, source))
+
+    last_ts = cached.index.max()
+    overlap_start = cached.index[-min(overlap, len(cached))]
+    fresh = provider(t, start=overlap_start.strftime('%Y-%m-%d'))
+    if fresh is None or fresh.empty:
+        return 0
+    fresh = normalize_ohlcv(fresh)
+
+    if not _overlap_matches(cached, fresh):
+        print(f"Cached history for {t} no longer matches the provider; re-downloading in full.")
+        return len(_refetch_in_full(t, data_path, provider, source))
+
+    tail = fresh.loc[fresh.index > last_ts, cached.columns]
+    if tail.empty:
+        return 0
+
+    catalog = get_catalog(data_path)
+    if in_partitioned:
+        append_ohlcv(t, tail, root)
+        if catalog.get(t) is None:
+            catalog.record('ohlcv', t, read_ohlcv(t, root=root), source)
+        else:
+            catalog.record_append('ohlcv', t, tail, source)
+    else:
+        updated = pd.concat([cached, tail])
+        if _partitioned_layout():
+            # Legacy flat file: migrate the ticker while extending it.
+            write_ohlcv(t, updated, root)
+        else:
+            _write_parquet_atomic(updated, _flat_path(data_path, t))
+        catalog.record('ohlcv', t, updated, source)
+    print(f"Appended {len(tail)} new bars to {t} (last cached: {last_ts.date()}).")
+    return len(tail)
+
+
+def _refetch_in_full(t, data_path, provider, source=None):
+    data = provider(t)
+    if data is None or data.empty:
+        raise ValueError(f"Provider returned no data for {t}")
+    _save_cached(t, data, data_path, source)
+    return data
+
+
+def refresh_ohlcv_data(tickers=None, provider=None, overlap=REFRESH_OVERLAP_BARS):
+    """
+    Incrementally refreshes the OHLCV store.
+
+    For each ticker the last cached timestamp is read, only bars after it are
+    fetched (plus `overlap` already-cached bars used to validate the store),
+    and the new bars are appended atomically. With the partitioned layout
+    only the year partition(s) receiving new bars are rewritten.
+
+    Args:
+        tickers (list, optional): Tickers to refresh. Defaults to the configured universe plus VIX.
+        provider (callable, optional): OHLCV provider or DataSource. Defaults to `data.source`.
+        overlap (int, optional): Number of cached bars to re-fetch for validation.
+
+    Returns:
+        dict: Number of bars written per refreshed ticker.
+    """
+    provider = provider or get_source()
+    source = _provider_name(provider)
+    provider = _rate_limited(provider)
+    if tickers is None:
+        tickers = config['universe'] + [config['vix_ticker']]
+    data_path = get_data_path()
+
+    refreshed, errors = fetch_many(tickers, lambda t: _refresh_ticker(t, data_path, provider, overlap, source))
+    for t, e in errors.items():
+        print(f"Error refreshing {t}: {e}")
+    get_catalog(data_path).save()
+    return refreshed
+
+
+def fetch_ohlcv_data(ticker=None, start_date=None, end_date=None, force_download=False,
+                     incremental=False, provider=None, use_cache=True):
     """
     Fetches OHLCV data for the universe from yfinance.
     Saves to parquet files to avoid re-downloading.
@@ -60,10 +396,17 @@ def fetch_ohlcv_data(ticker=None, start_date=None, end_date=None, force_download
         start_date (str or date, optional): Start date for data fetch in YYYY-MM-DD format or date object.
         end_date (str or date, optional): End date for data fetch in YYYY-MM-DD format or date object.
         force_download (bool, optional): Force download even if data exists locally.
+        incremental (bool, optional): Append only the bars missing from the local store before reading.
+        provider (callable, optional): OHLCV provider or DataSource (see src.data.sources).
+            Defaults to the configured `data.source` (yfinance unless set otherwise).
+        use_cache (bool, optional): Serve reads from the in-process frame cache. Returned frames
+            (cached or freshly downloaded) are then read-only; copy them before modifying
+            values in place.
         
     Returns:
         dict or pd.DataFrame: Dictionary of dataframes for each ticker or single dataframe if ticker specified.
     """
+    provider = provider or get_source()
     data_path = get_data_path()
     
     # Convert date objects to strings if needed
@@ -83,41 +426,46 @@ def fetch_ohlcv_data(ticker=None, start_date=None, end_date=None, force_download
 
     print(f"Fetching OHLCV data for: {', '.join(tickers)}")
 
-    for t in tickers:
-        file_path = data_path / f"{t.replace('^', '')}.parquet"
-        
-        if not file_path.exists() or force_download:
-            try:
-                # If start_date and end_date are provided, use them instead of the config period
-                if start_date and end_date:
-                    data = yf.download(t, start=start_date, end=end_date, auto_adjust=True)
-                else:
-                    data = yf.download(t, period=config['data']['yfinance_period'], auto_adjust=True)
-                
-                if data.empty:
-                    print(f"Warning: No data found for {t}. Skipping.")
-                    continue
-                data.to_parquet(file_path)
-                all_data[t] = data
-            except Exception as e:
-                print(f"Error downloading {t}: {e}")
+    if incremental and not force_download:
+        refresh_ohlcv_data(tickers, provider=provider)
+
+    limited_provider = _rate_limited(provider)
+
+    def _download(t):
+        # If start_date and end_date are provided, use them instead of the config period
+        if start_date and end_date:
+            data = limited_provider(t, start=start_date, end=end_date)
         else:
-            # Read from parquet file
-            try:
-                df = pd.read_parquet(file_path)
-                
-                # Filter by date range if provided
-                if start_date or end_date:
-                    if start_date:
-                        start_date_parsed = pd.to_datetime(start_date)
-                        df = df[df.index >= start_date_parsed]
-                    if end_date:
-                        end_date_parsed = pd.to_datetime(end_date)
-                        df = df[df.index <= end_date_parsed]
-                
-                all_data[t] = df
-            except Exception as e:
-                print(f"Error reading {t} from disk: {e}")
+            data = limited_provider(t)
+
+        if data is None or data.empty:
+            print(f"Warning: No data found for {t}. Skipping.")
+            return None
+        data = normalize_ohlcv(data)
+        _save_cached(t, data, data_path, _provider_name(provider))
+        return data
+
+    to_download = [t for t in tickers if force_download or not _has_cached(t, data_path)]
+    downloaded, errors = fetch_many(to_download, _download)
+    for t, e in errors.items():
+        print(f"Error downloading {t}: {e}")
+    if downloaded:
+        get_catalog(data_path).save()
+
+    for t in tickers:
+        if t in to_download:
+            if t in downloaded:
+                # Same writability as a cache hit, so callers behave alike on a cold and a warm cache
+                all_data[t] = FrameCache.read_only(downloaded[t]) if use_cache else downloaded[t]
+            continue
+        try:
+            # Date filters are pushed down to the store where the layout allows it
+            if use_cache:
+                all_data[t] = _read_cached_frame(t, data_path, start_date, end_date)
+            else:
+                all_data[t] = _read_cached(t, data_path, start_date, end_date)
+        except Exception as e:
+            print(f"Error reading {t} from disk: {e}")
 
     # If a single ticker was requested, return just that dataframe
     if ticker is not None and ticker in all_data:
@@ -125,35 +473,170 @@ def fetch_ohlcv_data(ticker=None, start_date=None, end_date=None, force_download
     
     return all_data
 
-def fetch_fred_data(force_download=False):
+def fetch_intraday_data(ticker=None, interval='1m', start_date=None, end_date=None, provider=None):
+    """
+    Downloads intraday bars into the partitioned store for `interval`.
+
+    Intraday histories are far too large to hand back as frames, so bars are
+    upserted into data_store/ohlcv_<interval> (always partitioned by year)
+    and read back with `src.data.store.read_ohlcv` / `iter_ohlcv`, or
+    aggregated with `src.data.resample.resample_store`. Without `start_date`
+    each ticker resumes from the start of the day of its last stored bar.
+
+    Args:
+        ticker (str, optional): Specific ticker. Defaults to the configured universe plus VIX.
+        interval (str, optional): Bar size, e.g. '1m', '5m', '1h' (see src.utils.frequency).
+        start_date, end_date (str, optional): Range to fetch, `end_date` exclusive.
+        provider (callable, optional): Provider accepting an `interval` keyword. Defaults to `data.source`.
+
+    Returns:
+        dict: Number of new bars stored per ticker.
+    """
+    provider = provider or get_source()
+    source = _provider_name(provider)
+    limited_provider = _rate_limited(provider)
+    interval = parse_bar_freq(interval)
+    tickers = [ticker] if ticker is not None else config['universe'] + [config['vix_ticker']]
+    data_path = get_data_path()
+    root = get_store_root(data_path, interval)
+    catalog = get_catalog(data_path)
+    kind = f"ohlcv_{interval}"
+
+    print(f"Fetching {interval} bars for: {', '.join(tickers)}")
+
+    def _download(t):
+        last_ts = last_timestamp(t, root)
+        start = start_date or (last_ts.strftime('%Y-%m-%d') if last_ts is not None else None)
+        data = limited_provider(t, start=start, end=end_date, interval=interval)
+        if data is None or data.empty:
+            print(f"Warning: No {interval} data found for {t}. Skipping.")
+            return 0
+        data = normalize_ohlcv(data)
+        append_ohlcv(t, data, root)
+        if last_ts is None or catalog.get(t, kind) is None:
+            catalog.record(kind, t, data, source)
+            return len(data)
+        new = data[data.index > last_ts]
+        catalog.record_append(kind, t, new, source)
+        return len(new)
+
+    fetched, errors = fetch_many(tickers, _download)
+    for t, e in errors.items():
+        print(f"Error downloading {interval} bars for {t}: {e}")
+    catalog.save()
+    return fetched
+
+
+def _source_fingerprint(tickers, data_path):
+    """Hash of (file, mtime, size) for every stored file backing `tickers`."""
+    entries = [(t,) + stat for t in tickers for stat in _ticker_file_stats(t, data_path)]
+    return hashlib.sha1(json.dumps(entries).encode()).hexdigest()
+
+
+def fetch_price_panel(tickers=None, dtype='float64', rebuild=False):
+    """
+    Returns the universe as a memory-mapped, calendar-aligned PricePanel.
+
+    The panel under data_store/panel is rebuilt from the OHLCV store only when
+    the requested tickers/dtype differ or a backing file changed; otherwise
+    loading is a handful of `np.load(mmap_mode='r')` calls.
+
+    Args:
+        tickers (list, optional): Tickers to include. Defaults to the configured universe plus VIX.
+        dtype (str, optional): 'float64' (default) or 'float32'.
+        rebuild (bool, optional): Force a rebuild from the OHLCV store.
+
+    Returns:
+        PricePanel: Also usable as a read-only {ticker: DataFrame} mapping.
+    """
+    if tickers is None:
+        tickers = config['universe'] + [config['vix_ticker']]
+    tickers = list(tickers)
+    data_path = get_data_path()
+    panel_path = data_path / PANEL_DIR
+
+    fingerprint = _source_fingerprint(tickers, data_path)
+    if not rebuild and (panel_path / "meta.json").exists():
+        panel = load_panel(panel_path)
+        meta = panel.meta
+        if meta.get('tickers') == tickers and meta.get('dtype') == str(np.dtype(dtype)) \
+                and meta.get('source_fingerprint') == fingerprint:
+            return panel
+
+    ohlcv = {t: fetch_ohlcv_data(t) for t in tickers}
+    ohlcv = {t: df for t, df in ohlcv.items() if isinstance(df, pd.DataFrame)}
+    panel = build_panel(ohlcv, tickers=tickers, dtype=dtype)
+    panel.meta['source_fingerprint'] = _source_fingerprint(tickers, data_path)
+    save_panel(panel, panel_path)
+    return load_panel(panel_path)
+
+
+def rebuild_catalog():
+    """
+    Re-creates data_store/manifest.json from whatever is stored today.
+
+    This is the only catalog operation that opens every data file; ingest
+    keeps the manifest current afterwards.
+    """
+    data_path = get_data_path()
+    catalog = get_catalog(data_path)
+    # Stored names drop the '^' of index tickers; map them back to configured symbols.
+    configured = {t.replace('^', ''): t for t in config['universe'] + [config['vix_ticker']]}
+    names = set(list_tickers(get_store_root(data_path)))
+    names.update(p.stem for p in data_path.glob("*.parquet") if not p.name.startswith("FRED_"))
+    for t in sorted(configured.get(n, n) for n in names):
+        previous = catalog.get(t) or {}
+        catalog.record('ohlcv', t, _read_cached(t, data_path), previous.get('source'))
+    for p in sorted(data_path.glob("FRED_*.parquet")):
+        catalog.record('fred', p.stem[len("FRED_"):], pd.read_parquet(p), 'fred')
+    catalog.save()
+    return catalog
+
+
+def fetch_fred_data(force_download=False, source=None):
     """
     Fetches macroeconomic data from FRED.
+
+    Args:
+        force_download (bool, optional): Force download even if data exists locally.
+        source (DataSource, optional): Source serving `fetch_series`. Defaults to FRED,
+            or to the configured offline `data.source`.
     """
-    load_dotenv()
-    fred_api_key = os.getenv("FRED_API_KEY")
-    if not fred_api_key:
+    source = source or get_source(kind='fred')
+    if not source.available():
         print("Warning: FRED_API_KEY not found in .env file. Skipping FRED data.")
         return None
 
-    fred = Fred(api_key=fred_api_key)
     data_path = get_data_path()
     fred_data = {}
-    series_ids = config['data']['fred_series'].keys()
+    series_ids = list(config['data']['fred_series'].keys())
     
     print(f"Fetching FRED data for: {', '.join(series_ids)}")
 
+    get_series = get_rate_limiter(source.name).wrap(source.fetch_series)
+
+    def _download(series_id):
+        data = get_series(series_id).to_frame(name=series_id)
+        _write_parquet_atomic(data, data_path / f"FRED_{series_id}.parquet")
+        get_catalog(data_path).record('fred', series_id, data, source.name)
+        return data
+
+    to_download = [
+        s for s in series_ids
+        if force_download or not (data_path / f"FRED_{s}.parquet").exists()
+    ]
+    downloaded, errors = fetch_many(to_download, _download)
+    for series_id, e in errors.items():
+        print(f"Could not fetch FRED series {series_id}: {e}")
+    if downloaded:
+        get_catalog(data_path).save()
+
     for series_id in series_ids:
-        file_path = data_path / f"FRED_{series_id}.parquet"
-        if not file_path.exists() or force_download:
-            try:
-                data = fred.get_series(series_id)
-                data = data.to_frame(name=series_id)
-                data.to_parquet(file_path)
-                fred_data[series_id] = data
-            except Exception as e:
-                print(f"Could not fetch FRED series {series_id}: {e}")
+        if series_id in to_download:
+            if series_id in downloaded:
+                fred_data[series_id] = downloaded[series_id]
         else:
-            fred_data[series_id] = pd.read_parquet(file_path)
+            fred_data[series_id] = pd.read_parquet(data_path / f"FRED_{series_id}.parquet")
 
     return fred_data
 
@@ -0,0 +1,174 @@
+"""
+Aligned Price Panel
+===================
+
+A dates x tickers representation of the universe: one shared trading
+calendar plus one contiguous 2D array per OHLCV field. Panels are saved as
+plain `.npy` files and loaded with `mmap_mode='r'`, so every process that
+opens the same panel maps the same physical pages and no Parquet decoding
+happens at startup.
+
+On disk:
+
+    data_store/panel/
+        meta.json        # tickers, fields, dtype, source fingerprint
+        dates.npy        # int64 nanoseconds since epoch
+        Close.npy        # float64 (or float32), shape (n_dates, n_tickers)
+        ...
+
+`PricePanel` is also a read-only mapping of ticker -> OHLCV DataFrame, so it
+can be passed anywhere a `{ticker: DataFrame}` dict is accepted today.
+
+Author: AgentQuant Development Team
+License: MIT
+"""
+import json
+import os
+import shutil
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+PANEL_FIELDS = ("Open", "High", "Low", "Close", "Volume")
+PANEL_DIR = "panel"
+
+
+class PricePanel(Mapping):
+    """
+    Aligned OHLCV arrays over a shared calendar.
+
+    Attributes:
+        dates: Shared trading calendar (pd.DatetimeIndex).
+        tickers: Column order of every field array.
+        fields: {field: ndarray of shape (len(dates), len(tickers))}.
+        meta: Free-form metadata persisted alongside the arrays.
+    """
+
+    def __init__(self, dates: pd.DatetimeIndex, tickers: Sequence[str],
+                 fields: Dict[str, np.ndarray], meta: Optional[dict] = None):
+        self.dates = pd.DatetimeIndex(dates, name="Date")
+        self.tickers = list(tickers)
+        self.fields = dict(fields)
+        self.meta = dict(meta or {})
+        self._col = {t: j for j, t in enumerate(self.tickers)}
+        for name, arr in self.fields.items():
+            if arr.shape != (len(self.dates), len(self.tickers)):
+                raise ValueError(f"Field '{name}' has shape {arr.shape}, expected {(len(self.dates), len(self.tickers))}")
+
+    # --- Mapping interface: ticker -> DataFrame ---
+
+    def __getitem__(self, ticker: str) -> pd.DataFrame:
+        j = self._col[ticker]
+        return pd.DataFrame({f: arr[:, j] for f, arr in self.fields.items()}, index=self.dates)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.tickers)
+
+    def __len__(self) -> int:
+        return len(self.tickers)
+
+    def __repr__(self) -> str:
+        dtype = next(iter(self.fields.values())).dtype if self.fields else None
+        return f"PricePanel({len(self.dates)} dates x {len(self.tickers)} tickers, fields={list(self.fields)}, dtype={dtype})"
+
+    # --- Array access ---
+
+    def field(self, name: str) -> np.ndarray:
+        """The raw (possibly memory-mapped) dates x tickers array for `name`."""
+        return self.fields[name]
+
+    def frame(self, name: str, tickers: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """A dates x tickers DataFrame over `name`; zero-copy when `tickers` is None."""
+        arr = self.fields[name]
+        if tickers is None:
+            return pd.DataFrame(arr, index=self.dates, columns=self.tickers, copy=False)
+        cols = [self._col[t] for t in tickers]
+        return pd.DataFrame(arr[:, cols], index=self.dates, columns=list(tickers), copy=False)
+
+    def slice(self, start=None, end=None) -> "PricePanel":
+        """Returns a panel over [start, end] whose arrays are views into this one."""
+        lo = 0 if start is None else self.dates.searchsorted(pd.Timestamp(start), side="left")
+        hi = len(self.dates) if end is None else self.dates.searchsorted(pd.Timestamp(end), side="right")
+        return PricePanel(self.dates[lo:hi], self.tickers,
+                          {f: arr[lo:hi] for f, arr in self.fields.items()}, self.meta)
+
+
+def build_panel(
+    ohlcv_data: Dict[str, pd.DataFrame],
+    tickers: Optional[Sequence[str]] = None,
+    fields: Sequence[str] = PANEL_FIELDS,
+    dtype: Union[str, np.dtype] = "float64",
+    calendar: str = "union",
+) -> PricePanel:
+    """
+    Aligns per-ticker OHLCV frames onto one calendar.
+
+    Args:
+        ohlcv_data: {ticker: DataFrame} with flat OHLCV columns.
+        tickers: Subset / order of tickers. Defaults to all keys.
+        fields: Fields to keep; missing ones are filled with NaN.
+        dtype: float64 (default) or float32.
+        calendar: 'union' keeps every date seen for any ticker (gaps become
+            NaN); 'intersection' keeps only dates every ticker traded.
+    """
+    tickers = [t for t in (tickers or list(ohlcv_data)) if t in ohlcv_data and not ohlcv_data[t].empty]
+    if not tickers:
+        raise ValueError("No non-empty OHLCV frames to build a panel from.")
+    indexes = [pd.DatetimeIndex(ohlcv_data[t].index) for t in tickers]
+    dates = indexes[0]
+    for idx in indexes[1:]:
+        dates = dates.union(idx) if calendar == "union" else dates.intersection(idx)
+    dates = dates.sort_values().unique()
+
+    dtype = np.dtype(dtype)
+    arrays = {f: np.full((len(dates), len(tickers)), np.nan, dtype=dtype) for f in fields}
+    for j, (t, idx) in enumerate(zip(tickers, indexes)):
+        df = ohlcv_data[t]
+        pos = dates.get_indexer(idx)
+        keep = pos >= 0
+        for f in fields:
+            if f in df.columns:
+                arrays[f][pos[keep], j] = df[f].to_numpy(dtype=dtype, na_value=np.nan)[keep]
+    return PricePanel(dates, tickers, arrays)
+
+
+def save_panel(panel: PricePanel, path: Union[str, Path]) -> Path:
+    """Writes `panel` as .npy files, swapping the directory in atomically."""
+    path = Path(path)
+    staging = path.with_name(f".{path.name}.{os.getpid()}.staging")
+    if staging.exists():
+        shutil.rmtree(staging)
+    staging.mkdir(parents=True)
+
+    np.save(staging / "dates.npy", panel.dates.values.astype("datetime64[ns]").view("int64"))
+    dtype = None
+    for f, arr in panel.fields.items():
+        np.save(staging / f"{f}.npy", np.ascontiguousarray(arr))
+        dtype = str(arr.dtype)
+    meta = dict(panel.meta, tickers=panel.tickers, fields=list(panel.fields), dtype=dtype)
+    (staging / "meta.json").write_text(json.dumps(meta, indent=2))
+
+    retired = path.with_name(f".{path.name}.{os.getpid()}.retired")
+    if path.exists():
+        os.replace(path, retired)
+    os.replace(staging, path)
+    if retired.exists():
+        shutil.rmtree(retired)
+    return path
+
+
+def load_panel(path: Union[str, Path], mmap: bool = True) -> PricePanel:
+    """
+    Opens a saved panel. With `mmap=True` the field arrays are read-only
+    memory maps, so loading is O(1) and pages are shared between processes.
+    """
+    path = Path(path)
+    meta = json.loads((path / "meta.json").read_text())
+    mode = "r" if mmap else None
+    dates = pd.DatetimeIndex(np.load(path / "dates.npy").view("datetime64[ns]"))
+    fields = {f: np.load(path / f"{f}.npy", mmap_mode=mode) for f in meta["fields"]}
+    return PricePanel(dates, meta["tickers"], fields, meta)
+
@@ -0,0 +1,129 @@
+"""
+Streaming OHLCV Resampler
+=========================
+
+Aggregates fine bars into coarser ones (1m -> 5m / 1h / 1d) one chunk at a
+time, so a decade of minute bars is resampled with bounded memory.
+
+Each chunk is bucketed by flooring its timestamps to the target bar size.
+Only the last bucket of a chunk can still receive bars from the next chunk;
+its raw rows are carried over and re-aggregated together with that chunk, so
+the streamed result is identical to resampling the whole history at once.
+
+Usage:
+    from src.data.resample import resample_store
+    resample_store('SPY', '5m', source_freq='1m')   # ohlcv_1m -> ohlcv_5m
+
+Author: AgentQuant Development Team
+License: MIT
+"""
+import logging
+from pathlib import Path
+from typing import Iterable, Iterator, Optional, Union
+
+import pandas as pd
+
+from src.data.store import STREAM_BATCH_SIZE, append_ohlcv, get_store_root, iter_ohlcv
+from src.utils.frequency import bar_timedelta, is_intraday, parse_bar_freq
+
+logger = logging.getLogger(__name__)
+
+# How each OHLCV field combines when bars are merged.
+AGGREGATIONS = {"Open": "first", "High": "max", "Low": "min", "Close": "last", "Volume": "sum"}
+
+
+def _bucket_keys(index: pd.DatetimeIndex, freq: str, offset: Optional[pd.Timedelta]) -> pd.DatetimeIndex:
+    step = bar_timedelta(freq)
+    if not is_intraday(freq) and step != pd.Timedelta(days=1):
+        raise ValueError(f"Streaming resample supports intraday and daily targets, not '{freq}'.")
+    if offset is None:
+        return index.floor(step)
+    return (index - offset).floor(step) + offset
+
+
+def resample_ohlcv(df: pd.DataFrame, freq: str, offset: Union[str, pd.Timedelta, None] = None) -> pd.DataFrame:
+    """
+    Resamples an in-memory OHLCV frame to `freq`.
+
+    Args:
+        df: Bars indexed by timestamp, sorted.
+        freq: Target bar size ('5m', '1h', '1d', ...).
+        offset: Shift of the bucket grid, e.g. '30min' so hourly bars start
+            at 09:30 instead of 09:00. Buckets are labelled by their start.
+    """
+    freq = parse_bar_freq(freq)
+    offset = pd.Timedelta(offset) if offset is not None else None
+    agg = {c: how for c, how in AGGREGATIONS.items() if c in df.columns}
+    out = df.groupby(_bucket_keys(df.index, freq, offset)).agg(agg)
+    out.index.name = "Date"
+    return out
+
+
+def resample_stream(
+    chunks: Iterable[pd.DataFrame],
+    freq: str,
+    offset: Union[str, pd.Timedelta, None] = None,
+) -> Iterator[pd.DataFrame]:
+    """
+    Resamples a chronological stream of bar chunks, yielding completed bars.
+
+    Chunks may split a bucket anywhere; the open bucket is carried forward
+    and emitted once a later bar (or the end of the stream) closes it.
+    """
+    freq = parse_bar_freq(freq)
+    offset = pd.Timedelta(offset) if offset is not None else None
+    carry = None
+    for chunk in chunks:
+        if chunk.empty:
+            continue
+        if carry is not None:
+            chunk = pd.concat([carry, chunk])
+        keys = _bucket_keys(chunk.index, freq, offset)
+        closed = keys < keys[-1]
+        carry = chunk[~closed]
+        if closed.any():
+            yield resample_ohlcv(chunk[closed], freq, offset)
+    if carry is not None and len(carry):
+        yield resample_ohlcv(carry, freq, offset)
+
+
+def resample_store(
+    ticker: str,
+    freq: str,
+    source_freq: str = "1m",
+    start=None,
+    end=None,
+    data_path: Optional[Union[str, Path]] = None,
+    offset: Union[str, pd.Timedelta, None] = None,
+    batch_size: int = STREAM_BATCH_SIZE,
+) -> int:
+    """
+    Streams `ticker` from the `source_freq` store into the `freq` store.
+
+    Source bars are read batch by batch (see `iter_ohlcv`) and resampled
+    output is written one year partition at a time, so neither side is held
+    in memory in full. Existing target bars in the range are replaced.
+
+    Returns:
+        Number of resampled bars written.
+    """
+    source_root = get_store_root(data_path, source_freq)
+    target_root = get_store_root(data_path, freq)
+    chunks = iter_ohlcv(ticker, start, end, root=source_root, batch_size=batch_size)
+
+    written = 0
+    pending = []
+    pending_year = None
+    for bars in resample_stream(chunks, freq, offset):
+        for year, part in bars.groupby(bars.index.year):
+            if pending_year is not None and year != pending_year:
+                append_ohlcv(ticker, pd.concat(pending), target_root)
+                written += sum(len(p) for p in pending)
+                pending = []
+            pending_year = year
+            pending.append(part)
+    if pending:
+        append_ohlcv(ticker, pd.concat(pending), target_root)
+        written += sum(len(p) for p in pending)
+    logger.info("Resampled %s %s -> %s: %d bars", ticker, parse_bar_freq(source_freq), parse_bar_freq(freq), written)
+    return written
@@ -2,7 +2,13 @@
 This module defines the expected schemas for pandas DataFrames.
 It serves as documentation and can be used for data validation in the future,
 for example with a library like `pandera`.
+
+`normalize_ohlcv` coerces raw provider frames into OHLCV_SCHEMA; ingest
+applies it before anything is stored, so readers can rely on
+`is_canonical_ohlcv` and skip column-name heuristics.
 """
+import numpy as np
+import pandas as pd
 
 # --- Raw Data Schemas ---
 
@@ -15,6 +21,101 @@ OHLCV_SCHEMA = {
     # Index is a pandas DatetimeIndex
 }
 
+# Alternative spellings accepted by `normalize_ohlcv`, lower-cased.
+_OHLCV_ALIASES = {
+    "open": "Open",
+    "high": "High",
+    "low": "Low",
+    "close": "Close",
+    "adj close": "Close",
+    "adjclose": "Close",
+    "volume": "Volume",
+}
+
+
+def _flat_column_names(columns: pd.Index) -> list:
+    """Flattens yfinance-style MultiIndex columns by keeping the level that names the fields."""
+    if not isinstance(columns, pd.MultiIndex):
+        return [str(c) for c in columns]
+    for lvl in range(columns.nlevels):
+        values = [str(v) for v in columns.get_level_values(lvl)]
+        if any(v.lower() in _OHLCV_ALIASES for v in values) and len(set(values)) == len(values):
+            return values
+    return ['_'.join(map(str, col)).strip() for col in columns]
+
+
+def normalize_ohlcv(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Coerces a raw OHLCV frame into the canonical OHLCV_SCHEMA layout.
+
+    - Flat columns in schema order, keeping only the OHLCV fields present
+      ('Adj Close' is used as Close only when Close itself is missing)
+    - Prices as float64, Volume as int64 (missing volume becomes 0)
+    - Tz-naive, sorted, de-duplicated DatetimeIndex named 'Date'
+      (later duplicates win); rows with no prices at all are dropped
+
+    Raises:
+        ValueError if no Close-like column exists.
+    """
+    if is_canonical_ohlcv(df):
+        return df
+
+    names = _flat_column_names(df.columns)
+    picked = {}
+    for pos, name in enumerate(names):
+        key = name.lower()
+        canonical = _OHLCV_ALIASES.get(key)
+        if canonical is None or (canonical in picked and key != canonical.lower()):
+            continue
+        picked[canonical] = pos
+    if "Close" not in picked:
+        raise ValueError(f"Cannot normalise OHLCV frame without a Close column. Columns: {names[:20]}")
+
+    out = pd.DataFrame(index=df.index)
+    for col, dtype in OHLCV_SCHEMA.items():
+        if col not in picked:
+            continue
+        values = pd.to_numeric(df.iloc[:, picked[col]], errors="coerce")
+        if dtype == "int64":
+            values = values.fillna(0).round()
+        out[col] = values.astype(dtype)
+
+    index = pd.DatetimeIndex(out.index)
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    out.index = index.astype("datetime64[ns]").rename("Date")
+
+    prices = [c for c in ("Open", "High", "Low", "Close") if c in out.columns]
+    out = out[out[prices].notna().any(axis=1)]
+    if not out.index.is_monotonic_increasing:
+        out = out.sort_index(kind="stable")
+    if not out.index.is_unique:
+        out = out[~out.index.duplicated(keep="last")]
+    return out
+
+
+def is_canonical_ohlcv(df: pd.DataFrame) -> bool:
+    """
+    Cheap check that `df` already follows OHLCV_SCHEMA (as written by ingest).
+
+    Readers use this as a fast path to skip column-search heuristics.
+    """
+    cols = df.columns
+    if isinstance(cols, pd.MultiIndex) or "Close" not in cols or not cols.is_unique:
+        return False
+    if any(c not in OHLCV_SCHEMA or df[c].dtype != np.dtype(OHLCV_SCHEMA[c]) for c in cols):
+        return False
+    index = df.index
+    return (
+        isinstance(index, pd.DatetimeIndex)
+        and index.dtype == np.dtype("datetime64[ns]")
+        and index.name == "Date"
+        and index.tz is None
+        and index.is_monotonic_increasing
+        and index.is_unique
+    )
+
+
 FRED_SCHEMA = {
     "SERIES_ID": "float64",
     # Index is a pandas DatetimeIndex
@@ -0,0 +1,423 @@
+"""
+Market-Data Sources
+===================
+
+Pluggable providers behind `fetch_ohlcv_data` / `fetch_fred_data`, so the
+rest of the platform does not care whether bars come from the network, a
+directory of files or a random generator.
+
+Available sources:
+- YFinanceSource: Yahoo Finance via yfinance (default)
+- FredSource: FRED macro series via fredapi
+- LocalDirectorySource: <TICKER>.parquet / <TICKER>.csv files, or another
+  partitioned store, on local disk
+- SyntheticSource: deterministic GBM, regime-switching or jump-diffusion
+  bars, for offline tests and load tests at production scale
+
+Every source is callable as `source(ticker, start=None, end=None, period=None)`
+and returns raw OHLCV bars, so it can be passed wherever a plain provider
+callable is accepted today. `start` is inclusive and `end` exclusive, as in
+yfinance. An optional `interval` ('1m', '5m', '1h', '1d', see
+src.utils.frequency) selects the bar size. Sources that also serve macro
+series implement `fetch_series`.
+
+Usage:
+    from src.data.sources import SyntheticSource
+    source = SyntheticSource(seed=7, start='1995-01-01', model='regime')
+    ohlcv = fetch_ohlcv_data(provider=source)
+    panel = source.panel(source.universe(2000))   # in-memory, no disk I/O
+
+The configured default is `data.source` in config.yaml (see `get_source`).
+
+Author: AgentQuant Development Team
+License: MIT
+"""
+import os
+import re
+import zlib
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from src.data.panel import PANEL_FIELDS, PricePanel
+from src.utils.config import config
+from src.utils.frequency import (
+    TRADING_DAYS_PER_YEAR,
+    is_intraday,
+    parse_bar_freq,
+    periods_per_year as _periods_per_year,
+    session_calendar,
+)
+
+DateLike = Union[str, pd.Timestamp, None]
+
+_PERIOD_RE = re.compile(r"^(\d+)(d|wk|mo|y)$")
+_PERIOD_UNITS = {"d": "days", "wk": "weeks", "mo": "months", "y": "years"}
+# Longest history yfinance serves per intraday interval.
+_YF_INTRADAY_PERIOD = {"1m": "7d", "2m": "60d", "5m": "60d", "15m": "60d", "30m": "60d", "1h": "730d"}
+
+
+def _period_start(period: Optional[str], end: pd.Timestamp) -> Optional[pd.Timestamp]:
+    """First timestamp covered by a yfinance-style period string ('5y', '6mo', 'ytd', 'max')."""
+    if not period or period == "max":
+        return None
+    if period == "ytd":
+        return pd.Timestamp(year=end.year, month=1, day=1)
+    match = _PERIOD_RE.match(period)
+    if match is None:
+        raise ValueError(f"Unsupported period '{period}'")
+    n, unit = int(match.group(1)), _PERIOD_UNITS[match.group(2)]
+    return end - pd.DateOffset(**{unit: n})
+
+
+def _slice_bars(df: pd.DataFrame, start: DateLike, end: DateLike, period: Optional[str]) -> pd.DataFrame:
+    """Applies provider semantics: `start` inclusive, `end` exclusive, else `period` back from the last bar."""
+    if df.empty:
+        return df
+    if start is None and period is not None:
+        start = _period_start(period, df.index.max())
+    if start is not None:
+        df = df[df.index >= pd.Timestamp(start)]
+    if end is not None:
+        df = df[df.index < pd.Timestamp(end)]
+    return df
+
+
+class DataSource:
+    """
+    Base class for market-data sources.
+
+    Subclasses implement `fetch_ohlcv` and, if they serve macro data,
+    `fetch_series`. `name` is used for rate limiting (`data.fetch.rate_limits`)
+    and recorded as the `source` of stored data in the catalog.
+    """
+
+    name = "source"
+
+    def __call__(self, ticker: str, start: DateLike = None, end: DateLike = None,
+                 period: Optional[str] = None, interval: Optional[str] = None) -> pd.DataFrame:
+        return self.fetch_ohlcv(ticker, start=start, end=end, period=period, interval=interval)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}()"
+
+    def available(self) -> bool:
+        """False if the source cannot serve requests (e.g. a missing API key)."""
+        return True
+
+    def fetch_ohlcv(self, ticker: str, start: DateLike = None, end: DateLike = None,
+                    period: Optional[str] = None, interval: Optional[str] = None) -> pd.DataFrame:
+        """OHLCV bars for `ticker` at bar size `interval` (daily if None); an empty frame if the source has none."""
+        raise NotImplementedError
+
+    def fetch_series(self, series_id: str) -> pd.Series:
+        """A macro series indexed by date, named `series_id`."""
+        raise NotImplementedError(f"{type(self).__name__} does not serve macro series")
+
+
+class YFinanceSource(DataSource):
+    """OHLCV bars from Yahoo Finance (dividend/split adjusted)."""
+
+    name = "yfinance"
+
+    def fetch_ohlcv(self, ticker, start=None, end=None, period=None, interval=None):
+        import yfinance as yf
+
+        interval = parse_bar_freq(interval) if interval else "1d"
+        # Concurrency is handled by src.data.fetcher, so keep yfinance single-threaded per call.
+        kwargs = dict(interval=interval, auto_adjust=True, threads=False, progress=False)
+        if start is not None:
+            return yf.download(ticker, start=start, end=end, **kwargs)
+        if period is None:
+            period = _YF_INTRADAY_PERIOD.get(interval, "60d") if is_intraday(interval) \
+                else config['data']['yfinance_period']
+        return yf.download(ticker, period=period, **kwargs)
+
+
+class FredSource(DataSource):
+    """Macro series from FRED. The API key defaults to FRED_API_KEY from the environment / .env."""
+
+    name = "fred"
+
+    def __init__(self, api_key: Optional[str] = None):
+        if api_key is None:
+            from dotenv import load_dotenv
+
+            load_dotenv()
+            api_key = os.getenv("FRED_API_KEY")
+        self.api_key = api_key
+        self._client = None
+
+    def available(self):
+        return bool(self.api_key)
+
+    def fetch_series(self, series_id):
+        if self._client is None:
+            from fredapi import Fred
+
+            self._client = Fred(api_key=self.api_key)
+        return self._client.get_series(series_id).rename(series_id)
+
+
+class LocalDirectorySource(DataSource):
+    """
+    Serves bars from files on local disk, e.g. a snapshot copied onto an
+    air-gapped machine.
+
+    Looks up, in order: a partitioned store under `<path>/ohlcv`,
+    `<path>/<TICKER>.parquet` and `<path>/<TICKER>.csv` (a leading '^' is
+    dropped from the file name). Non-daily intervals use `<path>/ohlcv_<interval>`
+    and `<TICKER>_<interval>.parquet|csv` instead. Macro series are read from
+    `FRED_<ID>.parquet` / `FRED_<ID>.csv`, the layout ingest writes.
+    """
+
+    name = "local"
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+
+    def __repr__(self):
+        return f"LocalDirectorySource({str(self.path)!r})"
+
+    def _read_file(self, stem: str) -> Optional[pd.DataFrame]:
+        parquet = self.path / f"{stem}.parquet"
+        if parquet.exists():
+            return pd.read_parquet(parquet)
+        csv = self.path / f"{stem}.csv"
+        if csv.exists():
+            return pd.read_csv(csv, index_col=0, parse_dates=True)
+        return None
+
+    def fetch_ohlcv(self, ticker, start=None, end=None, period=None, interval=None):
+        from src.data.store import get_store_root, has_ticker, read_ohlcv
+
+        interval = parse_bar_freq(interval) if interval else "1d"
+        store_root = get_store_root(self.path, interval)
+        stem = ticker.replace('^', '') + ("" if interval == "1d" else f"_{interval}")
+        if has_ticker(ticker, store_root):
+            df = read_ohlcv(ticker, start=start, root=store_root)
+        else:
+            df = self._read_file(stem)
+            if df is None:
+                return pd.DataFrame()
+        return _slice_bars(df.sort_index(), start, end, period)
+
+    def fetch_series(self, series_id):
+        df = self._read_file(f"FRED_{series_id}")
+        if df is None:
+            raise FileNotFoundError(f"No local file for FRED series {series_id} in {self.path}")
+        return df.iloc[:, 0].rename(series_id)
+
+
+class SyntheticSource(DataSource):
+    """
+    Deterministic synthetic market data.
+
+    Every ticker gets its own random stream derived from (`seed`, ticker), so
+    a ticker's history is identical across calls, processes and batch sizes,
+    and slices of it line up exactly. Histories are generated in closed form
+    with vectorised numpy, so decades of daily bars for thousands of tickers
+    take seconds.
+
+    Models (`model`):
+    - 'gbm': geometric Brownian motion with drift `mu` and volatility `sigma`
+    - 'regime': two-state Markov switching between a calm bull state and a
+      volatile bear state, with geometric state durations
+    - 'jump': GBM plus compound-Poisson jumps (Merton jump diffusion)
+
+    Tickers containing 'VIX' follow a mean-reverting log process around
+    `vix_level`, so volatility features see realistic levels.
+
+    Intraday bar sizes generate regular 09:30-16:00 sessions on business
+    days, e.g. `freq='1m'` for load-testing minute-bar pipelines.
+
+    Args:
+        seed: Base seed.
+        start, end: Calendar of the full history (end defaults to today).
+        freq: Bar size of the calendar ('1d' by default; '1m', '5m', '1h', '1wk').
+        model: 'gbm', 'regime' or 'jump'.
+        mu, sigma: Annualised drift and volatility.
+        periods_per_year: Bars per year used to scale `mu` and `sigma`;
+            derived from `freq` by default.
+    """
+
+    name = "synthetic"
+
+    # (annual drift, annual vol, mean duration in trading days) for the bull / bear states
+    REGIMES = ((0.12, 0.14, 500.0), (-0.20, 0.35, 120.0))
+    # Jump intensity per year, mean and std of the log jump size
+    JUMPS = (3.0, -0.04, 0.06)
+
+    def __init__(self, seed: int = 42, start: DateLike = "2000-01-01", end: DateLike = None,
+                 freq: str = "1d", model: str = "gbm", mu: float = 0.07, sigma: float = 0.2,
+                 periods_per_year: Optional[float] = None, start_price: float = 100.0,
+                 vix_level: float = 18.0):
+        if model not in ("gbm", "regime", "jump"):
+            raise ValueError(f"Unknown synthetic model '{model}'")
+        self.seed = int(seed)
+        self.model = model
+        self.mu = float(mu)
+        self.sigma = float(sigma)
+        self.freq = parse_bar_freq(freq)
+        self.periods_per_year = float(periods_per_year or _periods_per_year(self.freq))
+        self.start_price = float(start_price)
+        self.vix_level = float(vix_level)
+        self.start = pd.Timestamp(start)
+        self.end = pd.Timestamp(end) if end is not None else pd.Timestamp.today().normalize()
+        self._calendars: Dict[str, pd.DatetimeIndex] = {}
+        self.dates = self.calendar(self.freq)
+
+    def __repr__(self):
+        return (f"SyntheticSource(seed={self.seed}, model={self.model!r}, freq={self.freq!r}, "
+                f"{self.dates[0].date()}..{self.dates[-1].date()}, {len(self.dates)} bars)")
+
+    def calendar(self, freq: Optional[str] = None) -> pd.DatetimeIndex:
+        """Bar timestamps of the full history at bar size `freq` (default: `self.freq`)."""
+        freq = parse_bar_freq(freq) if freq else self.freq
+        if freq not in self._calendars:
+            if freq.endswith("wk"):
+                dates = pd.date_range(self.start, self.end, freq=f"{freq[:-2]}W-FRI", name="Date")
+            else:
+                dates = session_calendar(self.start, self.end, freq)
+            self._calendars[freq] = pd.DatetimeIndex(dates.astype("datetime64[ns]"), name="Date")
+        return self._calendars[freq]
+
+    @staticmethod
+    def universe(n: int, prefix: str = "SYN") -> List[str]:
+        """Ticker names for a synthetic universe of `n` assets."""
+        width = len(str(max(n - 1, 1)))
+        return [f"{prefix}{i:0{width}d}" for i in range(n)]
+
+    def _rng(self, key: str) -> np.random.Generator:
+        # crc32 rather than hash(): stable across processes (PYTHONHASHSEED).
+        return np.random.default_rng([self.seed, zlib.crc32(key.encode())])
+
+    # --- Return generators (log returns per bar) ---
+
+    @staticmethod
+    def _gbm(rng, n, mu, sigma, ppy):
+        dt = 1.0 / ppy
+        return (mu - 0.5 * sigma ** 2) * dt + sigma * np.sqrt(dt) * rng.standard_normal(n)
+
+    def _regime(self, rng, n, ppy):
+        # Alternate bull/bear runs with geometric durations, then expand to per-bar states.
+        mean_len = np.array([r[2] for r in self.REGIMES]) * ppy / TRADING_DAYS_PER_YEAR
+        first = int(rng.random() < mean_len[1] / mean_len.sum())
+        n_runs = int(2 * n / mean_len.min()) + 2
+        states = (first + np.arange(n_runs)) % 2
+        lengths = rng.geometric(1.0 / mean_len[states])
+        while lengths.sum() < n:
+            more = (states[-1] + 1 + np.arange(n_runs)) % 2
+            states = np.concatenate([states, more])
+            lengths = np.concatenate([lengths, rng.geometric(1.0 / mean_len[more])])
+        per_bar = np.repeat(states, lengths)[:n]
+        mu = np.array([r[0] for r in self.REGIMES])[per_bar]
+        sigma = np.array([r[1] for r in self.REGIMES])[per_bar]
+        return self._gbm(rng, n, mu, sigma, ppy)
+
+    def _jump(self, rng, n, ppy):
+        intensity, jump_mu, jump_sigma = self.JUMPS
+        counts = rng.poisson(intensity / ppy, n)
+        # Sum of k normal jumps is N(k * mu, k * sigma^2).
+        jumps = counts * jump_mu + np.sqrt(counts) * jump_sigma * rng.standard_normal(n)
+        compensator = intensity * (np.exp(jump_mu + 0.5 * jump_sigma ** 2) - 1) / ppy
+        return self._gbm(rng, n, self.mu, self.sigma, ppy) + jumps - compensator
+
+    @staticmethod
+    def _mean_reverting(rng, n, level, theta, vol):
+        # Discrete Ornstein-Uhlenbeck started at its long-run level; only used
+        # for a handful of series (VIX, macro), so a plain loop is fine.
+        shocks = vol * rng.standard_normal(n)
+        x = np.empty(n)
+        x[0] = level
+        for t in range(1, n):
+            x[t] = level + (1.0 - theta) * (x[t - 1] - level) + shocks[t]
+        return x
+
+    def _simulate(self, ticker: str, freq: Optional[str] = None, dtype=np.float64) -> Dict[str, np.ndarray]:
+        freq = parse_bar_freq(freq) if freq else self.freq
+        n = len(self.calendar(freq))
+        if freq == self.freq:
+            ppy, rng = self.periods_per_year, self._rng(ticker)
+        else:
+            ppy, rng = _periods_per_year(freq), self._rng(f"{ticker}@{freq}")
+        if "VIX" in ticker.upper():
+            days_per_bar = TRADING_DAYS_PER_YEAR / ppy
+            log_close = self._mean_reverting(rng, n, np.log(self.vix_level), 0.03 * days_per_bar,
+                                             0.08 * np.sqrt(days_per_bar))
+        else:
+            if self.model == "regime":
+                rets = self._regime(rng, n, ppy)
+            elif self.model == "jump":
+                rets = self._jump(rng, n, ppy)
+            else:
+                rets = self._gbm(rng, n, self.mu, self.sigma, ppy)
+            log_close = np.log(self.start_price) + np.cumsum(rets)
+        close = np.exp(log_close)
+
+        # Intrabar structure: open gaps from the previous close, the range brackets open and close.
+        bar_vol = self.sigma / np.sqrt(ppy)
+        prev_close = np.concatenate([[close[0]], close[:-1]])
+        open_ = prev_close * np.exp(0.25 * bar_vol * rng.standard_normal(n))
+        high = np.maximum(open_, close) * np.exp(0.5 * bar_vol * np.abs(rng.standard_normal(n)))
+        low = np.minimum(open_, close) * np.exp(-0.5 * bar_vol * np.abs(rng.standard_normal(n)))
+        volume = rng.lognormal(mean=14.0 + np.log(TRADING_DAYS_PER_YEAR / ppy), sigma=0.5, size=n).astype(np.int64)
+        return {"Open": open_.astype(dtype), "High": high.astype(dtype), "Low": low.astype(dtype),
+                "Close": close.astype(dtype), "Volume": volume}
+
+    def fetch_ohlcv(self, ticker, start=None, end=None, period=None, interval=None):
+        df = pd.DataFrame(self._simulate(ticker, interval), index=self.calendar(interval))
+        return _slice_bars(df, start, end, period)
+
+    def fetch_series(self, series_id):
+        # A yield-like level: mean-reverting around 3% in daily steps.
+        rng = self._rng(f"FRED_{series_id}")
+        dates = self.calendar("1d")
+        level = self._mean_reverting(rng, len(dates), 3.0, 0.002, 0.05)
+        return pd.Series(np.round(level, 2), index=dates, name=series_id)
+
+    def panel(self, tickers: Sequence[str], fields: Sequence[str] = PANEL_FIELDS,
+              dtype: Union[str, np.dtype] = "float64") -> PricePanel:
+        """
+        Generates `tickers` straight into an aligned PricePanel, bypassing the
+        store. Values match `fetch_ohlcv` for the same ticker.
+        """
+        dtype = np.dtype(dtype)
+        tickers = list(tickers)
+        arrays = {f: np.empty((len(self.dates), len(tickers)), dtype=dtype) for f in fields}
+        for j, t in enumerate(tickers):
+            bars = self._simulate(t, dtype=dtype)
+            for f in fields:
+                arrays[f][:, j] = bars[f]
+        return PricePanel(self.dates, tickers, arrays, {"source": self.name, "seed": self.seed})
+
+
+_SOURCES = {
+    "yfinance": YFinanceSource,
+    "fred": FredSource,
+    "local": LocalDirectorySource,
+    "synthetic": SyntheticSource,
+}
+
+
+def get_source(name: Optional[str] = None, kind: str = "ohlcv", **kwargs) -> DataSource:
+    """
+    Builds a source from config.
+
+    Args:
+        name: 'yfinance', 'fred', 'local' or 'synthetic'. Defaults to
+            `data.source` in config.yaml (yfinance if unset).
+        kind: 'ohlcv' or 'fred'. For 'fred' the network default is FRED
+            rather than yfinance; offline sources serve both kinds.
+        **kwargs: Overrides for the `data.sources.<name>` config section.
+    """
+    name = name or config.get('data', {}).get('source') or "yfinance"
+    if kind == "fred" and name == "yfinance":
+        name = "fred"
+    if name not in _SOURCES:
+        raise ValueError(f"Unknown data source '{name}'. Choose from {sorted(_SOURCES)}.")
+    options = dict((config.get('data', {}).get('sources', {}) or {}).get(name, {}) or {})
+    options.update(kwargs)
+    return _SOURCES[name](**options)
@@ -0,0 +1,301 @@
+"""
+Partitioned Market-Data Store
+=============================
+
+Hive-partitioned Parquet layout for OHLCV bars, one directory per ticker and
+one partition per calendar year:
+
+    data_store/ohlcv/ticker=SPY/year=2021/part-0.parquet
+    data_store/ohlcv/ticker=SPY/year=2022/part-0.parquet
+
+Reads go through pyarrow.dataset so date predicates prune whole year
+partitions and, inside a partition, skip row groups via Parquet statistics;
+column projection is pushed down as well. A six-month slice of a decades-long
+minute-bar history therefore only decodes the row groups that overlap it.
+
+Writes replace individual year partitions atomically, so an incremental
+refresh only rewrites the partition(s) its new bars fall into.
+
+Daily bars live under data_store/ohlcv; other bar sizes get their own tree
+(data_store/ohlcv_1m, data_store/ohlcv_1h, ...) with the same layout.
+`iter_ohlcv` streams a history batch by batch, so minute-bar histories of
+hundreds of millions of rows are processed without ever being loaded whole.
+
+Usage:
+    from src.data.store import read_ohlcv, migrate_flat_store
+    migrate_flat_store()                       # one-off, from <TICKER>.parquet files
+    df = read_ohlcv('SPY', start='2023-01-01', end='2023-06-30', columns=['Close'])
+
+Author: AgentQuant Development Team
+License: MIT
+"""
+import logging
+import os
+import shutil
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Union
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from src.data.schemas import normalize_ohlcv
+from src.utils.config import config
+from src.utils.frequency import parse_bar_freq
+
+logger = logging.getLogger(__name__)
+
+OHLCV_DIR = "ohlcv"
+INDEX_COLUMN = "Date"
+PART_FILE = "part-0.parquet"
+# Small enough that row-group statistics prune most of a year of intraday bars.
+ROW_GROUP_SIZE = 50_000
+# Rows per record batch when streaming with `iter_ohlcv`.
+STREAM_BATCH_SIZE = 250_000
+
+DateLike = Union[str, pd.Timestamp, None]
+
+
+def get_store_root(data_path: Optional[Union[str, Path]] = None, freq: Optional[str] = None) -> Path:
+    """
+    Returns the root directory of the partitioned OHLCV store.
+
+    Daily bars (the default) live under `ohlcv/`; other bar sizes under
+    `ohlcv_<freq>/`, e.g. `ohlcv_1m/`.
+    """
+    name = OHLCV_DIR
+    if freq is not None and parse_bar_freq(freq) != "1d":
+        name = f"{OHLCV_DIR}_{parse_bar_freq(freq)}"
+    return Path(data_path or config['data_path']) / name
+
+
+def _ticker_dir(ticker: str, root: Path) -> Path:
+    return root / f"ticker={ticker.replace('^', '')}"
+
+
+def has_ticker(ticker: str, root: Optional[Path] = None) -> bool:
+    """True if the partitioned store holds any bars for `ticker`."""
+    tdir = _ticker_dir(ticker, root or get_store_root())
+    return tdir.is_dir() and any(tdir.glob(f"year=*/{PART_FILE}"))
+
+
+def list_tickers(root: Optional[Path] = None) -> List[str]:
+    """Lists tickers present in the partitioned store."""
+    root = root or get_store_root()
+    if not root.is_dir():
+        return []
+    return sorted(p.name.split("=", 1)[1] for p in root.glob("ticker=*") if p.is_dir())
+
+
+def _to_table(df: pd.DataFrame) -> pa.Table:
+    frame = normalize_ohlcv(df)
+    return pa.Table.from_pandas(frame.reset_index(), preserve_index=False)
+
+
+def _write_partition(df: pd.DataFrame, part_dir: Path) -> None:
+    part_dir.mkdir(parents=True, exist_ok=True)
+    target = part_dir / PART_FILE
+    tmp = part_dir / f".{PART_FILE}.{os.getpid()}.tmp"
+    try:
+        pq.write_table(_to_table(df), tmp, row_group_size=ROW_GROUP_SIZE)
+        os.replace(tmp, target)
+    finally:
+        if tmp.exists():
+            tmp.unlink()
+
+
+def write_ohlcv(ticker: str, df: pd.DataFrame, root: Optional[Path] = None) -> None:
+    """
+    Replaces the whole history of `ticker` with `df`.
+
+    The new partitions are written into a staging directory and swapped in
+    with two renames (old directory out, staging in), so a reader never sees
+    a mix of old and new partitions. It can, however, land between the two
+    renames and find no directory at all, i.e. an empty history; callers
+    that rewrite a ticker while others read it should retry empty reads.
+    """
+    root = root or get_store_root()
+    tdir = _ticker_dir(ticker, root)
+    staging = tdir.with_name(f".{tdir.name}.{os.getpid()}.staging")
+    if staging.exists():
+        shutil.rmtree(staging)
+
+    df = normalize_ohlcv(df)
+    for year, chunk in df.groupby(df.index.year):
+        _write_partition(chunk, staging / f"year={int(year)}")
+
+    retired = tdir.with_name(f".{tdir.name}.{os.getpid()}.retired")
+    if tdir.exists():
+        os.replace(tdir, retired)
+    os.replace(staging, tdir)
+    if retired.exists():
+        shutil.rmtree(retired)
+
+
+def append_ohlcv(ticker: str, df: pd.DataFrame, root: Optional[Path] = None) -> None:
+    """
+    Upserts `df` into the store, rewriting only the year partitions it touches.
+
+    Bars in `df` win over already-stored bars with the same timestamp.
+    """
+    if df.empty:
+        return
+    root = root or get_store_root()
+    tdir = _ticker_dir(ticker, root)
+    df = normalize_ohlcv(df)
+    for year, chunk in df.groupby(df.index.year):
+        part_dir = tdir / f"year={int(year)}"
+        part_file = part_dir / PART_FILE
+        if part_file.exists():
+            existing = _read_partition(part_file)
+            chunk = pd.concat([existing[~existing.index.isin(chunk.index)], chunk])
+        _write_partition(chunk.sort_index(), part_dir)
+
+
+def _read_partition(path: Path) -> pd.DataFrame:
+    return pq.read_table(path).to_pandas().set_index(INDEX_COLUMN)
+
+
+def _dataset(tdir: Path) -> ds.Dataset:
+    return ds.dataset(
+        str(tdir),
+        format="parquet",
+        partitioning=ds.partitioning(pa.schema([("year", pa.int32())]), flavor="hive"),
+        exclude_invalid_files=True,
+    )
+
+
+def read_ohlcv(
+    ticker: str,
+    start: DateLike = None,
+    end: DateLike = None,
+    columns: Optional[Sequence[str]] = None,
+    root: Optional[Path] = None,
+) -> pd.DataFrame:
+    """
+    Reads bars for `ticker` in [start, end] (both inclusive).
+
+    Args:
+        ticker: Ticker symbol (a leading '^' is ignored, as in the flat store).
+        start, end: Optional bounds; pushed down as year-partition and row-group filters.
+        columns: Optional subset of fields to materialise.
+        root: Store root, defaults to `get_store_root()`.
+
+    Returns:
+        pd.DataFrame indexed by Date. Empty if the ticker is unknown.
+    """
+    tdir = _ticker_dir(ticker, root or get_store_root())
+    if not tdir.is_dir():
+        return pd.DataFrame()
+
+    dataset = _dataset(tdir)
+    predicate = None
+    if start is not None:
+        start = pd.Timestamp(start)
+        predicate = (ds.field("year") >= start.year) & (ds.field(INDEX_COLUMN) >= start.to_pydatetime())
+    if end is not None:
+        end = pd.Timestamp(end)
+        upper = (ds.field("year") <= end.year) & (ds.field(INDEX_COLUMN) <= end.to_pydatetime())
+        predicate = upper if predicate is None else predicate & upper
+
+    if columns is None:
+        fields = [f for f in dataset.schema.names if f != "year"]
+    else:
+        fields = [INDEX_COLUMN] + [c for c in columns if c != INDEX_COLUMN]
+
+    table = dataset.to_table(columns=fields, filter=predicate)
+    return table.to_pandas().set_index(INDEX_COLUMN).sort_index()
+
+
+def _year_of(path: Path) -> int:
+    return int(path.parent.name.split("=", 1)[1])
+
+
+def iter_ohlcv(
+    ticker: str,
+    start: DateLike = None,
+    end: DateLike = None,
+    columns: Optional[Sequence[str]] = None,
+    root: Optional[Path] = None,
+    batch_size: int = STREAM_BATCH_SIZE,
+) -> Iterator[pd.DataFrame]:
+    """
+    Streams bars for `ticker` in [start, end] in chronological batches.
+
+    Year partitions outside the range are never opened and, inside a
+    partition, row groups are skipped using their Date statistics. At most
+    one batch of `batch_size` rows is in memory at a time.
+    """
+    tdir = _ticker_dir(ticker, root or get_store_root())
+    start = pd.Timestamp(start) if start is not None else None
+    end = pd.Timestamp(end) if end is not None else None
+    parts = sorted(tdir.glob(f"year=*/{PART_FILE}"), key=_year_of)
+    for path in parts:
+        year = _year_of(path)
+        if (start is not None and year < start.year) or (end is not None and year > end.year):
+            continue
+        pf = pq.ParquetFile(path)
+        date_idx = pf.schema_arrow.get_field_index(INDEX_COLUMN)
+        row_groups = []
+        for i in range(pf.metadata.num_row_groups):
+            stats = pf.metadata.row_group(i).column(date_idx).statistics
+            if stats is not None and stats.has_min_max:
+                if (start is not None and pd.Timestamp(stats.max) < start) or \
+                        (end is not None and pd.Timestamp(stats.min) > end):
+                    continue
+            row_groups.append(i)
+        if not row_groups:
+            continue
+        fields = None if columns is None else [INDEX_COLUMN] + [c for c in columns if c != INDEX_COLUMN]
+        for batch in pf.iter_batches(batch_size=batch_size, row_groups=row_groups, columns=fields):
+            df = batch.to_pandas().set_index(INDEX_COLUMN)
+            if start is not None:
+                df = df[df.index >= start]
+            if end is not None:
+                df = df[df.index <= end]
+            if len(df):
+                yield df
+
+
+def last_timestamp(ticker: str, root: Optional[Path] = None) -> Optional[pd.Timestamp]:
+    """Latest stored bar for `ticker`, reading only the newest year partition."""
+    tdir = _ticker_dir(ticker, root or get_store_root())
+    parts = sorted(tdir.glob(f"year=*/{PART_FILE}"), key=_year_of)
+    if not parts:
+        return None
+    dates = pq.read_table(parts[-1], columns=[INDEX_COLUMN]).column(INDEX_COLUMN).to_pandas()
+    return pd.Timestamp(dates.max())
+
+
+def migrate_flat_store(
+    data_path: Optional[Union[str, Path]] = None,
+    remove_flat: bool = False,
+) -> Dict[str, int]:
+    """
+    Converts legacy `<TICKER>.parquet` files into the partitioned layout.
+
+    FRED_* files are left alone. Returns {ticker: rows migrated}.
+    """
+    data_path = Path(data_path or config['data_path'])
+    root = get_store_root(data_path)
+    migrated = {}
+    for path in sorted(data_path.glob("*.parquet")):
+        if path.name.startswith("FRED_"):
+            continue
+        ticker = path.stem
+        df = pd.read_parquet(path)
+        if df.empty:
+            logger.warning("Skipping empty file %s", path)
+            continue
+        write_ohlcv(ticker, df, root)
+        migrated[ticker] = len(df)
+        logger.info("Migrated %s (%d rows) into %s", ticker, len(df), _ticker_dir(ticker, root))
+        if remove_flat:
+            path.unlink()
+    return migrated
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    print(migrate_flat_store())
@@ -0,0 +1,334 @@
+"""
+src/features/cache.py
+
+Persistent feature store: compute features once, reuse them across runs.
+
+- Entries are Parquet files under `<data_path>/features`, keyed by a digest of
+  the input data, the feature spec (arguments of the compute call) and the
+  code version of the feature modules, so editing strategy code never
+  invalidates features while editing src/features does
+- A JSON index tracks size and last access; the least recently used entries
+  are evicted once `features.store.max_mb` / `max_entries` is exceeded
+- Hit / miss counters are kept per process and cumulatively in the index
+- Lookups only touch the in-memory index; it is written on `put`, eviction,
+  `clear`, `flush` (also at exit) and at most every `index_flush_seconds`
+  on reads. Each write merges with the index on disk, so processes sharing
+  a store add up their totals instead of overwriting each other's
+
+Usage:
+    from src.features.cache import cached_compute_features, get_feature_store
+    features = cached_compute_features(ohlcv, 'SPY', '^VIX')
+    get_feature_store().stats()   # {'hits': ..., 'misses': ..., 'hit_rate': ...}
+"""
+
+import atexit
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Optional, Sequence, Union
+
+import pandas as pd
+
+from src.data.catalog import frame_digest
+from src.features.macro import MacroInput, _collect_series
+from src.utils.config import config
+
+logger = logging.getLogger(__name__)
+
+INDEX_FILE = "index.json"
+STORE_VERSION = 1
+
+_DEFAULT_STORE_CONFIG = {
+    'enabled': True,
+    'path': 'features',
+    'max_mb': 512,
+    'max_entries': 256,
+    'index_flush_seconds': 30,
+}
+
+# Modules whose source defines feature values; any edit to them changes every key.
+_FEATURE_MODULES = ('src.features.engine', 'src.features.registry', 'src.features.macro',
+                    'src.features.kernels', 'src.features.online', 'src.utils.frequency')
+_code_version: Optional[str] = None
+
+
+def _store_config() -> dict:
+    merged = dict(_DEFAULT_STORE_CONFIG)
+    merged.update((config.get('features', {}) or {}).get('store', {}) or {})
+    return merged
+
+
+def feature_code_version() -> str:
+    """Digest of the feature modules' source, computed once per process."""
+    global _code_version
+    if _code_version is None:
+        import importlib
+        h = hashlib.sha256(f"v{STORE_VERSION}".encode())
+        for name in _FEATURE_MODULES:
+            h.update(Path(importlib.import_module(name).__file__).read_bytes())
+        _code_version = h.hexdigest()[:16]
+    return _code_version
+
+
+def data_fingerprint(ohlcv_data: Dict[str, pd.DataFrame], tickers, macro_data: MacroInput = None) -> str:
+    """Content digest of the frames a feature call reads (missing tickers hash as absent)."""
+    parts = []
+    for t in tickers:
+        df = ohlcv_data.get(t)
+        parts.append(f"{t}:{frame_digest(df) if df is not None and not df.empty else '-'}")
+    for sid, s in sorted(_collect_series(macro_data).items()):
+        parts.append(f"{sid}:{frame_digest(s.to_frame())}")
+    return hashlib.sha256("|".join(parts).encode()).hexdigest()[:32]
+
+
+def feature_key(data_digest: str, spec: dict) -> str:
+    """Store key for `spec` (JSON-serialisable call arguments) over `data_digest`."""
+    payload = json.dumps({'data': data_digest, 'spec': spec, 'code': feature_code_version()},
+                         sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()[:32]
+
+
+class FeatureStore:
+    """
+    Directory of cached feature frames with an LRU index.
+
+    Thread-safe within a process; files are written atomically so concurrent
+    processes at worst recompute the same entry.
+    """
+
+    def __init__(self, root: Union[str, Path], max_bytes: Optional[int] = None, max_entries: Optional[int] = None,
+                 flush_seconds: Optional[float] = None):
+        cfg = _store_config()
+        self.root = Path(root)
+        self.max_bytes = int(cfg['max_mb'] * 1024 * 1024) if max_bytes is None else int(max_bytes)
+        self.max_entries = int(cfg['max_entries']) if max_entries is None else int(max_entries)
+        self.flush_seconds = float(cfg['index_flush_seconds'] if flush_seconds is None else flush_seconds)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self._load_index()
+
+    # --- Index ---
+
+    def _index_path(self) -> Path:
+        return self.root / INDEX_FILE
+
+    def _read_index(self) -> dict:
+        path = self._index_path()
+        try:
+            return json.loads(path.read_text()) if path.exists() else {}
+        except ValueError as e:
+            logger.warning("Ignoring unreadable feature cache index %s: %s", path, e)
+            return {}
+
+    def _load_index(self) -> None:
+        payload = self._read_index()
+        self.entries: Dict[str, dict] = payload.get('entries', {})
+        self._totals = payload.get('totals', {'hits': 0, 'misses': 0})
+        self._unsaved = {'hits': 0, 'misses': 0}  # counted here since the last write
+        self._removed = set()
+        self._dirty = False
+        self._saved_at = time.monotonic()
+
+    def _merge_disk_index(self) -> None:
+        """Folds in entries and totals other processes wrote since this store last read the index."""
+        payload = self._read_index()
+        disk_totals = payload.get('totals', {})
+        self._totals = {f: disk_totals.get(f, 0) + self._unsaved[f] for f in ('hits', 'misses')}
+        for key, entry in payload.get('entries', {}).items():
+            if key in self._removed:
+                continue
+            ours = self.entries.get(key)
+            if ours is None:
+                if self._file(key).exists():
+                    self.entries[key] = entry
+            elif entry.get('last_access', 0) > ours.get('last_access', 0):
+                ours['last_access'] = entry['last_access']
+        # Entries another process evicted
+        for key in [k for k in self.entries if not self._file(k).exists()]:
+            del self.entries[key]
+
+    def _save_index(self, evict: bool = False) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._merge_disk_index()
+        if evict:
+            self._evict()
+        path = self._index_path()
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps({'version': STORE_VERSION, 'totals': self._totals, 'entries': self.entries},
+                                  sort_keys=True))
+        os.replace(tmp, path)
+        self._unsaved = {'hits': 0, 'misses': 0}
+        self._removed.clear()
+        self._dirty = False
+        self._saved_at = time.monotonic()
+
+    def _touched(self) -> None:
+        """Marks the index changed in memory; writes it only once `flush_seconds` have passed."""
+        self._dirty = True
+        if time.monotonic() - self._saved_at >= self.flush_seconds:
+            self._save_index()
+
+    def flush(self) -> None:
+        """Writes pending last-access times and hit / miss counts to the index."""
+        with self._lock:
+            if self._dirty:
+                self._save_index()
+
+    def _file(self, key: str) -> Path:
+        return self.root / f"{key}.parquet"
+
+    def _count(self, hit: bool) -> None:
+        field = 'hits' if hit else 'misses'
+        setattr(self, field, getattr(self, field) + 1)
+        self._totals[field] = self._totals.get(field, 0) + 1
+        self._unsaved[field] += 1
+
+    # --- Access ---
+
+    def get(self, key: str) -> Optional[pd.DataFrame]:
+        """Cached frame for `key`, or None (counted as a miss)."""
+        with self._lock:
+            path = self._file(key)
+            if key not in self.entries or not path.exists():
+                if self.entries.pop(key, None) is not None:
+                    self._removed.add(key)
+                self._count(hit=False)
+                self._touched()
+                return None
+            try:
+                df = pd.read_parquet(path)
+            except Exception as e:
+                logger.warning("Dropping unreadable feature cache entry %s: %s", key, e)
+                self._remove(key)
+                self._count(hit=False)
+                self._touched()
+                return None
+            self.entries[key]['last_access'] = time.time()
+            self._count(hit=True)
+            self._touched()
+            return df
+
+    def put(self, key: str, df: pd.DataFrame, spec: Optional[dict] = None) -> None:
+        """Stores `df` under `key` and evicts least recently used entries over budget."""
+        with self._lock:
+            self.root.mkdir(parents=True, exist_ok=True)
+            path = self._file(key)
+            tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+            try:
+                df.to_parquet(tmp)
+                os.replace(tmp, path)
+            finally:
+                if tmp.exists():
+                    tmp.unlink()
+            now = time.time()
+            self.entries[key] = {'bytes': path.stat().st_size, 'created_at': now, 'last_access': now,
+                                 'spec': spec or {}}
+            self._removed.discard(key)
+            self._save_index(evict=True)
+
+    def get_or_compute(self, key: str, compute: Callable[[], pd.DataFrame], spec: Optional[dict] = None) -> pd.DataFrame:
+        cached = self.get(key)
+        if cached is not None:
+            return cached
+        df = compute()
+        self.put(key, df, spec)
+        return df
+
+    # --- Eviction / stats ---
+
+    def _remove(self, key: str) -> None:
+        self.entries.pop(key, None)
+        self._removed.add(key)
+        path = self._file(key)
+        if path.exists():
+            path.unlink()
+
+    def _evict(self) -> None:
+        by_age = sorted(self.entries, key=lambda k: self.entries[k]['last_access'])
+        total = sum(e['bytes'] for e in self.entries.values())
+        while by_age and (total > self.max_bytes or len(self.entries) > self.max_entries):
+            victim = by_age.pop(0)
+            total -= self.entries[victim]['bytes']
+            self._remove(victim)
+            logger.debug("Evicted feature cache entry %s", victim)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._merge_disk_index()
+            for key in list(self.entries):
+                self._remove(key)
+            self._save_index()
+
+    def stats(self) -> dict:
+        """Hit / miss counts of this process, cumulative totals and current size."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            total_lookups = self._totals.get('hits', 0) + self._totals.get('misses', 0)
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'total_hits': self._totals.get('hits', 0),
+                'total_misses': self._totals.get('misses', 0),
+                'total_hit_rate': self._totals.get('hits', 0) / total_lookups if total_lookups else 0.0,
+                'entries': len(self.entries),
+                'bytes': sum(e['bytes'] for e in self.entries.values()),
+            }
+
+
+_stores: Dict[Path, FeatureStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_feature_store(data_path: Optional[Union[str, Path]] = None) -> FeatureStore:
+    """Process-wide feature store under `<data_path>/<features.store.path>`."""
+    root = (Path(data_path or config['data_path']) / _store_config()['path']).resolve()
+    with _stores_lock:
+        store = _stores.get(root)
+        if store is None:
+            store = _stores[root] = FeatureStore(root)
+            atexit.register(store.flush)
+        return store
+
+
+def cached_compute_features(
+    ohlcv_data: Dict[str, pd.DataFrame],
+    ref_asset_ticker: str = 'SPY',
+    vix_ticker: str = '^VIX',
+    macro_data: MacroInput = None,
+    bar_freq: str = None,
+    columns: Optional[Sequence[str]] = None,
+    store: Optional[FeatureStore] = None,
+) -> pd.DataFrame:
+    """
+    `compute_features` through the feature store.
+
+    Same arguments and result as `compute_features`; disabled (always
+    recomputes) when `features.store.enabled` is false and no `store` is given.
+    """
+    from src.features.engine import compute_features
+
+    def compute():
+        return compute_features(ohlcv_data, ref_asset_ticker, vix_ticker, macro_data=macro_data, bar_freq=bar_freq,
+                                columns=columns)
+
+    if store is None:
+        if not _store_config()['enabled']:
+            return compute()
+        store = get_feature_store()
+
+    spec = {
+        'fn': 'compute_features',
+        'ref_asset_ticker': ref_asset_ticker,
+        'vix_ticker': vix_ticker,
+        'bar_freq': bar_freq,
+        'columns': list(columns) if columns is not None else None,
+        'macro': (config.get('features', {}) or {}).get('macro') if macro_data is not None else None,
+    }
+    key = feature_key(data_fingerprint(ohlcv_data, [ref_asset_ticker, vix_ticker], macro_data), spec)
+    return store.get_or_compute(key, compute, spec)
@@ -0,0 +1,330 @@
+"""
+src/features/covariance.py
+
+Streaming universe covariance / correlation engine.
+
+- Two estimators, both updated in O(n^2) per bar with no per-date refit:
+  'ewma' (exponentially weighted mean and covariance, RiskMetrics-style) and
+  'rolling' (trailing window, sample covariance from running per-pair sums
+  and observation counts over a ring buffer of the last `window` returns)
+- Only the current n x n state is held in float64. History is kept as
+  summary series (average pairwise correlation, average volatility, number
+  of live assets) every bar, plus optional float32 upper-triangle snapshots
+  every `store_every` bars: a 500-asset matrix costs 0.5 MB per stored bar
+  instead of the 2 MB dense float64 block per bar of `rolling().cov()`
+- Optional linear shrinkage towards a diagonal or constant-correlation
+  target for the matrices handed to portfolio code
+- Missing returns: an asset's row and column are NaN until it has
+  `min_periods` observations. 'rolling' pairs use only the bars in the
+  window where both assets are present and divide by that joint count, as
+  pandas `rolling(window, min_periods).cov()` does; EWMA pairs skip bars
+  where either asset is missing
+
+Usage:
+    from src.features.covariance import CovarianceEngine
+    engine = CovarianceEngine.from_prices(close_panel, method='ewma', halflife=21, store_every=5)
+    stress = engine.summary()['avg_correlation']
+    cov = engine.matrix('2020-03-16', shrink=True)
+    engine.update(latest_returns, timestamp)   # next bar, O(n^2)
+"""
+
+import logging
+from typing import Dict, List, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+METHODS = ('ewma', 'rolling')
+SHRINKAGE_TARGETS = ('diagonal', 'constant_correlation')
+
+# Running sums for the rolling estimator are rebuilt from the buffer this often (in windows) to bound drift
+_RESYNC_WINDOWS = 16
+
+
+def pack_upper(matrix: np.ndarray) -> np.ndarray:
+    """Upper triangle (diagonal included) of a symmetric matrix as a float32 vector."""
+    return matrix[np.triu_indices(matrix.shape[0])].astype(np.float32)
+
+
+def unpack_upper(packed: np.ndarray, n: int) -> np.ndarray:
+    """Inverse of `pack_upper`: the full symmetric float64 matrix."""
+    out = np.empty((n, n))
+    rows, cols = np.triu_indices(n)
+    out[rows, cols] = packed
+    out[cols, rows] = packed
+    return out
+
+
+def shrink_covariance(cov: np.ndarray, intensity: float, target: str = 'diagonal') -> np.ndarray:
+    """(1 - intensity) * cov + intensity * target, where target keeps the variances."""
+    if not 0.0 <= intensity <= 1.0:
+        raise ValueError(f"shrinkage intensity must be in [0, 1], got {intensity}")
+    if target not in SHRINKAGE_TARGETS:
+        raise ValueError(f"target must be one of {SHRINKAGE_TARGETS}, got {target!r}")
+    std = np.sqrt(np.diag(cov))
+    if target == 'diagonal':
+        prior = np.diag(np.diag(cov))
+    else:
+        corr = _correlation(cov)
+        prior = _average_offdiagonal(corr) * np.outer(std, std)
+        np.fill_diagonal(prior, std * std)
+    return (1.0 - intensity) * cov + intensity * prior
+
+
+def _correlation(cov: np.ndarray) -> np.ndarray:
+    std = np.sqrt(np.diag(cov))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return cov / np.outer(std, std)
+
+
+def _average_offdiagonal(corr: np.ndarray) -> float:
+    """Mean pairwise correlation over assets with a defined (finite) row."""
+    live = np.isfinite(np.diag(corr))
+    k = int(live.sum())
+    if k < 2:
+        return np.nan
+    sub = corr[np.ix_(live, live)]
+    return float((np.nansum(sub) - np.trace(sub)) / (k * (k - 1)))
+
+
+class CovarianceEngine:
+    """
+    Incrementally updated covariance of per-bar returns across `tickers`.
+
+    Attributes:
+        tickers: Column order of every matrix.
+        snapshots: {timestamp: packed float32 upper triangle} of stored bars.
+    """
+
+    def __init__(
+        self,
+        tickers: Sequence[str],
+        method: str = 'ewma',
+        halflife: float = 21.0,
+        window: int = 63,
+        min_periods: Optional[int] = None,
+        shrinkage: float = 0.0,
+        target: str = 'diagonal',
+        store_every: Optional[int] = None,
+    ):
+        if method not in METHODS:
+            raise ValueError(f"method must be one of {METHODS}, got {method!r}")
+        if target not in SHRINKAGE_TARGETS:
+            raise ValueError(f"target must be one of {SHRINKAGE_TARGETS}, got {target!r}")
+        self.tickers: List[str] = list(tickers)
+        self.method = method
+        self.window = int(window)
+        self.alpha = 1.0 - np.exp(np.log(0.5) / halflife)
+        self.min_periods = int(min_periods if min_periods is not None
+                               else (self.window if method == 'rolling' else np.ceil(halflife)))
+        self.shrinkage = float(shrinkage)
+        self.target = target
+        self.store_every = store_every
+
+        n = len(self.tickers)
+        self._count = np.zeros(n, dtype=np.int64)
+        if method == 'ewma':
+            self._mean = np.zeros(n)
+            self._cov = np.zeros((n, n))
+        else:
+            self._buffer = np.zeros((self.window, n))
+            self._buffer_valid = np.zeros((self.window, n), dtype=bool)
+            # [i, j]: sum of asset i's returns / number of bars over the bars where asset j is also present
+            self._pair_sum = np.zeros((n, n))
+            self._pair_count = np.zeros((n, n))
+            self._sum_sq = np.zeros((n, n))
+            self._bars = 0
+            self._missing = 0  # missing returns in the buffer; while 0 every pair shares the same bars
+
+        self._timestamps: List = []
+        self._summary: Dict[str, List[float]] = {'avg_correlation': [], 'avg_volatility': [], 'n_assets': []}
+        self.snapshots: Dict = {}
+
+    # --- Updates ---
+
+    @classmethod
+    def from_prices(cls, close: pd.DataFrame, **kwargs) -> "CovarianceEngine":
+        """Engine fed with every bar of `close` (dates x tickers) as simple returns."""
+        return cls.from_returns(close / close.shift(1) - 1.0, **kwargs)
+
+    @classmethod
+    def from_returns(cls, returns: pd.DataFrame, **kwargs) -> "CovarianceEngine":
+        engine = cls(list(returns.columns), **kwargs)
+        values = returns.to_numpy(dtype='float64')
+        for ts, row in zip(returns.index, values):
+            engine.update(row, ts)
+        return engine
+
+    def update(self, returns: Union[np.ndarray, pd.Series, Dict[str, float]], timestamp=None) -> None:
+        """Advances the state by one bar of returns (NaN / missing ticker = no observation)."""
+        if isinstance(returns, (pd.Series, dict)):
+            row = pd.Series(returns).reindex(self.tickers).to_numpy(dtype='float64')
+        else:
+            row = np.asarray(returns, dtype='float64')
+        valid = ~np.isnan(row)
+        if self.method == 'ewma':
+            self._update_ewma(row, valid)
+        else:
+            self._update_rolling(row, valid)
+
+        self._timestamps.append(timestamp if timestamp is not None else len(self._timestamps))
+        avg_corr, avg_vol, live = self._summary_stats()
+        self._summary['avg_correlation'].append(avg_corr)
+        self._summary['avg_volatility'].append(avg_vol)
+        self._summary['n_assets'].append(live)
+        if self.store_every and (len(self._timestamps) - 1) % self.store_every == 0:
+            self.snapshots[self._timestamps[-1]] = pack_upper(self._raw_covariance())
+
+    def _update_ewma(self, row: np.ndarray, valid: np.ndarray) -> None:
+        first = valid & (self._count == 0)
+        seen = valid & ~first
+        delta = np.where(seen, row - self._mean, 0.0)
+        if seen.all():
+            # Common case: in-place rank-1 update, no temporaries beyond the outer product
+            self._cov += self.alpha * np.outer(delta, delta)
+            self._cov *= 1.0 - self.alpha
+        else:
+            updated = (1.0 - self.alpha) * (self._cov + self.alpha * np.outer(delta, delta))
+            self._cov = np.where(np.outer(seen, seen), updated, self._cov)
+        self._mean = np.where(seen, self._mean + self.alpha * delta, self._mean)
+        self._mean[first] = row[first]
+        self._count += valid
+
+    def _update_rolling(self, row: np.ndarray, valid: np.ndarray) -> None:
+        slot = self._bars % self.window
+        filled = np.where(valid, row, 0.0)
+        present = valid.astype('float64')
+        if self._bars >= self.window:
+            old = self._buffer[slot].copy()
+            old_present = self._buffer_valid[slot].astype('float64')
+            # Add the new bar and retire the oldest in one rank-2 product per statistic
+            added = np.stack([filled, -old], axis=1)
+            self._sum_sq += added @ np.stack([filled, old])
+            if valid.all() and self._buffer_valid[slot].all():
+                # Common case: no pair gains or loses an observation
+                self._pair_sum += (filled - old)[:, None]
+            else:
+                self._pair_sum += added @ np.stack([present, old_present])
+                self._pair_count += np.stack([present, -old_present], axis=1) @ np.stack([present, old_present])
+            self._count -= self._buffer_valid[slot]
+            self._missing -= len(valid) - int(self._buffer_valid[slot].sum())
+        else:
+            self._sum_sq += np.outer(filled, filled)
+            self._pair_sum += np.outer(filled, present)
+            self._pair_count += np.outer(present, present)
+        self._buffer[slot] = filled
+        self._buffer_valid[slot] = valid
+        self._count += valid
+        self._missing += len(valid) - int(valid.sum())
+        self._bars += 1
+        if self._bars % (self.window * _RESYNC_WINDOWS) == 0:
+            present = self._buffer_valid.astype('float64')
+            self._sum_sq = self._buffer.T @ self._buffer
+            self._pair_sum = self._buffer.T @ present
+            self._pair_count = present.T @ present
+
+    def _summary_stats(self):
+        """(average pairwise correlation, average volatility, live assets) without forming the matrices."""
+        if self.method == 'rolling' and self._missing:
+            return self._pairwise_summary_stats()
+        if self.method == 'ewma':
+            var = np.diag(self._cov).copy()
+        else:
+            # No gaps in the window: every pair shares the same `bars` observations
+            bars = min(self._bars, self.window)
+            sums = np.diag(self._pair_sum)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                var = (np.diag(self._sum_sq) - sums * sums / bars) / (bars - 1)
+        live = (self._count >= self.min_periods) & (var > 0)
+        k = int(live.sum())
+        if k == 0:
+            return np.nan, np.nan, 0
+        std = np.sqrt(var[live])
+        if k < 2:
+            return np.nan, float(std.mean()), k
+        weights = np.zeros(len(var))
+        weights[live] = 1.0 / std
+        # sum_ij corr_ij = w' C w with w = 1 / std
+        if self.method == 'ewma':
+            total = weights @ self._cov @ weights
+        else:
+            total = (weights @ self._sum_sq @ weights - (weights @ sums) ** 2 / bars) / (bars - 1)
+        return float((total - k) / (k * (k - 1))), float(std.mean()), k
+
+    def _pairwise_summary_stats(self):
+        # Gaps give pairs their own means and counts, so w' C w does not apply; average the scaled matrix
+        scaled = self._rolling_covariance()
+        var = np.diag(scaled).copy()
+        live = var > 0
+        k = int(live.sum())
+        if k == 0:
+            return np.nan, np.nan, 0
+        std = np.sqrt(var[live])
+        if k < 2:
+            return np.nan, float(std.mean()), k
+        weights = np.zeros(len(var))
+        weights[live] = 1.0 / std
+        scaled *= weights[:, None]
+        scaled *= weights
+        # Rows and columns of dead assets are zero or NaN; live pairs short of min_periods are NaN
+        pairs = int(np.isfinite(scaled[np.ix_(live, live)]).sum()) - k
+        if pairs == 0:
+            return np.nan, float(std.mean()), k
+        return float((np.nansum(scaled) - k) / pairs), float(std.mean()), k
+
+    # --- Queries ---
+
+    def _raw_covariance(self) -> np.ndarray:
+        if self.method == 'rolling':
+            return self._rolling_covariance()
+        cov = self._cov.copy()
+        dead = self._count < self.min_periods
+        cov[dead, :] = np.nan
+        cov[:, dead] = np.nan
+        return cov
+
+    def _rolling_covariance(self) -> np.ndarray:
+        n = self._pair_count
+        with np.errstate(divide='ignore', invalid='ignore'):
+            cov = self._pair_sum * self._pair_sum.T
+            cov /= n
+            np.subtract(self._sum_sq, cov, out=cov)
+            cov /= n - 1
+        cov[n < max(self.min_periods, 2)] = np.nan
+        return cov
+
+    def _frame(self, matrix: np.ndarray) -> pd.DataFrame:
+        return pd.DataFrame(matrix, index=self.tickers, columns=self.tickers)
+
+    def _finish(self, cov: np.ndarray, shrink: bool, kind: str) -> pd.DataFrame:
+        if kind not in ('covariance', 'correlation'):
+            raise ValueError(f"kind must be 'covariance' or 'correlation', got {kind!r}")
+        if shrink and self.shrinkage:
+            cov = shrink_covariance(cov, self.shrinkage, self.target)
+        return self._frame(cov if kind == 'covariance' else _correlation(cov))
+
+    def covariance(self, shrink: bool = True) -> pd.DataFrame:
+        """Current covariance matrix (shrunk when the engine has a shrinkage intensity)."""
+        return self._finish(self._raw_covariance(), shrink, 'covariance')
+
+    def correlation(self, shrink: bool = False) -> pd.DataFrame:
+        return self._finish(self._raw_covariance(), shrink, 'correlation')
+
+    def matrix(self, timestamp, kind: str = 'covariance', shrink: bool = False) -> pd.DataFrame:
+        """Stored matrix for `timestamp` (see `store_every`)."""
+        key = pd.Timestamp(timestamp) if isinstance(timestamp, str) else timestamp
+        if key not in self.snapshots:
+            raise KeyError(f"No covariance snapshot stored for {timestamp}; "
+                           f"set store_every to keep matrices ({len(self.snapshots)} stored)")
+        return self._finish(unpack_upper(self.snapshots[key], len(self.tickers)), shrink, kind)
+
+    def summary(self) -> pd.DataFrame:
+        """Per-bar average pairwise correlation, average volatility and live asset count (unshrunk)."""
+        return pd.DataFrame(self._summary, index=pd.Index(self._timestamps))
+
+
+def average_correlation(close: pd.DataFrame, method: str = 'ewma', **kwargs) -> pd.Series:
+    """Average pairwise correlation of the universe per bar, a market stress indicator."""
+    return CovarianceEngine.from_prices(close, method=method, **kwargs).summary()['avg_correlation']
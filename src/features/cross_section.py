@@ -0,0 +1,145 @@
+"""
+src/features/cross_section.py
+
+Cross-sectional features: how each asset compares with the rest of the universe on the same date.
+
+- Per asset: percentile rank of 63-day momentum and z-score of 63-day
+  volatility against the universe on each date
+- Per date (market state): dispersion of 21-day returns across assets and
+  breadth (share of assets above their 63-bar SMA / with positive momentum)
+- Everything runs on the dates x tickers matrices of `compute_panel_features`
+  with row-wise NumPy operations (one argsort per panel for ranks); there is
+  no per-date groupby. NaNs (assets not trading yet, warmup) are left out of
+  every statistic, as in pandas `rank(axis=1, pct=True)` / `std(axis=1)`
+
+Usage:
+    from src.features.cross_section import compute_cross_sectional_features
+    per_asset, market = compute_cross_sectional_features(ohlcv, tickers=universe)
+    features = compute_features(ohlcv, 'SPY', '^VIX').join(market)   # detect_regime reads breadth
+"""
+
+import logging
+from typing import Dict, List, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from src.data.panel import PricePanel
+from src.features.engine import compute_panel_features
+
+logger = logging.getLogger(__name__)
+
+ASSET_FEATURES = ['xs_momentum_rank_63d', 'xs_volatility_z_63d']
+MARKET_FEATURES = ['xs_dispersion_21d', 'xs_breadth_sma63', 'xs_breadth_momentum_63d']
+
+
+def rank_pct(values: np.ndarray) -> np.ndarray:
+    """
+    Row-wise percentile rank in (0, 1], ties sharing the average rank, NaNs ignored.
+
+    Equivalent to `pd.DataFrame(values).rank(axis=1, pct=True)`.
+    """
+    arr = np.asarray(values, dtype='float64')
+    n, m = arr.shape
+    valid = ~np.isnan(arr)
+    # NaNs sort last as +inf; they are masked out of the result below
+    order = np.argsort(np.where(valid, arr, np.inf), axis=1, kind='stable')
+    ordered = np.take_along_axis(np.where(valid, arr, np.inf), order, axis=1)
+    pos = np.broadcast_to(np.arange(m), (n, m))
+
+    starts_group = np.ones((n, m), dtype=bool)
+    starts_group[:, 1:] = ordered[:, 1:] != ordered[:, :-1]
+    ends_group = np.ones((n, m), dtype=bool)
+    ends_group[:, :-1] = starts_group[:, 1:]
+    first = np.maximum.accumulate(np.where(starts_group, pos, 0), axis=1)
+    last = np.minimum.accumulate(np.where(ends_group, pos, m - 1)[:, ::-1], axis=1)[:, ::-1]
+
+    ranks = np.empty((n, m))
+    np.put_along_axis(ranks, order, (first + last) / 2.0 + 1.0, axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        out = ranks / valid.sum(axis=1, keepdims=True)
+    out[~valid] = np.nan
+    return out
+
+
+def _row_stats(values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Row-wise NaN-aware mean and sample std (NaN for rows with fewer than two values)."""
+    valid = ~np.isnan(values)
+    count = valid.sum(axis=1, keepdims=True)
+    filled = np.where(valid, values, 0.0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean = filled.sum(axis=1, keepdims=True) / count
+        sq = np.where(valid, (values - mean) ** 2, 0.0).sum(axis=1, keepdims=True)
+        std = np.sqrt(sq / (count - 1))
+    std[count < 2] = np.nan
+    return mean, std
+
+
+def zscore(values: np.ndarray) -> np.ndarray:
+    """Row-wise (x - mean) / std across assets (ddof=1), NaNs ignored."""
+    arr = np.asarray(values, dtype='float64')
+    mean, std = _row_stats(arr)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return (arr - mean) / std
+
+
+def _share_positive(values: np.ndarray) -> np.ndarray:
+    valid = ~np.isnan(values)
+    count = valid.sum(axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        out = (np.where(valid, values, 0.0) > 0).sum(axis=1) / count
+    return np.where(count > 0, out, np.nan)
+
+
+def cross_sectional_features(panel_features: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Cross-sectional features from a wide `compute_panel_features` frame.
+
+    Args:
+        panel_features: Columns MultiIndex (feature, ticker) with at least
+            momentum_21d, momentum_63d, volatility_63d and price_vs_sma63.
+
+    Returns:
+        (per_asset, market): per_asset has columns (feature, ticker) for
+        ASSET_FEATURES; market has one column per MARKET_FEATURES, one row per date.
+    """
+    def block(name: str) -> np.ndarray:
+        return panel_features[name].to_numpy(dtype='float64')
+
+    tickers, dates = list(panel_features['momentum_63d'].columns), panel_features.index
+
+    per_asset = {
+        'xs_momentum_rank_63d': rank_pct(block('momentum_63d')),
+        'xs_volatility_z_63d': zscore(block('volatility_63d')),
+    }
+    columns = pd.MultiIndex.from_product([ASSET_FEATURES, tickers], names=['feature', 'ticker'])
+    per_asset_df = pd.DataFrame(np.concatenate([per_asset[f] for f in ASSET_FEATURES], axis=1),
+                                index=dates, columns=columns)
+
+    _, dispersion = _row_stats(block('momentum_21d'))
+    market = pd.DataFrame({
+        'xs_dispersion_21d': dispersion[:, 0],
+        'xs_breadth_sma63': _share_positive(block('price_vs_sma63')),
+        'xs_breadth_momentum_63d': _share_positive(block('momentum_63d')),
+    }, index=dates)
+    return per_asset_df, market
+
+
+def compute_cross_sectional_features(
+    ohlcv_data: Union[Dict[str, pd.DataFrame], PricePanel],
+    tickers: List[str] = None,
+    vix_ticker: str = '^VIX',
+    bar_freq: str = None,
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Runs `compute_panel_features` for `tickers` and derives the cross-sectional features.
+
+    Returns:
+        (per_asset, market) as in `cross_sectional_features`; market rows with
+        no valid statistic (before any asset has warmed up) are dropped.
+    """
+    panel = compute_panel_features(ohlcv_data, tickers=tickers, vix_ticker=vix_ticker, bar_freq=bar_freq)
+    per_asset, market = cross_sectional_features(panel)
+    if per_asset.columns.get_level_values('ticker').nunique() < 2:
+        logger.warning("Cross-sectional features need at least two assets; got %s", tickers)
+    return per_asset, market.dropna(how='all')
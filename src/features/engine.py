@@ -241,17 +241,28 @@ src/features/engine.py
 Robust feature computation utilities for the backtesting-agent.
 
 - Detects 'Close' across MultiIndex / flattened / substring column names
-- Computes common features (volatility, momentum, SMA)
+  (skipped entirely for canonical frames written by the ingest layer)
+- Computes common features (volatility, momentum, SMA), annualised for the bar size
+  from the declarative feature graph in src.features.registry; `columns=` computes a subset
 - Produces a final DataFrame with single-level columns (no MultiIndex)
 - Safely handles VIX extraction and forward-fill without using inplace on a slice
+- Optionally joins as-of aligned FRED macro features (see src.features.macro)
+- compute_panel_features: the same features for a whole universe in one 2D pass
 """
 
 import logging
-from typing import Dict, Union, Tuple
+from typing import Dict, List, Optional, Sequence, Tuple, Union
 
 import numpy as np
 import pandas as pd
 
+from src.data.panel import PricePanel, build_panel
+from src.data.schemas import is_canonical_ohlcv
+from src.features.kernels import rolling_rank
+from src.features.macro import MacroInput, align_macro
+from src.features.registry import evaluate, registered_features, sources_for
+from src.utils.frequency import annualization_factor
+
 logger = logging.getLogger(__name__)
 
 
@@ -327,10 +338,34 @@ def _find_field_series(df: pd.DataFrame, field: str) -> pd.Series:
     raise KeyError(f"Could not find field '{field}' in DataFrame columns. Columns sample: {list(cols[:20])}")
 
 
+def _extract_vix_close(ohlcv_data: Dict[str, pd.DataFrame], vix_ticker: str) -> Optional[pd.Series]:
+    """VIX Close series (robust to column layouts), or None when unavailable."""
+    if vix_ticker not in ohlcv_data or ohlcv_data[vix_ticker] is None or ohlcv_data[vix_ticker].empty:
+        return None
+    vix_raw = ohlcv_data[vix_ticker]
+    if is_canonical_ohlcv(vix_raw):
+        return vix_raw['Close']
+    vix_raw = vix_raw.copy()
+    try:
+        return _find_field_series(vix_raw, 'Close')
+    except KeyError:
+        # fallback: flatten and try substring 'close'
+        if isinstance(vix_raw.columns, pd.MultiIndex):
+            vix_raw.columns = ['_'.join(map(str, col)).strip() for col in vix_raw.columns]
+        close_cols = [c for c in vix_raw.columns if 'close' in str(c).lower()]
+        if not close_cols:
+            logger.warning("Could not find Close in VIX data; skipping vix_close.")
+            return None
+        return vix_raw[close_cols[0]]
+
+
 def compute_features(
     ohlcv_data: Dict[str, pd.DataFrame],
     ref_asset_ticker: str = 'SPY',
-    vix_ticker: str = '^VIX'
+    vix_ticker: str = '^VIX',
+    macro_data: MacroInput = None,
+    bar_freq: str = None,
+    columns: Optional[Sequence[str]] = None,
 ) -> pd.DataFrame:
     """
     Compute features for `ref_asset_ticker` using OHLCV in ohlcv_data.
@@ -338,91 +373,350 @@ def compute_features(
     Returns a DataFrame with:
       - original (flattened) OHLCV columns when available
       - new feature columns: volatility_21d, volatility_63d, momentum_21d, momentum_63d,
-        momentum_252d, sma_21, sma_63, price_vs_sma63, vix_close (if available)
+        momentum_252d, sma_21, sma_63, price_vs_sma63, vix_close and
+        vix_percentile_252d (if available)
+      - macro columns when `macro_data` (e.g. the output of `fetch_fred_data`) is given:
+        one column per series (dgs10, t10y2y), <series>_chg_<w>d level changes and
+        yield_curve_slope / yield_curve_inverted, as-of aligned without look-ahead
+        (see src.features.macro)
+
+    With `columns`, only those columns are returned (feature or macro names,
+    e.g. ['vix_close', 'momentum_63d']) and only the part of the feature graph
+    they depend on is computed (see src.features.registry). Rows are dropped
+    only where a requested column is NaN.
 
     Notes:
+      - Rolling windows are counted in bars; volatility is annualised for `bar_freq`
+        ('1m', '1h', '1d', ...), inferred from the index when not given.
       - Uses a robust Close-series extractor so it works with MultiIndex, flattened names, etc.
       - Final DataFrame columns are single-level strings.
     """
     if ref_asset_ticker not in ohlcv_data or ohlcv_data[ref_asset_ticker] is None or ohlcv_data[ref_asset_ticker].empty:
         raise ValueError(f"Reference asset '{ref_asset_ticker}' not found in OHLCV data.")
 
-    raw_df = ohlcv_data[ref_asset_ticker].copy()
+    raw_df = ohlcv_data[ref_asset_ticker]
 
-    # 1) Extract Close series robustly (this will be used for all calculations)
-    close_s = _find_field_series(raw_df, 'Close')
+    if is_canonical_ohlcv(raw_df):
+        # Fast path: frames written by ingest already follow OHLCV_SCHEMA
+        close_s = raw_df['Close']
+        base_df = raw_df
+    else:
+        raw_df = raw_df.copy()
 
-    # 2) Build a flattened base DataFrame so downstream columns are single-level strings
-    base_df = raw_df.copy()
-    if isinstance(base_df.columns, pd.MultiIndex):
-        base_df.columns = ['_'.join(map(str, col)).strip() for col in base_df.columns]
+        # 1) Extract Close series robustly (this will be used for all calculations)
+        close_s = _find_field_series(raw_df, 'Close')
 
-    # If 'Close' isn't present after flattening, create a canonical 'Close' column using close_s
-    if 'Close' not in base_df.columns:
-        base_df = base_df.assign(Close=close_s)
+        # 2) Build a flattened base DataFrame so downstream columns are single-level strings
+        base_df = raw_df.copy()
+        if isinstance(base_df.columns, pd.MultiIndex):
+            base_df.columns = ['_'.join(map(str, col)).strip() for col in base_df.columns]
 
-    # 3) Compute features from the extracted close series
-    feature_series_list = []
+        # If 'Close' isn't present after flattening, create a canonical 'Close' column using close_s
+        if 'Close' not in base_df.columns:
+            base_df = base_df.assign(Close=close_s)
 
-    vol_21d = close_s.pct_change().rolling(window=21).std() * np.sqrt(252)
-    vol_21d.name = 'volatility_21d'
-    feature_series_list.append(vol_21d)
+    # 3) Resolve the requested part of the feature graph (shared intermediates are computed once)
+    feature_names = registered_features()
+    wanted = feature_names if columns is None else [c for c in columns if c in feature_names]
+    sources = {'close': close_s}
+    if 'vix' in sources_for(wanted):
+        sources['vix'] = _extract_vix_close(ohlcv_data, vix_ticker)
+    ctx = {'ann': annualization_factor(bar_freq, close_s.index)}
+    values = evaluate(wanted, sources, ctx)
 
-    vol_63d = close_s.pct_change().rolling(window=63).std() * np.sqrt(252)
-    vol_63d.name = 'volatility_63d'
-    feature_series_list.append(vol_63d)
+    # 4) Assemble final_df and attach feature columns
+    final_df = base_df.copy() if columns is None else pd.DataFrame(index=base_df.index)
+    for name, s in values.items():
+        final_df[name] = s
+
+    # 5) Join macro series as of their publication date
+    other = [] if columns is None else [c for c in columns if c not in feature_names]
+    if macro_data is not None and (columns is None or other):
+        macro = align_macro(macro_data, final_df.index)
+        if columns is not None:
+            macro = macro[[c for c in other if c in macro.columns]]
+        if not macro.empty:
+            final_df = pd.concat([final_df, macro], axis=1)
+    unknown = [c for c in other if c not in final_df.columns]
+    if unknown:
+        logger.warning("Requested feature columns not available: %s", unknown)
+
+    if columns is not None:
+        final_df = final_df[[c for c in columns if c in final_df.columns]]
 
-    mom_21d = close_s.pct_change(periods=21)
-    mom_21d.name = 'momentum_21d'
-    feature_series_list.append(mom_21d)
+    # 6) Drop rows with NaNs that come from rolling windows
+    final_df = final_df.dropna()
 
-    mom_63d = close_s.pct_change(periods=63)
-    mom_63d.name = 'momentum_63d'
-    feature_series_list.append(mom_63d)
+    return final_df
 
-    mom_252d = close_s.pct_change(periods=252)
-    mom_252d.name = 'momentum_252d'
-    feature_series_list.append(mom_252d)
 
-    sma_21 = close_s.rolling(window=21).mean()
-    sma_21.name = 'sma_21'
-    feature_series_list.append(sma_21)
+# --- Panel (universe-wide) features ---
 
-    sma_63 = close_s.rolling(window=63).mean()
-    sma_63.name = 'sma_63'
-    feature_series_list.append(sma_63)
+FEATURE_COLUMNS = [
+    'volatility_21d', 'volatility_63d', 'momentum_21d', 'momentum_63d',
+    'momentum_252d', 'sma_21', 'sma_63', 'price_vs_sma63',
+]
 
-    price_vs_sma63 = (close_s / sma_63 - 1)
-    price_vs_sma63.name = 'price_vs_sma63'
-    feature_series_list.append(price_vs_sma63)
 
-    # 4) Assemble final_df and attach feature columns
-    final_df = base_df.copy()
-    for s in feature_series_list:
-        final_df[s.name] = s
-
-    # 5) Attach VIX close (robustly)
-    if vix_ticker in ohlcv_data and ohlcv_data[vix_ticker] is not None and not ohlcv_data[vix_ticker].empty:
-        vix_raw = ohlcv_data[vix_ticker].copy()
-        try:
-            vix_close = _find_field_series(vix_raw, 'Close').rename('vix_close')
-        except KeyError:
-            # fallback: flatten and try substring 'close'
-            if isinstance(vix_raw.columns, pd.MultiIndex):
-                vix_raw.columns = ['_'.join(map(str, col)).strip() for col in vix_raw.columns]
-            close_cols = [c for c in vix_raw.columns if 'close' in str(c).lower()]
-            if not close_cols:
-                logger.warning("Could not find Close in VIX data; skipping vix_close.")
-                vix_close = None
-            else:
-                vix_close = vix_raw[close_cols[0]].rename('vix_close')
-
-        if vix_close is not None:
-            # avoid chained-assignment/inplace warning by assigning result back
-            final_df['vix_close'] = vix_close
-            final_df['vix_close'] = final_df['vix_close'].ffill()
+def _prefix_sums_2d(x: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Column-wise cumulative sums of `x` (NaN as 0) and of its valid-value count (None if no NaNs)."""
+    valid = np.isfinite(x)
+    if valid.all():
+        return np.cumsum(x, axis=0), None
+    return np.cumsum(np.where(valid, x, 0.0), axis=0), np.cumsum(valid, axis=0)
 
-    # 6) Drop rows with NaNs that come from rolling windows
-    final_df = final_df.dropna()
 
-    return final_df
+def _window_sums_2d(prefix: Tuple[np.ndarray, np.ndarray], window: int) -> np.ndarray:
+    """
+    Trailing sums over `window` rows from prefix sums, so several windows
+    over the same input share one cumulative sum. A window containing any
+    NaN (missing bar or warmup) yields NaN, matching pandas `rolling(window)`.
+    """
+    csum, ccount = prefix
+    out = np.full(csum.shape, np.nan)
+    if window > csum.shape[0]:
+        return out
+    sums = csum[window - 1:].copy()
+    sums[1:] -= csum[:-window]
+    if ccount is not None:
+        counts = ccount[window - 1:].copy()
+        counts[1:] -= ccount[:-window]
+        sums[counts != window] = np.nan
+    out[window - 1:] = sums
+    return out
+
+
+def _rolling_mean_2d(prefix, window: int) -> np.ndarray:
+    return _window_sums_2d(prefix, window) / window
+
+
+class _LocalMoments:
+    """
+    Rolling standard deviations from chunk-local prefix sums of x and x^2.
+
+    Second moments differenced from prefix sums over the whole history cancel
+    catastrophically on short windows: the sums grow with the spread of the
+    entire series, the window variance does not. Here rows are cut into
+    chunks of `size` rows (a power of two >= 2 * window) twice, the second cut
+    shifted by size / 2, so every window lies inside one chunk of one cut.
+    Within a chunk values are centred on the chunk mean and summed from zero,
+    so the sums only carry the spread of a few windows. Each cut is built
+    once in O(n) and shared by every window that maps to it; a window then
+    costs a few O(n) array operations. Two-bar windows use the exact
+    |x[t] - x[t-1]| form, since a pair of near-equal prices has almost no
+    variance left to resolve.
+    """
+
+    def __init__(self, values: np.ndarray):
+        self.values = np.asarray(values, dtype='float64')
+        self.valid = np.isfinite(self.values)
+        self.complete = bool(self.valid.all())
+        self._cuts: Dict[Tuple[int, int], tuple] = {}
+
+    @property
+    def nbytes(self) -> int:
+        return sum(a.nbytes for cut in self._cuts.values() for a in cut if a is not None)
+
+    def _cut(self, size: int, shift: int) -> tuple:
+        """(chunks, size + 1, m) prefix sums of x, x^2 (and valid counts), restarting at zero in every chunk."""
+        cut = self._cuts.get((size, shift))
+        if cut is not None:
+            return cut
+        n, m = self.values.shape
+        chunks = -(-(shift + n) // size)
+        x = np.zeros((chunks * size, m))
+        valid = np.zeros((chunks * size, m), dtype=bool)
+        x[shift:shift + n] = self.values if self.complete else np.where(self.valid, self.values, 0.0)
+        valid[shift:shift + n] = self.valid
+        x, valid = x.reshape(chunks, size, m), valid.reshape(chunks, size, m)
+        center = x.sum(axis=1, keepdims=True) / np.maximum(valid.sum(axis=1, keepdims=True), 1)
+        y = x - center
+        y[~valid] = 0.0  # padding and missing bars
+
+        first = np.zeros((chunks, size + 1, m))
+        second = np.zeros((chunks, size + 1, m))
+        np.cumsum(y, axis=1, out=first[:, 1:])
+        np.cumsum(y * y, axis=1, out=second[:, 1:])
+        counts = None
+        if not self.complete:
+            counts = np.zeros((chunks, size + 1, m), dtype=np.int32)
+            np.cumsum(valid, axis=1, out=counts[:, 1:])
+        cut = self._cuts[(size, shift)] = (first, second, counts)
+        return cut
+
+    @staticmethod
+    def _sum_sq_dev(first, second, counts, window: int, ends: slice, starts: slice) -> np.ndarray:
+        """Sum of squared deviations over windows (starts, ends] of every chunk; NaN where a bar is missing."""
+        s1 = first[:, ends] - first[:, starts]
+        out = second[:, ends] - second[:, starts]
+        s1 *= s1
+        s1 /= window
+        out -= s1
+        if counts is not None:
+            out[counts[:, ends] - counts[:, starts] != window] = np.nan
+        return out
+
+    def std(self, window: int, ddof: int = 1) -> np.ndarray:
+        """Equivalent to `rolling(window).std(ddof=ddof)` column by column."""
+        n, m = self.values.shape
+        if window > n or window <= ddof:
+            return np.full((n, m), np.nan)
+        if window == 2:
+            out = np.full((n, m), np.nan)
+            out[1:] = np.abs(np.diff(self.values, axis=0)) / np.sqrt(2.0 * (2 - ddof))
+            return out
+
+        size = n if 2 * window >= n else 1 << int(np.ceil(np.log2(2 * window)))
+        # First cut: windows ending at chunk row >= window - 1 lie inside the chunk
+        first, second, counts = self._cut(size, 0)
+        chunks = first.shape[0]
+        out = np.full((chunks, size, m), np.nan)
+        out[:, window - 1:] = self._sum_sq_dev(first, second, counts, window,
+                                               slice(window, size + 1), slice(0, size + 1 - window))
+        if size < n:
+            # The first window - 1 rows of each chunk are rows half..half + window - 2 of a chunk
+            # of the cut shifted by half = size / 2 >= window, where their windows fit
+            half = size // 2
+            first, second, counts = self._cut(size, half)
+            k = min(chunks, first.shape[0])
+            out[:k, :window - 1] = self._sum_sq_dev(first[:k], second[:k], None if counts is None else counts[:k],
+                                                    window, slice(half + 1, half + window),
+                                                    slice(half + 1 - window, half))
+        out = out.reshape(-1, m)[:n]
+        out[:window - 1] = np.nan
+        return np.sqrt(np.maximum(out, 0.0) / (window - ddof))
+
+
+def _pct_change_2d(x: np.ndarray, periods: int) -> np.ndarray:
+    out = np.full(x.shape, np.nan)
+    if periods < x.shape[0]:
+        out[periods:] = x[periods:] / x[:-periods] - 1.0
+    return out
+
+
+def _own_rows_order(valid: np.ndarray) -> Optional[np.ndarray]:
+    """
+    Per-column row order that lifts each column's valid rows to the top, keeping
+    their order, or None when no column has a gap between its first and last valid row.
+    """
+    n = valid.shape[0]
+    count = valid.sum(axis=0)
+    first = valid.argmax(axis=0)
+    last = n - 1 - valid[::-1].argmax(axis=0)
+    if ((count == 0) | (last - first + 1 == count)).all():
+        return None
+    return np.argsort(~valid, axis=0, kind='stable')
+
+
+def _restore_rows(compact: np.ndarray, order: np.ndarray, valid: np.ndarray) -> np.ndarray:
+    """Inverse of compacting with `_own_rows_order`; rows the column never traded are NaN."""
+    out = np.empty_like(compact)
+    np.put_along_axis(out, order, compact, axis=0)
+    out[~valid] = np.nan
+    return out
+
+
+def compute_panel_features(
+    ohlcv_data: Union[Dict[str, pd.DataFrame], PricePanel],
+    tickers: List[str] = None,
+    vix_ticker: str = '^VIX',
+    layout: str = 'wide',
+    macro_data: MacroInput = None,
+    bar_freq: str = None,
+) -> pd.DataFrame:
+    """
+    Compute the `compute_features` feature set for every ticker at once.
+
+    Close prices are aligned into one dates x tickers matrix and each feature
+    is a handful of column-wise NumPy operations over it (cumulative sums
+    for rolling windows, shifted slices for momentum), so cost grows with
+    array size rather than with a Python loop per ticker. Windows count each
+    ticker's own bars: a ticker with a gap inside the union calendar (a halt,
+    a listing gap) has its rows compacted before the rolling pass and
+    scattered back after, so the gap dates are NaN rather than part of a window.
+
+    Args:
+        ohlcv_data: {ticker: OHLCV DataFrame} or a PricePanel (e.g. `fetch_price_panel()`).
+        tickers: Tickers to compute. Defaults to everything except `vix_ticker`.
+        vix_ticker: Attached as shared `vix_close` (forward-filled) and `vix_percentile_252d` columns.
+        layout: 'wide' -> columns MultiIndex (feature, ticker), NaN during warmup;
+            'long' -> index (Date, ticker), one column per feature, rows with
+            NaNs dropped as in `compute_features`.
+        macro_data: Optional FRED data, joined as shared per-date columns.
+        bar_freq: Bar size for annualising volatility; inferred from the dates if None.
+
+    Returns:
+        pd.DataFrame in the requested layout. Per-ticker values equal
+        `compute_features` on that ticker alone (within float tolerance).
+    """
+    if layout not in ('wide', 'long'):
+        raise ValueError(f"layout must be 'wide' or 'long', got {layout!r}")
+
+    if isinstance(ohlcv_data, PricePanel):
+        panel = ohlcv_data
+        if tickers is None:
+            tickers = [t for t in panel.tickers if t != vix_ticker]
+        close_df = panel.frame('Close', tickers)
+        vix_close = panel.frame('Close', [vix_ticker])[vix_ticker] if vix_ticker in panel.tickers else None
+    else:
+        if tickers is None:
+            tickers = [t for t in ohlcv_data if t != vix_ticker]
+        frames = {t: ohlcv_data[t] if is_canonical_ohlcv(ohlcv_data[t])
+                  else pd.DataFrame({'Close': _find_field_series(ohlcv_data[t], 'Close')})
+                  for t in tickers if ohlcv_data.get(t) is not None and not ohlcv_data[t].empty}
+        panel = build_panel(frames, tickers=tickers, fields=('Close',))
+        tickers = panel.tickers
+        close_df = panel.frame('Close')
+        vix_close = None
+        if vix_ticker in ohlcv_data and ohlcv_data[vix_ticker] is not None and not ohlcv_data[vix_ticker].empty:
+            vix_close = _find_field_series(ohlcv_data[vix_ticker], 'Close')
+
+    dates = close_df.index
+    close = close_df.to_numpy(dtype='float64')
+    ann = annualization_factor(bar_freq, dates)
+    valid = np.isfinite(close)
+    order = _own_rows_order(valid)
+    if order is not None:
+        close = np.take_along_axis(close, order, axis=0)
+
+    # Shared intermediates: prefix sums of prices, chunk-local moments of returns
+    returns = _pct_change_2d(close, 1)
+    close_prefix = _prefix_sums_2d(close)
+    ret_moments = _LocalMoments(returns)
+    sma_63 = _rolling_mean_2d(close_prefix, 63)
+    arrays = {
+        'volatility_21d': ret_moments.std(21) * ann,
+        'volatility_63d': ret_moments.std(63) * ann,
+        'momentum_21d': _pct_change_2d(close, 21),
+        'momentum_63d': _pct_change_2d(close, 63),
+        'momentum_252d': _pct_change_2d(close, 252),
+        'sma_21': _rolling_mean_2d(close_prefix, 21),
+        'sma_63': sma_63,
+        'price_vs_sma63': close / sma_63 - 1,
+    }
+    if order is not None:
+        arrays = {name: _restore_rows(arr, order, valid) for name, arr in arrays.items()}
+
+    shared = {}
+    if vix_close is not None:
+        shared['vix_close'] = vix_close.reindex(dates).ffill().to_numpy(dtype='float64')
+        shared['vix_percentile_252d'] = rolling_rank(shared['vix_close'], 252)
+    if macro_data is not None:
+        macro = align_macro(macro_data, dates)
+        shared.update({c: macro[c].to_numpy() for c in macro.columns})
+
+    n_dates, n_tickers = close.shape
+    if layout == 'wide':
+        blocks = dict(arrays)
+        blocks.update({name: np.repeat(col[:, None], n_tickers, axis=1) for name, col in shared.items()})
+        columns = pd.MultiIndex.from_product([list(blocks), tickers], names=['feature', 'ticker'])
+        return pd.DataFrame(np.concatenate(list(blocks.values()), axis=1), index=dates, columns=columns)
+
+    # Long layout: ticker-major rows, as if each ticker's frame were stacked.
+    data = {name: arr.T.ravel() for name, arr in arrays.items()}
+    data.update({name: np.tile(col, n_tickers) for name, col in shared.items()})
+    index = pd.MultiIndex.from_arrays(
+        [np.tile(dates.values, n_tickers), np.repeat(np.asarray(tickers, dtype=object), n_dates)],
+        names=['Date', 'ticker'],
+    )
+    return pd.DataFrame(data, index=index).dropna()
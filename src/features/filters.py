@@ -0,0 +1,252 @@
+"""
+src/features/filters.py
+
+Recursive (IIR) filters with time-varying coefficients, vectorised across columns.
+
+Every filter here is one of two recurrences, evaluated for all columns (tickers
+and/or parameter values) at once:
+
+- Linear:   y[t] = y[t-1] + alpha[t] * (x[t] - y[t-1])
+  EMA (constant alpha), Wilder smoothing (alpha = 1/n, SMA seed) and KAMA
+  (alpha from the efficiency ratio) are all this recurrence
+- Ratchet:  a trailing stop that only moves in the trade's favour and resets
+  once price crosses it
+
+With numba (installed alongside vectorbt) each recurrence is a compiled loop;
+without it the NumPy fallback steps through time with whole-row operations,
+so a 500-ticker panel costs one loop over bars rather than one per ticker.
+
+Inputs may be a Series, a DataFrame or a 1D / 2D array (rows are bars) and
+results keep the input's type. A NaN input bar carries the previous value.
+
+Usage:
+    from src.features.filters import ema, kama, trailing_stop
+    fast = ema(close, span=21)
+    grid = kama(close, n=[10, 20, 30, 40])      # one column per n
+    stop = trailing_stop(close, 3 * atr)
+"""
+
+import logging
+from typing import Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from src.features.kernels import _as_2d
+
+try:
+    import numba  # type: ignore
+except Exception:  # pragma: no cover
+    numba = None
+
+logger = logging.getLogger(__name__)
+
+ArrayLike = Union[np.ndarray, pd.Series, pd.DataFrame]
+
+
+# --- Kernels (compiled when numba is available) ---
+
+def _linear_filter_kernel(x, alpha, seed, start):
+    """y = y + alpha * (x - y) per column from row start[j], seeded with seed[j]; NaN x carries y."""
+    n, m = x.shape
+    out = np.full((n, m), np.nan)
+    for j in range(m):
+        s = start[j]
+        if s < 0 or s >= n:
+            continue
+        y = seed[j]
+        out[s, j] = y
+        for i in range(s + 1, n):
+            xi = x[i, j]
+            if xi == xi:
+                y = y + alpha[i, j] * (xi - y)
+            out[i, j] = y
+    return out
+
+
+def _trailing_stop_kernel(x, distance, direction):
+    """Ratchet stop per column: follows price at `distance`, never loosens, resets when crossed."""
+    n, m = x.shape
+    out = np.full((n, m), np.nan)
+    for j in range(m):
+        stop = np.nan
+        for i in range(n):
+            xi = x[i, j]
+            d = distance[i, j]
+            if xi != xi or d != d:
+                out[i, j] = stop
+                continue
+            candidate = xi - direction * d
+            if stop != stop or direction * (xi - stop) < 0:
+                stop = candidate
+            elif direction * (candidate - stop) > 0:
+                stop = candidate
+            out[i, j] = stop
+    return out
+
+
+if numba is not None:  # pragma: no cover - exercised only where numba is installed
+    _linear_filter_compiled = numba.njit(cache=True)(_linear_filter_kernel)
+    _trailing_stop_compiled = numba.njit(cache=True)(_trailing_stop_kernel)
+
+
+def _linear_filter_numpy(x, alpha, seed, start):
+    n, m = x.shape
+    out = np.full((n, m), np.nan)
+    y = np.full(m, np.nan)
+    for i in range(n):
+        step = y + alpha[i] * (x[i] - y)
+        y = np.where(np.isnan(x[i]), y, step)
+        seeding = start == i
+        if seeding.any():
+            y = np.where(seeding, seed, y)
+        out[i] = np.where(i >= start, y, np.nan)
+    return out
+
+
+def _trailing_stop_numpy(x, distance, direction):
+    n, m = x.shape
+    out = np.full((n, m), np.nan)
+    stop = np.full(m, np.nan)
+    for i in range(n):
+        xi, d = x[i], distance[i]
+        valid = ~(np.isnan(xi) | np.isnan(d))
+        candidate = xi - direction * d
+        reset = np.isnan(stop) | (direction * (xi - stop) < 0)
+        tighten = direction * (candidate - stop) > 0
+        stop = np.where(valid & (reset | tighten), candidate, stop)
+        out[i] = stop
+    return out
+
+
+# --- Public filters ---
+
+def _broadcast(values, shape) -> np.ndarray:
+    """Scalar, per-bar vector or (rows, cols) matrix -> contiguous float64 (rows, cols)."""
+    if np.ndim(values) == 0:
+        return np.full(shape, float(values))
+    arr = values.to_numpy(dtype='float64') if isinstance(values, (pd.Series, pd.DataFrame)) else np.asarray(values, dtype='float64')
+    if arr.ndim == 1:
+        arr = arr[:, None]
+    return np.ascontiguousarray(np.broadcast_to(arr, shape))
+
+
+def recursive_filter(x: ArrayLike, alpha, start=None, seed=None) -> ArrayLike:
+    """
+    Runs y[t] = y[t-1] + alpha[t] * (x[t] - y[t-1]) down every column.
+
+    Args:
+        x: Input series / panel.
+        alpha: Scalar, per-bar vector or per-cell matrix of smoothing weights.
+        start: Row (scalar or per column) where each column's filter starts;
+            defaults to the first non-NaN row. Earlier rows are NaN.
+        seed: Value at `start` (scalar or per column); defaults to x[start].
+    """
+    arr, restore = _as_2d(x)
+    n, m = arr.shape
+    alpha = _broadcast(alpha, (n, m))
+
+    if start is None:
+        valid = ~np.isnan(arr)
+        start = np.where(valid.any(axis=0), valid.argmax(axis=0), -1)
+    start = np.broadcast_to(np.asarray(start, dtype=np.int64), (m,)).copy()
+    if seed is None:
+        rows = np.clip(start, 0, max(n - 1, 0))
+        seed = arr[rows, np.arange(m)] if n else np.full(m, np.nan)
+    seed = np.broadcast_to(np.asarray(seed, dtype='float64'), (m,)).copy()
+
+    if numba is not None:
+        out = _linear_filter_compiled(np.ascontiguousarray(arr), alpha, seed, start)
+    else:
+        out = _linear_filter_numpy(arr, alpha, seed, start)
+    return restore(out)
+
+
+def ema(x: ArrayLike, span: float = None, alpha: float = None) -> ArrayLike:
+    """Exponential moving average; equals pandas `ewm(span=..., adjust=False).mean()` on gap-free data."""
+    if (span is None) == (alpha is None):
+        raise ValueError("Pass exactly one of span or alpha")
+    return recursive_filter(x, 2.0 / (span + 1.0) if alpha is None else alpha)
+
+
+def wilder(x: ArrayLike, n: int) -> ArrayLike:
+    """Wilder smoothing (RSI / ATR): seeded with the SMA of the first n bars, then alpha = 1/n."""
+    arr, restore = _as_2d(x)
+    valid = ~np.isnan(arr)
+    first = np.where(valid.any(axis=0), valid.argmax(axis=0), arr.shape[0])
+    start = first + n - 1
+    seed = np.array([arr[f:f + n, j].mean() if s < arr.shape[0] else np.nan
+                     for j, (f, s) in enumerate(zip(first, start))])
+    start = np.where(start < arr.shape[0], start, -1)
+    return restore(recursive_filter(arr, 1.0 / n, start=start, seed=seed))
+
+
+def kama(price: ArrayLike, n: Union[int, Sequence[int]] = 10, fast: int = 2, slow: int = 30) -> ArrayLike:
+    """
+    Kaufman Adaptive Moving Average.
+
+    alpha[t] = (ER[t] * (2/(fast+1) - 2/(slow+1)) + 2/(slow+1))^2 with the
+    efficiency ratio ER = |p[t] - p[t-n]| / sum(|p[i] - p[i-1]|, n bars);
+    seeded with the price at bar n-1.
+
+    Args:
+        n: Efficiency-ratio window, or a list of windows evaluated in one pass.
+            For a list, a Series input returns one column per n and a
+            DataFrame input returns columns (n, ticker).
+    """
+    grid = isinstance(n, (list, tuple, np.ndarray))
+    windows = [int(w) for w in (n if grid else [n])]
+    if min(windows) < 1:
+        raise ValueError(f"n must be >= 1, got {windows}")
+    arr, restore = _as_2d(price)
+    rows, m = arr.shape
+    fast_sc, slow_sc = 2.0 / (fast + 1.0), 2.0 / (slow + 1.0)
+
+    abs_diff = np.full(arr.shape, np.nan)
+    abs_diff[1:] = np.abs(np.diff(arr, axis=0))
+    csum = np.nancumsum(abs_diff, axis=0)
+
+    alphas, starts, seeds = [], [], []
+    for w in windows:
+        change = np.full(arr.shape, np.nan)
+        change[w:] = np.abs(arr[w:] - arr[:-w])
+        noise = np.full(arr.shape, np.nan)
+        noise[w:] = csum[w:] - csum[:-w]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            er = np.nan_to_num(change / noise, nan=0.0, posinf=0.0)
+        alphas.append((er * (fast_sc - slow_sc) + slow_sc) ** 2)
+        start = w - 1 if w - 1 < rows else -1
+        starts.append(np.full(m, start))
+        seeds.append(arr[start] if start >= 0 else np.full(m, np.nan))
+
+    out = recursive_filter(np.tile(arr, len(windows)), np.hstack(alphas),
+                           start=np.concatenate(starts), seed=np.concatenate(seeds))
+
+    if not grid:
+        return restore(out)
+    index = price.index if isinstance(price, (pd.Series, pd.DataFrame)) else None
+    if isinstance(price, pd.Series):
+        return pd.DataFrame(out, index=index, columns=pd.Index(windows, name='n'))
+    if isinstance(price, pd.DataFrame):
+        columns = pd.MultiIndex.from_product([windows, list(price.columns)], names=['n', 'ticker'])
+        return pd.DataFrame(out, index=index, columns=columns)
+    return out.reshape(rows, len(windows), m)
+
+
+def trailing_stop(price: ArrayLike, distance, direction: str = 'long') -> ArrayLike:
+    """
+    Adaptive trailing stop at `distance` (scalar, per-bar or per-cell, e.g. k * ATR) from price.
+
+    A long stop only rises while price stays above it; once price closes
+    below it the stop resets to price - distance (mirror image for 'short').
+    """
+    if direction not in ('long', 'short'):
+        raise ValueError(f"direction must be 'long' or 'short', got {direction!r}")
+    sign = 1.0 if direction == 'long' else -1.0
+    arr, restore = _as_2d(price)
+    dist = _broadcast(distance, arr.shape)
+    if numba is not None:
+        out = _trailing_stop_compiled(np.ascontiguousarray(arr), dist, sign)
+    else:
+        out = _trailing_stop_numpy(arr, dist, sign)
+    return restore(out)
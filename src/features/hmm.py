@@ -0,0 +1,413 @@
+"""
+src/features/hmm.py
+
+Probabilistic regime model: Gaussian hidden Markov model over the feature frame.
+
+- Batch fit: Baum-Welch in NumPy, vectorised over states and feature
+  dimensions. Emission densities are evaluated in log space and rescaled
+  per bar; the forward / backward recursions renormalise every bar and
+  carry the scale factors as logs, which is exact and never underflows
+  while costing one K x K product per bar instead of a logsumexp. The bar
+  loop is compiled when numba is available
+- Diagonal Gaussian emissions on standardised `HMM_FEATURES`; states are
+  named after their mean volatility and momentum with the labels of
+  `src.features.regime.REGIME_LABELS`, so the output drops in wherever
+  `detect_regime` is used (`detect_regime(features_df, model=hmm)`)
+- Live use: `OnlineRegimeFilter.update(row)` advances the forward filter by
+  one bar in O(K^2 + K * D) and returns regime probabilities; nothing is
+  refitted. A fitted model is persisted as JSON (`get_regime_model`), and
+  `current_regime` keeps the filter state next to it, so each run only
+  advances the filter over the bars it has not seen yet
+
+Usage:
+    from src.features.hmm import GaussianHMM
+    hmm = GaussianHMM(n_states=3).fit(features_df)
+    hmm.regime_probabilities(features_df).iloc[-1]   # causal (filtered) probabilities
+    live = hmm.online(features_df)
+    probs = live.update(new_feature_row)
+"""
+
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+from typing import List, Mapping, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from src.features.regime import REGIME_LABELS, detect_regime
+from src.utils.config import config
+
+try:
+    import numba  # type: ignore
+except Exception:  # pragma: no cover
+    numba = None
+
+logger = logging.getLogger(__name__)
+
+HMM_FEATURES = ['momentum_21d', 'volatility_21d']
+TREND_THRESHOLD = 0.02   # |mean 21-day momentum| above this makes a state Bull / Bear
+MIN_VARIANCE = 1e-3      # floor on standardised emission variances
+STICKY_INIT = 0.95       # initial probability of staying in a state
+
+_DEFAULT_REGIME_CONFIG = {'model': 'rules', 'hmm': {'n_states': 3, 'path': 'models/regime_hmm.json'}}
+_LOG_2PI = np.log(2.0 * np.pi)
+
+
+def _forward_kernel(b, trans, start):
+    """Scaled forward pass: normalised filtered probabilities and log scale factors per bar."""
+    n, k = b.shape
+    alpha = np.empty((n, k))
+    log_c = np.empty(n)
+    a = start * b[0]
+    c = a.sum()
+    alpha[0] = a / c
+    log_c[0] = np.log(c)
+    for t in range(1, n):
+        a = (alpha[t - 1] @ trans) * b[t]
+        c = a.sum()
+        alpha[t] = a / c
+        log_c[t] = np.log(c)
+    return alpha, log_c
+
+
+def _backward_kernel(b, trans, log_c):
+    """Scaled backward pass matching `_forward_kernel`'s scale factors."""
+    n, k = b.shape
+    beta = np.ones((n, k))
+    for t in range(n - 2, -1, -1):
+        beta[t] = (trans @ (b[t + 1] * beta[t + 1])) / np.exp(log_c[t + 1])
+    return beta
+
+
+if numba is not None:  # pragma: no cover - exercised only where numba is installed
+    _forward_kernel = numba.njit(cache=True)(_forward_kernel)
+    _backward_kernel = numba.njit(cache=True)(_backward_kernel)
+
+
+class GaussianHMM:
+    """
+    K-state HMM with diagonal Gaussian emissions.
+
+    Attributes (after fit):
+        start_prob, trans_prob: (K,) initial and (K, K) transition probabilities.
+        means, variances: (K, D) emission parameters in standardised units.
+        loc, scale: (D,) standardisation of the input columns.
+        state_labels: Regime label of each state.
+    """
+
+    def __init__(self, n_states: int = 3, columns: Sequence[str] = HMM_FEATURES,
+                 n_iter: int = 100, tol: float = 1e-4):
+        if n_states < 2:
+            raise ValueError(f"n_states must be >= 2, got {n_states}")
+        self.n_states = int(n_states)
+        self.columns = list(columns)
+        self.n_iter = int(n_iter)
+        self.tol = float(tol)
+        self.log_likelihood: Optional[float] = None
+
+    # --- Observations ---
+
+    def _observations(self, features_df: pd.DataFrame) -> np.ndarray:
+        missing = [c for c in self.columns if c not in features_df.columns]
+        if missing:
+            raise KeyError(f"Features missing columns {missing} required by the regime HMM")
+        values = features_df[self.columns].to_numpy(dtype='float64')
+        return (values - self.loc) / self.scale
+
+    def _log_emissions(self, x: np.ndarray) -> np.ndarray:
+        """(T, K) log densities; bars with any missing feature are uninformative (0)."""
+        diff = x[:, None, :] - self.means[None, :, :]
+        log_b = -0.5 * np.sum(diff * diff / self.variances + np.log(self.variances) + _LOG_2PI, axis=2)
+        return np.where(np.isnan(x).any(axis=1, keepdims=True), 0.0, log_b)
+
+    # --- Forward-backward ---
+
+    def _scaled_emissions(self, x: np.ndarray):
+        """Emission likelihoods rescaled per bar by exp(-max log density), plus those log offsets."""
+        log_b = self._log_emissions(x)
+        offset = log_b.max(axis=1)
+        return np.exp(log_b - offset[:, None]), offset
+
+    def _forward_backward(self, x: np.ndarray, backward: bool = True):
+        """(filtered, smoothed or None, xi summed over t or None, log-likelihood)."""
+        b, offset = self._scaled_emissions(x)
+        alpha, log_c = _forward_kernel(b, self.trans_prob, self.start_prob)
+        ll = float(log_c.sum() + offset.sum())
+        if not backward:
+            return alpha, None, None, ll
+        beta = _backward_kernel(b, self.trans_prob, log_c)
+        gamma = alpha * beta
+        scaled_next = b[1:] * beta[1:] / np.exp(log_c[1:])[:, None]
+        xi = (alpha[:-1].T @ scaled_next) * self.trans_prob
+        return alpha, gamma, xi, ll
+
+    def _initialise(self, x: np.ndarray) -> None:
+        k = self.n_states
+        # Seed states with volatility quantile buckets (last column by default), the dominant regime axis
+        order = np.argsort(x[:, -1], kind='stable')
+        buckets = np.array_split(order, k)
+        self.means = np.array([x[b].mean(axis=0) for b in buckets])
+        self.variances = np.tile(np.maximum(x.var(axis=0), MIN_VARIANCE), (k, 1))
+        self.start_prob = np.full(k, 1.0 / k)
+        self.trans_prob = np.full((k, k), (1.0 - STICKY_INIT) / (k - 1))
+        np.fill_diagonal(self.trans_prob, STICKY_INIT)
+
+    def fit(self, features_df: pd.DataFrame) -> "GaussianHMM":
+        """Baum-Welch on the rows of `features_df` with all HMM columns present."""
+        missing = [c for c in self.columns if c not in features_df.columns]
+        if missing:
+            raise KeyError(f"Features missing columns {missing} required by the regime HMM")
+        raw = features_df[self.columns].dropna().to_numpy(dtype='float64')
+        if len(raw) < 10 * self.n_states:
+            raise ValueError(f"Need at least {10 * self.n_states} complete rows to fit, got {len(raw)}")
+        self.loc = raw.mean(axis=0)
+        self.scale = np.where(raw.std(axis=0) > 0, raw.std(axis=0), 1.0)
+        x = (raw - self.loc) / self.scale
+        self._initialise(x)
+
+        previous = -np.inf
+        for iteration in range(self.n_iter):
+            _, gamma, xi, ll = self._forward_backward(x)
+
+            weight = gamma.sum(axis=0)
+            self.start_prob = np.maximum(gamma[0], 1e-12)
+            self.start_prob /= self.start_prob.sum()
+            self.trans_prob = np.maximum(xi, 1e-12)
+            self.trans_prob /= self.trans_prob.sum(axis=1, keepdims=True)
+            self.means = gamma.T @ x / weight[:, None]
+            self.variances = np.maximum(gamma.T @ (x * x) / weight[:, None] - self.means ** 2, MIN_VARIANCE)
+
+            if ll - previous < self.tol:
+                break
+            previous = ll
+        self.log_likelihood = ll
+        logger.info("Regime HMM fitted: %d states, %d iterations, log-likelihood %.2f",
+                    self.n_states, iteration + 1, ll)
+        self.state_labels = self._name_states()
+        return self
+
+    def _name_states(self) -> List[str]:
+        raw_means = self.means * self.scale + self.loc
+        mom = raw_means[:, self.columns.index('momentum_21d')] if 'momentum_21d' in self.columns else np.zeros(self.n_states)
+        vol_col = next((c for c in self.columns if c.startswith('volatility')), self.columns[-1])
+        vol_rank = np.argsort(np.argsort(raw_means[:, self.columns.index(vol_col)]))
+        labels = []
+        for k in range(self.n_states):
+            bull, bear = mom[k] > TREND_THRESHOLD, mom[k] < -TREND_THRESHOLD
+            if vol_rank[k] == self.n_states - 1:
+                labels.append("Crisis-Bear" if bear else "HighVol-Uncertain")
+            elif vol_rank[k] == 0:
+                labels.append("LowVol-Bull" if bull else "LowVol-MeanRevert")
+            else:
+                labels.append("MidVol-Bull" if bull else "MidVol-Bear" if bear else "MidVol-MeanRevert")
+        return labels
+
+    # --- Inference ---
+
+    def _check_fitted(self) -> None:
+        if not hasattr(self, 'trans_prob') or not hasattr(self, 'state_labels'):
+            raise RuntimeError("GaussianHMM is not fitted; call fit() or load()")
+
+    def filter(self, features_df: pd.DataFrame) -> pd.DataFrame:
+        """Causal state probabilities P(state_t | bars <= t), one column per state."""
+        self._check_fitted()
+        if features_df.empty:
+            return pd.DataFrame(columns=range(self.n_states), dtype='float64')
+        alpha, _, _, _ = self._forward_backward(self._observations(features_df), backward=False)
+        return pd.DataFrame(alpha, index=features_df.index, columns=range(self.n_states))
+
+    def smooth(self, features_df: pd.DataFrame) -> pd.DataFrame:
+        """Smoothed probabilities P(state_t | all bars); uses the future, so for analysis only."""
+        self._check_fitted()
+        _, gamma, _, _ = self._forward_backward(self._observations(features_df))
+        return pd.DataFrame(gamma, index=features_df.index, columns=range(self.n_states))
+
+    def _label_matrix(self):
+        """(labels, (K, L) one-hot map from states to their regime label)."""
+        labels = [l for l in REGIME_LABELS if l in self.state_labels]
+        onehot = np.array([[s == l for l in labels] for s in self.state_labels], dtype='float64')
+        return labels, onehot
+
+    def _by_label(self, state_probs: pd.DataFrame) -> pd.DataFrame:
+        labels, onehot = self._label_matrix()
+        return pd.DataFrame(state_probs.to_numpy() @ onehot, index=state_probs.index, columns=labels)
+
+    def regime_probabilities(self, features_df: pd.DataFrame) -> pd.DataFrame:
+        """Filtered probabilities summed per regime label."""
+        return self._by_label(self.filter(features_df))
+
+    def label_regimes(self, features_df: pd.DataFrame) -> pd.Series:
+        """Most probable (filtered) regime per bar, as a categorical like `regime.label_regimes`."""
+        probs = self.regime_probabilities(features_df)
+        labels = probs.idxmax(axis=1) if not probs.empty else pd.Series(dtype=object)
+        return pd.Series(pd.Categorical(labels, categories=REGIME_LABELS), index=features_df.index, name='regime')
+
+    def detect(self, features_df: pd.DataFrame) -> str:
+        if features_df.empty:
+            return "Unknown"
+        return str(self.label_regimes(features_df).iloc[-1])
+
+    def online(self, features_df: Optional[pd.DataFrame] = None) -> "OnlineRegimeFilter":
+        """Streaming filter, warmed up on `features_df` (one forward pass, no refit)."""
+        self._check_fitted()
+        state, timestamp = None, None
+        if features_df is not None and not features_df.empty:
+            state = self.filter(features_df).to_numpy()[-1]
+            timestamp = features_df.index[-1]
+        return OnlineRegimeFilter(self, state, timestamp)
+
+    # --- Persistence ---
+
+    def to_dict(self) -> dict:
+        self._check_fitted()
+        return {
+            'n_states': self.n_states, 'columns': self.columns,
+            'start_prob': self.start_prob.tolist(), 'trans_prob': self.trans_prob.tolist(),
+            'means': self.means.tolist(), 'variances': self.variances.tolist(),
+            'loc': self.loc.tolist(), 'scale': self.scale.tolist(),
+            'state_labels': self.state_labels, 'log_likelihood': self.log_likelihood,
+        }
+
+    @classmethod
+    def from_dict(cls, payload: dict) -> "GaussianHMM":
+        model = cls(payload['n_states'], payload['columns'])
+        for name in ('start_prob', 'trans_prob', 'means', 'variances', 'loc', 'scale'):
+            setattr(model, name, np.asarray(payload[name], dtype='float64'))
+        model.state_labels = list(payload['state_labels'])
+        model.log_likelihood = payload.get('log_likelihood')
+        return model
+
+    def save(self, path: Union[str, Path]) -> None:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(self.to_dict(), indent=2))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "GaussianHMM":
+        return cls.from_dict(json.loads(Path(path).read_text()))
+
+    def digest(self) -> str:
+        """Short hash of the fitted parameters, tying persisted filter state to this model."""
+        return hashlib.sha256(json.dumps(self.to_dict(), sort_keys=True).encode()).hexdigest()[:16]
+
+
+class OnlineRegimeFilter:
+    """Forward filter state of a fitted GaussianHMM, advanced one bar at a time."""
+
+    def __init__(self, model: GaussianHMM, state_probs: Optional[np.ndarray] = None, timestamp=None):
+        self.model = model
+        self.labels, self._onehot = model._label_matrix()
+        self._probs = None if state_probs is None else np.asarray(state_probs, dtype='float64')
+        self.timestamp = timestamp  # last bar filtered
+
+    def update(self, row: Union[pd.Series, Mapping[str, float]], timestamp=None) -> pd.Series:
+        """Adds one bar of features (missing values = prediction step only); returns regime probabilities."""
+        x = np.array([[float(row.get(c, np.nan)) for c in self.model.columns]])
+        b, _ = self.model._scaled_emissions((x - self.model.loc) / self.model.scale)
+        prior = self.model.start_prob if self._probs is None else self._probs @ self.model.trans_prob
+        post = prior * b[0]
+        # Renormalised every bar, so the state never underflows however long the stream runs
+        self._probs = post / post.sum()
+        self.timestamp = timestamp if timestamp is not None else getattr(row, 'name', None)
+        return self.probabilities
+
+    @property
+    def state_probabilities(self) -> np.ndarray:
+        return self.model.start_prob.copy() if self._probs is None else self._probs.copy()
+
+    @property
+    def probabilities(self) -> pd.Series:
+        return pd.Series(self.state_probabilities @ self._onehot, index=self.labels, name='probability')
+
+    @property
+    def regime(self) -> str:
+        return self.labels[int(np.argmax(self.state_probabilities @ self._onehot))]
+
+    # --- Persistence ---
+
+    def save(self, path: Union[str, Path]) -> None:
+        payload = {
+            'model': self.model.digest(),
+            'timestamp': None if self.timestamp is None else pd.Timestamp(self.timestamp).isoformat(),
+            'state_probs': None if self._probs is None else self._probs.tolist(),
+        }
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(payload, indent=2))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, model: GaussianHMM, path: Union[str, Path]) -> Optional["OnlineRegimeFilter"]:
+        """Filter state saved for `model`, or None when missing or saved for another fit."""
+        path = Path(path)
+        if not path.exists():
+            return None
+        payload = json.loads(path.read_text())
+        if payload.get('model') != model.digest():
+            return None
+        timestamp = payload.get('timestamp')
+        return cls(model, payload.get('state_probs'), None if timestamp is None else pd.Timestamp(timestamp))
+
+
+def _regime_config() -> dict:
+    merged = {**_DEFAULT_REGIME_CONFIG, **(config.get('regime', {}) or {})}
+    merged['hmm'] = {**_DEFAULT_REGIME_CONFIG['hmm'], **(merged.get('hmm') or {})}
+    return merged
+
+
+def _model_path(cfg: dict, data_path: Optional[Union[str, Path]] = None) -> Path:
+    return Path(data_path or config['data_path']) / cfg['hmm']['path']
+
+
+def get_regime_model(features_df: pd.DataFrame, data_path: Optional[Union[str, Path]] = None) -> Optional[GaussianHMM]:
+    """
+    Regime model selected by `regime.model` in config.yaml.
+
+    Returns None for 'rules' (the VIX / momentum thresholds of detect_regime).
+    For 'hmm', loads the persisted model under `<data_path>/<regime.hmm.path>`
+    or fits it on `features_df` and saves it, so later runs only filter.
+    """
+    cfg = _regime_config()
+    if cfg['model'] == 'rules':
+        return None
+    if cfg['model'] != 'hmm':
+        raise ValueError(f"regime.model must be 'rules' or 'hmm', got {cfg['model']!r}")
+    path = _model_path(cfg, data_path)
+    if path.exists():
+        model = GaussianHMM.load(path)
+        if model.n_states == int(cfg['hmm']['n_states']) and set(model.columns) <= set(features_df.columns):
+            return model
+        logger.info("Persisted regime HMM at %s does not match the config; refitting", path)
+    model = GaussianHMM(n_states=int(cfg['hmm']['n_states'])).fit(features_df)
+    model.save(path)
+    return model
+
+
+def current_regime(features_df: pd.DataFrame, data_path: Optional[Union[str, Path]] = None) -> str:
+    """
+    Regime of the last bar of `features_df` under the configured regime model.
+
+    For 'hmm' the forward filter state is saved next to the model JSON and
+    advanced with `OnlineRegimeFilter.update` over the bars after the last one
+    it saw; the whole history is filtered again only when that bar is no
+    longer in `features_df` or the model was refitted.
+    """
+    model = get_regime_model(features_df, data_path)
+    if model is None or features_df.empty:
+        return detect_regime(features_df, model=model)
+    model_path = _model_path(_regime_config(), data_path)
+    path = model_path.with_name(f"{model_path.stem}.filter.json")
+    live = OnlineRegimeFilter.load(model, path)
+    if live is None or live.timestamp not in features_df.index:
+        live = model.online(features_df)
+    else:
+        for ts, row in features_df.loc[features_df.index > live.timestamp].iterrows():
+            live.update(row, ts)
+    live.save(path)
+    return live.regime
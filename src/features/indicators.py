@@ -0,0 +1,234 @@
+"""
+src/features/indicators.py
+
+Prefix-sum indicator index: one precomputation per price series, any window after that.
+
+- Cumulative sums of close are built once (lazily, per input); a trailing
+  mean is then the difference of two prefix-sum rows, so an SMA at any
+  window length costs one vectorised subtraction instead of a rolling pass.
+  Inputs are centred on their mean and accumulated in extended precision
+  (np.longdouble where the platform has it)
+- Rolling standard deviations (rolling std, z-score, Bollinger bands, return
+  volatility) come from chunk-local, centred prefix sums of x and x^2
+  (`src.features.engine._LocalMoments`): whole-history second moments
+  cancel catastrophically on short windows, chunk-local ones only carry the
+  spread of a few windows. Each chunk size is built once and any window
+  that maps to it costs a few O(n) array operations
+- NaN semantics match pandas `rolling(window)` (no min_periods): a window
+  containing a missing bar is NaN
+- `indicator_index(close)` caches indexes by a digest of the values, the full
+  index and the name / columns, so parameter searches that call strategies
+  repeatedly on the same data share one index. Cached indexes and their
+  memoised per-window results are bounded by `features.indicator_cache_mb`
+
+Usage:
+    from src.features.indicators import indicator_index
+    idx = indicator_index(close)
+    fast, slow = idx.sma(21), idx.sma(63)
+    mid, upper, lower = idx.bollinger(20, num_std=2.0)
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from src.features.engine import _LocalMoments, _prefix_sums_2d, _window_sums_2d
+from src.utils.config import config
+
+PriceInput = Union[pd.Series, pd.DataFrame]
+
+_index_cache: "OrderedDict[str, IndicatorIndex]" = OrderedDict()
+_index_cache_lock = threading.Lock()
+
+
+def _cache_budget() -> int:
+    """Bytes shared by all cached indexes (`features.indicator_cache_mb`, default 256)."""
+    mb = (config.get('features', {}) or {}).get('indicator_cache_mb', 256)
+    return int(mb * 1024 * 1024)
+
+
+class _Means:
+    """Prefix sums of a centred 2D array, for trailing means at any window."""
+
+    def __init__(self, values: np.ndarray):
+        with np.errstate(all='ignore'):
+            center = np.nanmean(values, axis=0) if np.isfinite(values).any() else np.zeros(values.shape[1])
+        self.center = np.nan_to_num(center)
+        # Prefix sums grow with history length; extended precision keeps their differences exact enough
+        self.first = _prefix_sums_2d((values - self.center).astype(np.longdouble))
+
+    @property
+    def nbytes(self) -> int:
+        csum, ccount = self.first
+        return csum.nbytes + (ccount.nbytes if ccount is not None else 0)
+
+    def mean(self, window: int) -> np.ndarray:
+        return _window_sums_2d(self.first, window) / window + self.center
+
+
+class IndicatorIndex:
+    """
+    Window-agnostic moving statistics over one price Series (or one column per ticker).
+
+    Results have the same type, index and columns as the input.
+    """
+
+    def __init__(self, close: PriceInput):
+        self._is_series = isinstance(close, pd.Series)
+        self.index = close.index
+        self.name = close.name if self._is_series else None
+        self.columns = None if self._is_series else close.columns
+        values = np.array(close.to_numpy(dtype='float64'), copy=True)
+        self._values = values.reshape(-1, 1) if self._is_series else values
+        self._means: Optional[_Means] = None
+        self._price_moments: Optional[_LocalMoments] = None
+        self._return_moments: Optional[_LocalMoments] = None
+        self._arrays: "OrderedDict[tuple, np.ndarray]" = OrderedDict()
+        self._arrays_bytes = 0
+        self._lock = threading.Lock()
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the input copy, prefix sums and memoised results."""
+        total = self._values.nbytes + self._arrays_bytes
+        if self._means is not None:
+            total += self._means.nbytes
+        if self._price_moments is not None:
+            total += self._price_moments.nbytes
+        if self._return_moments is not None:
+            total += self._return_moments.nbytes + self._return_moments.values.nbytes
+        return total
+
+    def _wrap(self, arr: np.ndarray) -> PriceInput:
+        if self._is_series:
+            return pd.Series(arr[:, 0], index=self.index, name=self.name)
+        return pd.DataFrame(arr, index=self.index, columns=self.columns)
+
+    def _memo(self, key: tuple, compute) -> np.ndarray:
+        """
+        Per-window results are kept (LRU) since grids revisit the same windows
+        many times; one index keeps at most a quarter of the cache budget.
+        """
+        with self._lock:
+            arr = self._arrays.get(key)
+            if arr is not None:
+                self._arrays.move_to_end(key)
+                return arr
+        arr = compute()
+        arr.flags.writeable = False
+        budget = _cache_budget() // 4
+        with self._lock:
+            if key not in self._arrays:
+                self._arrays[key] = arr
+                self._arrays_bytes += arr.nbytes
+            while self._arrays_bytes > budget and self._arrays:
+                _, evicted = self._arrays.popitem(last=False)
+                self._arrays_bytes -= evicted.nbytes
+        return arr
+
+    def _mean(self, window: int) -> np.ndarray:
+        return self._memo(('mean', window), lambda: self._price_means().mean(window))
+
+    def _std(self, window: int, ddof: int = 1) -> np.ndarray:
+        return self._memo(('std', window, ddof), lambda: self._price_spread().std(window, ddof))
+
+    def _price_means(self) -> _Means:
+        with self._lock:
+            if self._means is None:
+                self._means = _Means(self._values)
+            return self._means
+
+    def _price_spread(self) -> _LocalMoments:
+        with self._lock:
+            if self._price_moments is None:
+                self._price_moments = _LocalMoments(self._values)
+            return self._price_moments
+
+    def _return_spread(self) -> _LocalMoments:
+        with self._lock:
+            if self._return_moments is None:
+                returns = np.full(self._values.shape, np.nan)
+                returns[1:] = self._values[1:] / self._values[:-1] - 1.0
+                self._return_moments = _LocalMoments(returns)
+            return self._return_moments
+
+    @staticmethod
+    def _check(window: int) -> int:
+        window = int(window)
+        if window < 1:
+            raise ValueError(f"window must be >= 1, got {window}")
+        return window
+
+    def sma(self, window: int) -> PriceInput:
+        """Equivalent to `close.rolling(window).mean()`."""
+        return self._wrap(self._mean(self._check(window)))
+
+    def rolling_std(self, window: int, ddof: int = 1) -> PriceInput:
+        """Equivalent to `close.rolling(window).std(ddof=ddof)`."""
+        return self._wrap(self._std(self._check(window), ddof))
+
+    def zscore(self, window: int) -> PriceInput:
+        """(close - SMA) / rolling std over `window` bars."""
+        window = self._check(window)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            z = (self._values - self._mean(window)) / self._std(window)
+        return self._wrap(z)
+
+    def bollinger(self, window: int, num_std: float = 2.0) -> Tuple[PriceInput, PriceInput, PriceInput]:
+        """(middle, upper, lower) Bollinger bands."""
+        window = self._check(window)
+        mid = self._mean(window)
+        width = self._std(window) * num_std
+        return self._wrap(mid), self._wrap(mid + width), self._wrap(mid - width)
+
+    def return_std(self, window: int, ddof: int = 1) -> PriceInput:
+        """Rolling std of bar returns; equivalent to `close.pct_change().rolling(window).std()`."""
+        window = self._check(window)
+        return self._wrap(self._memo(('return_std', window, ddof), lambda: self._return_spread().std(window, ddof)))
+
+
+def _index_bytes(index: pd.Index) -> bytes:
+    if isinstance(index, pd.DatetimeIndex):
+        return index.asi8.tobytes() + str(index.tz).encode()
+    return pd.util.hash_pandas_object(index, index=False).to_numpy().tobytes()
+
+
+def _digest(close: PriceInput) -> str:
+    """Content key: all values, the full index and the name (Series) or columns (DataFrame)."""
+    h = hashlib.blake2b(digest_size=16)
+    h.update(np.ascontiguousarray(close.to_numpy(dtype='float64')).tobytes())
+    h.update(_index_bytes(close.index))
+    labels = close.name if isinstance(close, pd.Series) else list(close.columns)
+    h.update(repr((type(close).__name__, labels)).encode())
+    return h.hexdigest()
+
+
+def indicator_index(close: PriceInput) -> IndicatorIndex:
+    """
+    Shared IndicatorIndex for `close`, reused for identical data across calls.
+
+    Least recently used indexes are dropped once the cached indexes hold more
+    than `features.indicator_cache_mb`; the index just returned is always kept.
+    """
+    key = _digest(close)
+    with _index_cache_lock:
+        idx = _index_cache.get(key)
+        if idx is not None:
+            _index_cache.move_to_end(key)
+        else:
+            idx = _index_cache[key] = IndicatorIndex(close)
+        budget = _cache_budget()
+        total = sum(cached.nbytes for cached in _index_cache.values())
+        while total > budget and len(_index_cache) > 1:
+            _, evicted = _index_cache.popitem(last=False)
+            total -= evicted.nbytes
+    return idx
+
+
+def clear_indicator_cache() -> None:
+    with _index_cache_lock:
+        _index_cache.clear()
@@ -0,0 +1,245 @@
+"""
+src/features/kernels.py
+
+Rolling-window kernels whose cost grows at most logarithmically with the window length.
+
+- rolling_max / rolling_min: O(n) per column regardless of window. The
+  compiled path is a monotonic deque; the NumPy path is the van Herk /
+  Gil-Werman block algorithm (prefix and suffix extrema per block of
+  `window` rows), fully vectorised over 2D panels
+- rolling_rank / rolling_quantile: O(n log n) per column. The compiled path
+  keeps the window in a Fenwick (binary indexed) tree of counts over the
+  column's sorted distinct values, so each insert, delete, rank and k-th
+  smallest lookup is O(log n); without numba pandas' skip-list rolling
+  rank / quantile (O(n log w)) is used
+- numba is optional (it ships with vectorbt); without it the NumPy / pandas
+  paths are used with identical results
+
+All kernels accept a 1D / 2D array, a Series or a DataFrame (columns are
+independent series, rows are bars) and return the same type. As with pandas
+`rolling(window)` without min_periods, a window containing NaN yields NaN.
+
+Usage:
+    from src.features.kernels import rolling_max, rolling_rank
+    high_20 = rolling_max(high, 20)
+    vix_pct = rolling_rank(vix, 252)        # percentile rank in (0, 1]
+"""
+
+import logging
+from typing import Callable, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+try:
+    import numba  # type: ignore
+except Exception:  # pragma: no cover
+    numba = None
+
+logger = logging.getLogger(__name__)
+
+ArrayLike = Union[np.ndarray, pd.Series, pd.DataFrame]
+
+HAVE_NUMBA = numba is not None
+
+
+def _as_2d(x: ArrayLike) -> Tuple[np.ndarray, Callable[[np.ndarray], ArrayLike]]:
+    """float64 (rows, cols) view of `x` plus a function restoring the input's type."""
+    if isinstance(x, pd.Series):
+        return x.to_numpy(dtype='float64').reshape(-1, 1), lambda a: pd.Series(a[:, 0], index=x.index, name=x.name)
+    if isinstance(x, pd.DataFrame):
+        return x.to_numpy(dtype='float64'), lambda a: pd.DataFrame(a, index=x.index, columns=x.columns)
+    arr = np.asarray(x, dtype='float64')
+    if arr.ndim == 1:
+        return arr.reshape(-1, 1), lambda a: a[:, 0]
+    if arr.ndim != 2:
+        raise ValueError(f"Expected a 1D or 2D array, got {arr.ndim}D")
+    return arr, lambda a: a
+
+
+def _check_window(window: int) -> int:
+    window = int(window)
+    if window < 1:
+        raise ValueError(f"window must be >= 1, got {window}")
+    return window
+
+
+def _nan_windows(x: np.ndarray, window: int) -> np.ndarray:
+    """True where the trailing window is incomplete (warmup) or contains NaN."""
+    bad = np.isnan(x)
+    if not bad.any():
+        out = np.zeros(x.shape, dtype=bool)
+        out[:window - 1] = True
+        return out
+    counts = np.cumsum(bad, axis=0)
+    in_window = counts.copy()
+    in_window[window:] -= counts[:-window]
+    out = in_window > 0
+    out[:window - 1] = True
+    return out
+
+
+# --- Compiled kernels (plain Python when numba is missing; used only through numba) ---
+
+def _deque_max_kernel(x, window):
+    """Monotonic-deque rolling max per column; NaNs must be pre-filled with -inf."""
+    n, m = x.shape
+    out = np.empty((n, m))
+    dq = np.empty(n, dtype=np.int64)
+    for j in range(m):
+        head = 0
+        tail = 0
+        for i in range(n):
+            v = x[i, j]
+            # Drop candidates dominated by the new value, then the one that left the window
+            while tail > head and x[dq[tail - 1], j] <= v:
+                tail -= 1
+            dq[tail] = i
+            tail += 1
+            if dq[head] <= i - window:
+                head += 1
+            out[i, j] = x[dq[head], j]
+    return out
+
+
+def _fenwick_rank_kernel(x, window, q, mode):
+    """
+    Order statistics of the trailing window per column from a Fenwick tree of counts.
+
+    Values are replaced by their position among the column's sorted distinct
+    values; the tree counts how many window members sit at each position.
+    mode 0: average-tie rank of the newest value divided by window (pandas pct rank);
+    mode 1: linearly interpolated quantile q. NaN windows are masked by the caller.
+    """
+    n, m = x.shape
+    out = np.full((n, m), np.nan)
+    for j in range(m):
+        col = x[:, j].copy()
+        for i in range(n):
+            if col[i] != col[i]:
+                col[i] = np.inf  # keeps the ordering total; such windows are masked afterwards
+        values = np.unique(col)
+        size = len(values)
+        ranks = np.searchsorted(values, col) + 1  # 1-based tree positions
+        tree = np.zeros(size + 1, dtype=np.int64)
+        top = 1
+        while top * 2 <= size:
+            top *= 2
+        for i in range(n):
+            k = ranks[i]
+            while k <= size:
+                tree[k] += 1
+                k += k & -k
+            if i >= window:
+                k = ranks[i - window]
+                while k <= size:
+                    tree[k] -= 1
+                    k += k & -k
+            if i < window - 1:
+                continue
+            if mode == 0:
+                # Members strictly below the newest value, and up to and including it
+                below = 0
+                k = ranks[i] - 1
+                while k > 0:
+                    below += tree[k]
+                    k -= k & -k
+                upto = 0
+                k = ranks[i]
+                while k > 0:
+                    upto += tree[k]
+                    k -= k & -k
+                out[i, j] = ((below + 1 + upto) / 2.0) / window
+            else:
+                pos = q * (window - 1)
+                f = int(np.floor(pos))
+                c = min(f + 1, window - 1)
+                bounds = np.empty(2)
+                for b in range(2):
+                    # Smallest tree position whose prefix count reaches the (f+1)-th / (c+1)-th member
+                    target = f + 1 + b * (c - f)
+                    at = 0
+                    step = top
+                    while step > 0:
+                        if at + step <= size and tree[at + step] < target:
+                            at += step
+                            target -= tree[at]
+                        step //= 2
+                    bounds[b] = values[at]
+                out[i, j] = bounds[0] + (bounds[1] - bounds[0]) * (pos - f)
+    return out
+
+
+if HAVE_NUMBA:  # pragma: no cover - exercised only where numba is installed
+    _deque_max_compiled = numba.njit(cache=True)(_deque_max_kernel)
+    _fenwick_rank_compiled = numba.njit(cache=True)(_fenwick_rank_kernel)
+
+
+# --- NumPy / pandas paths ---
+
+def _van_herk_max(x: np.ndarray, window: int) -> np.ndarray:
+    """Rolling max along axis 0 via per-block prefix / suffix maxima; NaNs must be pre-filled with -inf."""
+    n, m = x.shape
+    blocks = -(-n // window)
+    padded = np.full((blocks * window, m), -np.inf)
+    padded[:n] = x
+    shaped = padded.reshape(blocks, window, m)
+    prefix = np.maximum.accumulate(shaped, axis=1).reshape(-1, m)
+    suffix = np.maximum.accumulate(shaped[:, ::-1], axis=1)[:, ::-1].reshape(-1, m)
+    out = np.full((n, m), np.nan)
+    if n >= window:
+        # Window [i - window + 1, i] = tail of one block (suffix) + head of the next (prefix)
+        out[window - 1:] = np.maximum(suffix[:n - window + 1], prefix[window - 1:n])
+    return out
+
+
+def _extrema(x: ArrayLike, window: int, sign: float) -> ArrayLike:
+    window = _check_window(window)
+    arr, restore = _as_2d(x)
+    filled = np.where(np.isnan(arr), -np.inf, sign * arr)
+    if HAVE_NUMBA:
+        out = sign * _deque_max_compiled(filled, window)
+    else:
+        out = sign * _van_herk_max(filled, window)
+    out[_nan_windows(arr, window)] = np.nan
+    return restore(out)
+
+
+def rolling_max(x: ArrayLike, window: int) -> ArrayLike:
+    """Equivalent to `rolling(window).max()`, O(n) for any window."""
+    return _extrema(x, window, 1.0)
+
+
+def rolling_min(x: ArrayLike, window: int) -> ArrayLike:
+    """Equivalent to `rolling(window).min()`, O(n) for any window."""
+    return _extrema(x, window, -1.0)
+
+
+def rolling_rank(x: ArrayLike, window: int) -> ArrayLike:
+    """
+    Percentile rank of each value within its trailing window, in (0, 1].
+
+    Equivalent to `rolling(window).rank(pct=True)` (ties share the average rank).
+    """
+    window = _check_window(window)
+    arr, restore = _as_2d(x)
+    if HAVE_NUMBA:
+        out = _fenwick_rank_compiled(np.ascontiguousarray(arr), window, 0.0, 0)
+        out[_nan_windows(arr, window)] = np.nan
+    else:
+        out = pd.DataFrame(arr).rolling(window).rank(pct=True).to_numpy()
+    return restore(out)
+
+
+def rolling_quantile(x: ArrayLike, window: int, q: float) -> ArrayLike:
+    """Equivalent to `rolling(window).quantile(q)` (linear interpolation)."""
+    window = _check_window(window)
+    if not 0.0 <= q <= 1.0:
+        raise ValueError(f"q must be in [0, 1], got {q}")
+    arr, restore = _as_2d(x)
+    if HAVE_NUMBA:
+        out = _fenwick_rank_compiled(np.ascontiguousarray(arr), window, float(q), 1)
+        out[_nan_windows(arr, window)] = np.nan
+    else:
+        out = pd.DataFrame(arr).rolling(window).quantile(q).to_numpy()
+    return restore(out)
@@ -0,0 +1,202 @@
+"""
+src/features/macro.py
+
+Point-in-time alignment of FRED macro series onto the trading calendar.
+
+- Irregular series (daily with holidays, weekly, monthly) are joined onto the
+  bar calendar with one vectorised backward as-of merge, never per-date lookups
+- Observations only become visible `publication_lag_bdays` business days after
+  their observation date, so features never see a value before it was published
+- Derived columns: level changes per series and yield-curve slope / inversion
+- Aligned frames are cached in-process, keyed by content digests of the
+  calendar and the input series
+
+Usage:
+    from src.data.ingest import fetch_fred_data
+    from src.features.engine import compute_features
+    features = compute_features(ohlcv, 'SPY', '^VIX', macro_data=fetch_fred_data())
+"""
+
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+from pandas.tseries.offsets import BDay
+
+from src.utils.config import config
+
+logger = logging.getLogger(__name__)
+
+MacroInput = Union[Dict[str, Union[pd.DataFrame, pd.Series]], pd.DataFrame, None]
+
+_DEFAULT_MACRO_CONFIG = {
+    'publication_lag_bdays': 1,
+    'change_windows': [21, 63],
+}
+
+_CACHE_SIZE = 32
+_aligned_cache: "OrderedDict[tuple, pd.DataFrame]" = OrderedDict()
+_aligned_cache_lock = threading.Lock()
+
+
+def _macro_config() -> dict:
+    merged = dict(_DEFAULT_MACRO_CONFIG)
+    merged.update((config.get('features', {}) or {}).get('macro', {}) or {})
+    return merged
+
+
+def _collect_series(macro_data: MacroInput) -> Dict[str, pd.Series]:
+    """Flattens `fetch_fred_data` output (or a frame / dict of series) into {series_id: clean Series}."""
+    if macro_data is None:
+        return {}
+    if isinstance(macro_data, pd.DataFrame):
+        items = [(c, macro_data[c]) for c in macro_data.columns]
+    else:
+        items = []
+        for sid, obj in macro_data.items():
+            if isinstance(obj, pd.DataFrame):
+                items.extend((c if obj.shape[1] > 1 else sid, obj[c]) for c in obj.columns)
+            elif obj is not None:
+                items.append((sid, obj))
+
+    out = {}
+    for sid, s in items:
+        s = pd.to_numeric(s, errors='coerce').dropna()
+        if s.empty:
+            continue
+        index = pd.DatetimeIndex(s.index)
+        if index.tz is not None:
+            index = index.tz_localize(None)
+        s = pd.Series(s.to_numpy(dtype='float64'), index=index.astype('datetime64[ns]'), name=str(sid))
+        if not s.index.is_monotonic_increasing:
+            s = s.sort_index()
+        out[str(sid)] = s[~s.index.duplicated(keep='last')]
+    return out
+
+
+def _digest(index: pd.DatetimeIndex, values: Optional[np.ndarray] = None) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    h.update(index.asi8.tobytes())
+    if values is not None:
+        h.update(np.ascontiguousarray(values).tobytes())
+    return h.hexdigest()
+
+
+def _published(s: pd.Series, lag: int) -> pd.Series:
+    """
+    `s` indexed by the date each value became public (`lag` business days after observation).
+
+    Observations that land on the same publication date (e.g. a Saturday and a
+    Friday print both become visible on Monday) collapse to the latest one.
+    """
+    if not lag:
+        return s
+    s = s.set_axis(s.index + BDay(lag))
+    return s[~s.index.duplicated(keep='last')]
+
+
+def _add_derived_columns(aligned: pd.DataFrame, series_cols: Sequence[str], change_windows: Sequence[int]) -> None:
+    for col in series_cols:
+        for w in change_windows:
+            aligned[f'{col}_chg_{w}d'] = aligned[col].diff(w)
+
+    slope = None
+    if 't10y2y' in aligned.columns:
+        slope = aligned['t10y2y']
+    elif 'dgs10' in aligned.columns and 'dgs2' in aligned.columns:
+        slope = aligned['dgs10'] - aligned['dgs2']
+    if slope is not None:
+        aligned['yield_curve_slope'] = slope
+        aligned['yield_curve_inverted'] = np.where(slope.isna(), np.nan, (slope < 0).astype(float))
+
+
+def align_macro(
+    macro_data: MacroInput,
+    calendar: pd.DatetimeIndex,
+    publication_lag_bdays: Optional[int] = None,
+    change_windows: Optional[Sequence[int]] = None,
+    use_cache: bool = True,
+) -> pd.DataFrame:
+    """
+    As-of aligns macro series onto `calendar` without look-ahead.
+
+    Args:
+        macro_data: Output of `fetch_fred_data` ({series_id: DataFrame}), a dict
+            of Series, or a DataFrame with one column per series.
+        calendar: Trading calendar to align onto (e.g. the OHLCV index).
+        publication_lag_bdays: Business days between an observation date and
+            the first bar allowed to see it. Defaults to
+            `features.macro.publication_lag_bdays` (1).
+        change_windows: Bars over which level changes are computed. Defaults
+            to `features.macro.change_windows`.
+        use_cache: Reuse a previously aligned frame for identical inputs.
+
+    Returns:
+        pd.DataFrame indexed like `calendar` with one lower-cased column per
+        series (e.g. 'dgs10'), '<series>_chg_<w>d' changes and, when the
+        inputs allow it, 'yield_curve_slope' / 'yield_curve_inverted'.
+        Bars before a series' first published value are NaN.
+    """
+    cfg = _macro_config()
+    lag = int(cfg['publication_lag_bdays'] if publication_lag_bdays is None else publication_lag_bdays)
+    windows = tuple(int(w) for w in (cfg['change_windows'] if change_windows is None else change_windows))
+
+    calendar = pd.DatetimeIndex(calendar)
+    if calendar.tz is not None:
+        calendar = calendar.tz_localize(None)
+    calendar_ns = calendar.astype('datetime64[ns]')
+
+    series = _collect_series(macro_data)
+    if not series:
+        return pd.DataFrame(index=calendar)
+
+    key = None
+    if use_cache:
+        key = (
+            _digest(calendar_ns),
+            tuple((sid, _digest(s.index, s.to_numpy())) for sid, s in sorted(series.items())),
+            lag,
+            windows,
+        )
+        with _aligned_cache_lock:
+            cached = _aligned_cache.get(key)
+            if cached is not None:
+                _aligned_cache.move_to_end(key)
+                return cached.copy()
+
+    # One frame of all observations keyed by the date they became public; ffill carries
+    # each series through the other series' observation dates so a single as-of merge
+    # yields every series' latest published value.
+    observed = pd.concat([_published(s, lag) for s in series.values()], axis=1, sort=True)
+    observed = observed.ffill()
+    observed.columns = [c.lower() for c in observed.columns]
+    observed.index = observed.index.astype('datetime64[ns]').rename('Date')
+
+    aligned = pd.merge_asof(
+        pd.DataFrame({'Date': calendar_ns}),
+        observed.reset_index(),
+        on='Date',
+        direction='backward',
+    )
+    aligned.index = calendar
+    aligned = aligned.drop(columns='Date')
+    _add_derived_columns(aligned, list(observed.columns), windows)
+
+    if key is not None:
+        with _aligned_cache_lock:
+            _aligned_cache[key] = aligned
+            while len(_aligned_cache) > _CACHE_SIZE:
+                _aligned_cache.popitem(last=False)
+        aligned = aligned.copy()
+    logger.debug("Aligned %d macro series onto %d bars", len(series), len(calendar))
+    return aligned
+
+
+def clear_macro_cache() -> None:
+    """Drops all cached aligned frames."""
+    with _aligned_cache_lock:
+        _aligned_cache.clear()
@@ -0,0 +1,373 @@
+"""
+src/features/online.py
+
+Incremental (streaming) version of `compute_features`.
+
+A FeatureState is seeded once from history and then advanced bar by bar
+with `update(bar)`. Every feature is kept in O(1) state per bar:
+
+- Rolling means / standard deviations: ring buffers with sliding-window
+  Welford updates (add the new value and retire the oldest in one step)
+- Non-finite closes are kept as NaN observations, as in the batch engine:
+  every window that contains one is NaN until it slides out
+- Momentum: one ring buffer of the last 253 closes
+- vix_close: last observed value, forward-filled like the batch engine
+- vix_percentile_252d: sorted buffer of the last 252 VIX closes (O(log w)
+  search plus a bounded memmove per bar)
+
+Seeding only replays the last `MAX_LOOKBACK + 1` bars, because no feature
+looks further back; the state's output matches the last row of
+`compute_features` on the full history to float tolerance.
+
+`incremental_features` is the scheduled-run entry point: it keeps the
+previous run's feature rows in the feature store and streams only the bars
+that arrived since through a FeatureState seeded from the last
+`MAX_LOOKBACK + 1` stored bars.
+
+Usage:
+    state = FeatureState.from_history(ohlcv, 'SPY', '^VIX')
+    row = state.update({'Open': ..., 'High': ..., 'Low': ..., 'Close': 412.3, 'Volume': ...},
+                       vix_close=17.2, timestamp=pd.Timestamp('2024-06-03'))
+    features = incremental_features(ohlcv, 'SPY', '^VIX', macro_data=fred)
+"""
+
+import bisect
+import logging
+import math
+from collections import deque
+from typing import Dict, Mapping, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from src.data.schemas import OHLCV_SCHEMA, is_canonical_ohlcv
+from src.features.macro import MacroInput
+from src.utils.frequency import annualization_factor
+
+logger = logging.getLogger(__name__)
+
+VOL_WINDOWS = (21, 63)
+SMA_WINDOWS = (21, 63)
+MOMENTUM_LAGS = (21, 63, 252)
+VIX_RANK_WINDOW = 252
+MAX_LOOKBACK = max(MOMENTUM_LAGS)
+
+
+class RollingWindow:
+    """
+    Fixed-size window with O(1) sliding mean and sample variance.
+
+    Uses the sliding form of Welford's update, which stays accurate over
+    millions of bars where running sum / sum-of-squares would cancel.
+    NaN values occupy a slot but not the moments; like pandas rolling with
+    min_periods=window, the window is NaN while it holds one.
+    """
+
+    __slots__ = ('window', '_buf', '_pos', 'count', 'mean', '_m2', '_nans')
+
+    def __init__(self, window: int):
+        self.window = int(window)
+        self._buf = np.empty(self.window)
+        self._pos = 0
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self._nans = 0
+
+    @property
+    def full(self) -> bool:
+        return self.count == self.window
+
+    def _add(self, x: float) -> None:
+        n = self.count - self._nans  # finite members after the add
+        delta = x - self.mean
+        self.mean += delta / n
+        self._m2 += delta * (x - self.mean)
+
+    def _remove(self, x: float) -> None:
+        n = self.count - self._nans  # finite members after the removal
+        if n == 0:
+            self.mean, self._m2 = 0.0, 0.0
+            return
+        delta = x - self.mean
+        self.mean -= delta / n
+        self._m2 -= delta * (x - self.mean)
+
+    def push(self, x: float) -> None:
+        finite = not math.isnan(x)
+        if self.count < self.window:
+            # Growing phase: plain Welford
+            self.count += 1
+            if finite:
+                self._add(x)
+            else:
+                self._nans += 1
+        else:
+            old = self._buf[self._pos]
+            if finite and not math.isnan(old):
+                old_mean = self.mean
+                self.mean += (x - old) / (self.window - self._nans)
+                self._m2 += (x - old) * (x - self.mean + old - old_mean)
+            elif finite:
+                self._nans -= 1
+                self._add(x)
+            elif not math.isnan(old):
+                self._nans += 1
+                self._remove(old)
+        self._buf[self._pos] = x
+        self._pos = (self._pos + 1) % self.window
+
+    def value_mean(self) -> float:
+        return self.mean if self.full and not self._nans else math.nan
+
+    def value_std(self) -> float:
+        """Sample standard deviation (ddof=1) once the window is full of finite values, else NaN."""
+        if not self.full or self._nans:
+            return math.nan
+        return math.sqrt(max(self._m2, 0.0) / (self.window - 1))
+
+
+class RollingRank:
+    """Percentile rank of the newest value within a fixed window (pandas `rolling(w).rank(pct=True)`)."""
+
+    __slots__ = ('window', '_values', '_sorted', '_nans')
+
+    def __init__(self, window: int):
+        self.window = int(window)
+        self._values = deque()
+        self._sorted = []
+        self._nans = 0
+
+    def push(self, x: float) -> None:
+        if len(self._values) == self.window:
+            old = self._values.popleft()
+            if math.isnan(old):
+                self._nans -= 1
+            else:
+                del self._sorted[bisect.bisect_left(self._sorted, old)]
+        self._values.append(x)
+        if math.isnan(x):
+            self._nans += 1
+        else:
+            bisect.insort(self._sorted, x)
+
+    def value(self) -> float:
+        if len(self._values) < self.window or self._nans:
+            return math.nan
+        x = self._values[-1]
+        lo = bisect.bisect_left(self._sorted, x)
+        hi = bisect.bisect_right(self._sorted, x)
+        return (lo + 1 + hi) / 2.0 / self.window
+
+
+class FeatureState:
+    """
+    Streaming feature state for one reference asset.
+
+    Attributes:
+        timestamp: Timestamp of the last bar applied.
+        bars_seen: Number of bars applied since construction.
+    """
+
+    def __init__(self, bar_freq: str = None, index: Optional[pd.DatetimeIndex] = None):
+        self._ann = annualization_factor(bar_freq, index)
+        self._closes = np.full(MAX_LOOKBACK + 1, np.nan)
+        self._pos = 0
+        self.bars_seen = 0
+        self._vol = {w: RollingWindow(w) for w in VOL_WINDOWS}
+        self._sma = {w: RollingWindow(w) for w in SMA_WINDOWS}
+        self._last_bar: Dict[str, float] = {}
+        self._vix: Optional[float] = None
+        self._vix_rank = RollingRank(VIX_RANK_WINDOW)
+        self._has_vix = False
+        self.timestamp = None
+
+    # --- Construction ---
+
+    @classmethod
+    def from_history(
+        cls,
+        ohlcv_data: Dict[str, pd.DataFrame],
+        ref_asset_ticker: str = 'SPY',
+        vix_ticker: str = '^VIX',
+        bar_freq: str = None,
+    ) -> "FeatureState":
+        """Seeds a state from stored history, replaying only the bars the features can still see."""
+        from src.features.engine import _find_field_series
+
+        raw = ohlcv_data.get(ref_asset_ticker)
+        if raw is None or raw.empty:
+            raise ValueError(f"Reference asset '{ref_asset_ticker}' not found in OHLCV data.")
+        frame = raw if is_canonical_ohlcv(raw) else pd.DataFrame({'Close': _find_field_series(raw, 'Close')})
+        tail = frame.iloc[-(MAX_LOOKBACK + 1):]
+
+        vix = None
+        vix_raw = ohlcv_data.get(vix_ticker)
+        if vix_raw is not None and not vix_raw.empty:
+            vix_close = vix_raw['Close'] if is_canonical_ohlcv(vix_raw) else _find_field_series(vix_raw, 'Close')
+            vix = vix_close.reindex(frame.index).ffill().iloc[-len(tail):]
+
+        state = cls(bar_freq, frame.index)
+        state._has_vix = vix is not None
+        fields = [c for c in tail.columns if c in OHLCV_SCHEMA]
+        values = tail[fields].to_numpy(dtype='float64')
+        vix_values = vix.to_numpy(dtype='float64') if vix is not None else None
+        for i, ts in enumerate(tail.index):
+            state.update(dict(zip(fields, values[i])),
+                         vix_close=None if vix_values is None else vix_values[i], timestamp=ts)
+        return state
+
+    # --- Streaming ---
+
+    def _lagged_close(self, lag: int) -> float:
+        if self.bars_seen <= lag:
+            return math.nan
+        return self._closes[(self._pos - 1 - lag) % len(self._closes)]
+
+    def update(
+        self,
+        bar: Union[Mapping[str, float], pd.Series],
+        vix_close: Optional[float] = None,
+        timestamp: Optional[pd.Timestamp] = None,
+    ) -> pd.Series:
+        """
+        Applies one new bar in O(1) and returns the current feature row.
+
+        Args:
+            bar: Mapping with at least 'Close' (other OHLCV fields are echoed). A NaN
+                Close is an observation like in the batch engine: the windows that
+                contain it, and the returns on either side of it, are NaN.
+            vix_close: Latest VIX close, if any; the previous value is carried forward otherwise.
+            timestamp: Bar timestamp (defaults to `bar.name` for a Series).
+        """
+        close = float(bar['Close'])
+        if not math.isfinite(close):
+            close = math.nan
+        if timestamp is None and isinstance(bar, pd.Series):
+            timestamp = bar.name
+
+        prev_close = self._lagged_close(0)
+        self._closes[self._pos] = close
+        self._pos = (self._pos + 1) % len(self._closes)
+        self.bars_seen += 1
+
+        if self.bars_seen > 1:
+            ret = close / prev_close - 1.0  # NaN next to a missing close, as pct_change gives
+            for window in self._vol.values():
+                window.push(ret)
+        for window in self._sma.values():
+            window.push(close)
+
+        if vix_close is not None and math.isfinite(float(vix_close)):
+            self._vix = float(vix_close)
+            self._has_vix = True
+        if self._has_vix:
+            self._vix_rank.push(self._vix if self._vix is not None else math.nan)
+        self._last_bar = {k: float(v) for k, v in dict(bar).items() if k in OHLCV_SCHEMA}
+        self.timestamp = timestamp
+        return self.features()
+
+    @property
+    def ready(self) -> bool:
+        """True once every feature has enough history (the batch engine would keep this row)."""
+        return self.bars_seen > MAX_LOOKBACK and (not self._has_vix or self._vix is not None)
+
+    def features(self) -> pd.Series:
+        """Current feature row, laid out like a row of `compute_features`; NaN during warmup."""
+        row = dict(self._last_bar)
+        for w, window in self._vol.items():
+            row[f'volatility_{w}d'] = window.value_std() * self._ann
+        for lag in MOMENTUM_LAGS:
+            row[f'momentum_{lag}d'] = self._lagged_close(0) / self._lagged_close(lag) - 1.0
+        for w, window in self._sma.items():
+            row[f'sma_{w}'] = window.value_mean()
+        row['price_vs_sma63'] = self._lagged_close(0) / row['sma_63'] - 1.0
+        if self._has_vix:
+            row['vix_close'] = self._vix if self._vix is not None else math.nan
+            row['vix_percentile_252d'] = self._vix_rank.value()
+        return pd.Series(row, name=self.timestamp, dtype='float64')
+
+
+def _stream_new_bars(
+    previous: pd.DataFrame,
+    ohlcv_data: Dict[str, pd.DataFrame],
+    ref_asset_ticker: str,
+    vix_ticker: str,
+    bar_freq: Optional[str],
+) -> Optional[pd.DataFrame]:
+    """`previous` extended with the bars after its last row, or None when it no longer fits the data."""
+    from src.features.engine import _extract_vix_close
+
+    raw = ohlcv_data[ref_asset_ticker]
+    if previous.empty or isinstance(raw.columns, pd.MultiIndex) or 'Close' not in raw.columns:
+        return None
+    last = previous.index[-1]
+    if last not in raw.index or raw.at[last, 'Close'] != previous['Close'].iloc[-1]:
+        return None  # history was restated or truncated since the last run
+    new = raw.loc[raw.index > last]
+    if new.empty:
+        return previous
+
+    history = {ref_asset_ticker: raw.loc[:last]}
+    if vix_ticker in ohlcv_data:
+        history[vix_ticker] = ohlcv_data[vix_ticker]
+    state = FeatureState.from_history(history, ref_asset_ticker, vix_ticker, bar_freq)
+    vix = _extract_vix_close(ohlcv_data, vix_ticker)
+    vix = None if vix is None else vix.reindex(raw.index).ffill().loc[new.index]
+
+    fields = [c for c in new.columns if c in OHLCV_SCHEMA]
+    values = new[fields].to_numpy(dtype='float64')
+    rows = [state.update(dict(zip(fields, values[i])), vix_close=None if vix is None else vix.iloc[i], timestamp=ts)
+            for i, ts in enumerate(new.index)]
+    streamed = pd.DataFrame(rows, index=new.index).drop(columns=fields)
+    if set(streamed.columns) != set(previous.columns) - set(raw.columns):
+        return None  # e.g. VIX appeared or disappeared
+    appended = pd.concat([new, streamed], axis=1)[previous.columns].dropna()
+    return pd.concat([previous, appended])
+
+
+def incremental_features(
+    ohlcv_data: Dict[str, pd.DataFrame],
+    ref_asset_ticker: str = 'SPY',
+    vix_ticker: str = '^VIX',
+    macro_data: MacroInput = None,
+    bar_freq: str = None,
+    store=None,
+) -> pd.DataFrame:
+    """
+    `compute_features` for scheduled runs, streaming only the bars added since the previous run.
+
+    The previous result (without macro columns) is kept in the feature store;
+    bars after its last row go through a FeatureState seeded from the
+    `MAX_LOOKBACK + 1` bars up to it, so a run costs O(MAX_LOOKBACK + new bars)
+    instead of a pass over the full history. Falls back to `compute_features`
+    on the first run, when the stored last bar is gone or its Close changed,
+    and for frames without a flat 'Close' column. Macro columns are aligned on every
+    call, as in `compute_features`.
+    """
+    from src.features.cache import _store_config, feature_key, get_feature_store
+    from src.features.engine import compute_features
+    from src.features.macro import align_macro
+
+    raw = ohlcv_data.get(ref_asset_ticker)
+    if raw is None or raw.empty:
+        raise ValueError(f"Reference asset '{ref_asset_ticker}' not found in OHLCV data.")
+    if store is None and _store_config()['enabled']:
+        store = get_feature_store()
+
+    spec = {'fn': 'incremental_features', 'ref_asset_ticker': ref_asset_ticker, 'vix_ticker': vix_ticker,
+            'bar_freq': bar_freq}
+    key = feature_key('latest', spec)
+    previous = store.get(key) if store is not None else None
+    features = None if previous is None else _stream_new_bars(previous, ohlcv_data, ref_asset_ticker,
+                                                              vix_ticker, bar_freq)
+    if features is None:
+        features = compute_features(ohlcv_data, ref_asset_ticker, vix_ticker, bar_freq=bar_freq)
+    if store is not None and features is not previous:
+        store.put(key, features, spec)
+
+    if macro_data is not None:
+        macro = align_macro(macro_data, raw.index).reindex(features.index)
+        if not macro.empty:
+            features = pd.concat([features, macro], axis=1).dropna()
+    return features
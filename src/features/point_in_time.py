@@ -0,0 +1,106 @@
+"""
+src/features/point_in_time.py
+
+Compute-once, slice-many feature view for walk-forward experiments.
+
+Every feature is causal (the value at bar t only reads bars <= t, macro
+series only after their publication lag), so features computed once on the
+full history can be sliced to any window without look-ahead. The view
+answers window and as-of queries by slicing, so a walk-forward run costs
+one feature pass instead of one per fold.
+
+`window(start, end)` reproduces `compute_features` on the sliced OHLCV by
+default: the first bars of the window that a fresh computation would spend
+on warmup are dropped. Pass `warmup='history'` to keep them, since the
+history before `start` is legitimately in the past.
+
+Usage:
+    from src.features.point_in_time import PointInTimeFeatures
+    pit = PointInTimeFeatures.from_ohlcv({'SPY': spy}, 'SPY', '^VIX')
+    train = pit.window('2015-01-01', '2015-06-30')
+    latest = pit.as_of('2015-06-30')     # last row visible on that date
+"""
+
+import logging
+import re
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from src.features.macro import MacroInput
+from src.features.registry import feature_warmup, registered_features
+
+logger = logging.getLogger(__name__)
+
+_MACRO_CHANGE_RE = re.compile(r'_chg_(\d+)d$')
+
+
+def column_warmup(column: str) -> int:
+    """Bars a fresh computation spends before `column` is valid (0 for plain OHLCV / macro levels)."""
+    if column in registered_features():
+        return feature_warmup(column)
+    match = _MACRO_CHANGE_RE.search(column)
+    return int(match.group(1)) if match else 0
+
+
+class PointInTimeFeatures:
+    """
+    Features computed once on the full history, sliced per window.
+
+    Attributes:
+        features: Full-history feature frame (rows with NaNs already dropped).
+        calendar: Bar calendar of the reference asset, used to count warmup bars.
+    """
+
+    def __init__(self, features: pd.DataFrame, calendar: pd.DatetimeIndex):
+        self.features = features
+        self.calendar = pd.DatetimeIndex(calendar)
+        self.warmup = max((column_warmup(c) for c in features.columns), default=0)
+        # Calendar position of every feature row, for warmup checks without per-window lookups
+        self._positions = self.calendar.get_indexer(features.index)
+
+    @classmethod
+    def from_ohlcv(
+        cls,
+        ohlcv_data: Dict[str, pd.DataFrame],
+        ref_asset_ticker: str = 'SPY',
+        vix_ticker: str = '^VIX',
+        macro_data: MacroInput = None,
+        bar_freq: str = None,
+        columns: Optional[Sequence[str]] = None,
+        use_cache: bool = True,
+    ) -> "PointInTimeFeatures":
+        """Computes features once (through the feature store when `use_cache`) and wraps them."""
+        from src.features.cache import cached_compute_features
+        from src.features.engine import compute_features
+
+        compute = cached_compute_features if use_cache else compute_features
+        features = compute(ohlcv_data, ref_asset_ticker, vix_ticker, macro_data=macro_data,
+                           bar_freq=bar_freq, columns=columns)
+        return cls(features, ohlcv_data[ref_asset_ticker].index)
+
+    def window(self, start=None, end=None, warmup: str = 'slice') -> pd.DataFrame:
+        """
+        Features for bars in [start, end].
+
+        Args:
+            warmup: 'slice' drops the window's first `self.warmup` bars, matching
+                `compute_features` run on `ohlcv.loc[start:end]`; 'history' keeps
+                every row, using history before `start` as warmup.
+        """
+        if warmup not in ('slice', 'history'):
+            raise ValueError(f"warmup must be 'slice' or 'history', got {warmup!r}")
+        lo = 0 if start is None else self.features.index.searchsorted(pd.Timestamp(start), side='left')
+        hi = len(self.features) if end is None else self.features.index.searchsorted(pd.Timestamp(end), side='right')
+        if warmup == 'slice' and self.warmup:
+            first_bar = 0 if start is None else self.calendar.searchsorted(pd.Timestamp(start), side='left')
+            lo += int(np.searchsorted(self._positions[lo:hi], first_bar + self.warmup, side='left'))
+        return self.features.iloc[lo:hi]
+
+    def as_of(self, timestamp) -> pd.Series:
+        """Latest feature row visible at `timestamp` (no later bars)."""
+        pos = self.features.index.searchsorted(pd.Timestamp(timestamp), side='right')
+        if pos == 0:
+            raise KeyError(f"No features available as of {timestamp}")
+        return self.features.iloc[pos - 1]
@@ -1,52 +1,245 @@
+from dataclasses import dataclass
+from typing import List
+
+import numpy as np
 import pandas as pd
 
-def detect_regime(features_df):
+# Feature columns detect_regime reads; pass as compute_features(..., columns=REGIME_FEATURES)
+REGIME_FEATURES = ['vix_close', 'momentum_63d']
+# Optional universe breadth (src.features.cross_section) joined onto the features
+BREADTH_FEATURE = 'xs_breadth_sma63'
+NARROW_BREADTH = 0.4    # below this a rally is led by too few assets to call a bull
+COLLAPSED_BREADTH = 0.2  # below this a high-vol sell-off is market-wide
+
+# Every label label_regimes can return; the order fixes the categorical codes
+REGIME_LABELS = [
+    "Crisis-Bear", "HighVol-Uncertain",
+    "MidVol-Bull", "MidVol-Bear", "MidVol-MeanRevert",
+    "LowVol-Bull", "LowVol-MeanRevert",
+]
+
+
+def _column(features_df, name, default):
+    if name in features_df.columns:
+        return features_df[name].to_numpy(dtype='float64')
+    return np.full(len(features_df), default, dtype='float64')
+
+
+def label_regimes(features_df):
     """
-    Detects the market regime based on simple heuristics from the latest features.
+    Labels every row of `features_df` with the heuristic regime rules in one vectorised pass.
+    
+    Rules (first match wins):
+    - VIX > 30: Crisis-Bear if 63-day momentum < -10% (or breadth has
+      collapsed), else HighVol-Uncertain
+    - 20 < VIX <= 30: MidVol-Bull / MidVol-Bear at momentum above 5% / below
+      -5%, else MidVol-MeanRevert
+    - otherwise: LowVol-Bull at momentum above 5%, else LowVol-MeanRevert
+    
+    When the features carry universe breadth (share of assets above their
+    63-bar SMA, see src.features.cross_section), narrow rallies are not
+    labelled bull. Missing columns default to VIX 20 and momentum 0; NaNs
+    fail every comparison, as in the scalar rules.
     
     Args:
         features_df (pd.DataFrame): DataFrame with computed features.
         
     Returns:
-        str: The detected market regime label.
+        pd.Series: Categorical regime labels (categories REGIME_LABELS), same index.
     """
-    if features_df.empty:
+    codes = _regime_codes(
+        _column(features_df, 'vix_close', 20),
+        _column(features_df, 'momentum_63d', 0),
+        _column(features_df, BREADTH_FEATURE, np.nan),
+    )
+    labels = pd.Categorical.from_codes(codes, categories=REGIME_LABELS)
+    return pd.Series(labels, index=features_df.index, name='regime')
+
+
+def _regime_codes(vix, mom63d, breadth):
+    """int8 codes into REGIME_LABELS for arrays of any (broadcastable) shape."""
+    vix, mom63d, breadth = (np.asarray(a, dtype='float64') for a in (vix, mom63d, breadth))
+    broad = ~(breadth < NARROW_BREADTH)  # True when breadth is unavailable (NaN)
+    
+    high_vol = vix > 30
+    mid_vol = (vix > 20) & (vix <= 30)
+    conditions = [
+        high_vol & ((mom63d < -0.10) | (breadth < COLLAPSED_BREADTH)),
+        high_vol,
+        mid_vol & (mom63d > 0.05) & broad,
+        mid_vol & (mom63d < -0.05),
+        mid_vol,
+        (mom63d > 0.05) & broad,
+    ]
+    shape = np.broadcast_shapes(*(np.shape(c) for c in conditions))
+    conditions = [np.broadcast_to(c, shape) for c in conditions]
+    return np.select(conditions, np.arange(len(conditions), dtype=np.int8),
+                     default=np.int8(len(conditions))).astype(np.int8)
+
+
+def latest_regime(regimes):
+    """Last label of a regime Series as a string ("Unknown" when empty)."""
+    if len(regimes) == 0:
         return "Unknown"
+    return str(regimes.iloc[-1])
+
+
+def detect_regime(features_df, model=None):
+    """
+    Detects the market regime from the latest row of features (see label_regimes).
+    
+    Args:
+        features_df (pd.DataFrame): DataFrame with computed features.
+        model: Optional fitted probabilistic model (e.g. src.features.hmm.GaussianHMM);
+            its most probable filtered regime replaces the threshold rules.
+        
+    Returns:
+        str: The detected market regime label.
+    """
+    if model is not None:
+        return model.detect(features_df)
+    return latest_regime(label_regimes(features_df.iloc[-1:]))
+
+
+@dataclass
+class RegimePanel:
+    """
+    Regime of every asset on every date, stored as int8 codes into REGIME_LABELS.
+    
+    Attributes:
+        codes (np.ndarray): (dates, tickers) int8; -1 where the asset has no
+            label yet (not trading or still in warmup).
+        index (pd.DatetimeIndex): Dates.
+        tickers (list): Column order of `codes`.
+    """
+    codes: np.ndarray
+    index: pd.Index
+    tickers: List[str]
+    
+    def asset(self, ticker):
+        """Categorical regime Series of one asset, like label_regimes."""
+        codes = self.codes[:, self.tickers.index(ticker)]
+        return pd.Series(pd.Categorical.from_codes(codes, categories=REGIME_LABELS), index=self.index, name=ticker)
+    
+    def to_frame(self):
+        """dates x tickers DataFrame of categorical columns."""
+        return pd.DataFrame({t: self.asset(t) for t in self.tickers}, index=self.index)
+    
+    def at(self, timestamp):
+        """{ticker: label} as of `timestamp` ("Unknown" for unlabelled assets)."""
+        pos = self.index.searchsorted(pd.Timestamp(timestamp), side='right') - 1
+        if pos < 0:
+            return {t: "Unknown" for t in self.tickers}
+        return {t: REGIME_LABELS[c] if c >= 0 else "Unknown" for t, c in zip(self.tickers, self.codes[pos])}
+    
+    def latest(self):
+        """{ticker: label} on the last date."""
+        return self.at(self.index[-1]) if len(self.index) else {t: "Unknown" for t in self.tickers}
+
+
+def label_regime_panel(panel_features, breadth=None):
+    """
+    Labels every asset on every date in one vectorised pass over a wide panel.
+    
+    Each asset gets the label_regimes rules applied to its own 63-day
+    momentum, with the shared VIX level (and optional universe breadth).
+    
+    Args:
+        panel_features (pd.DataFrame): Wide `compute_panel_features` output,
+            columns MultiIndex (feature, ticker).
+        breadth (pd.Series): Optional per-date universe breadth
+            (e.g. cross_section market['xs_breadth_sma63']).
+        
+    Returns:
+        RegimePanel: int8 codes, -1 where the asset's momentum is undefined.
+    """
+    mom = panel_features['momentum_63d']
+    tickers = list(mom.columns)
+    mom = mom.to_numpy(dtype='float64')
+    if 'vix_close' in panel_features.columns.get_level_values(0):
+        vix = panel_features['vix_close'].to_numpy(dtype='float64')
+    else:
+        vix = np.float64(20)
+    breadth_values = np.nan if breadth is None else breadth.reindex(panel_features.index).to_numpy(dtype='float64')[:, None]
+    codes = _regime_codes(vix, mom, breadth_values)
+    codes[np.isnan(mom)] = -1
+    return RegimePanel(codes, panel_features.index, tickers)
+
+
+def regime_segments(regimes):
+    """
+    Run-length index of a regime Series: one row per uninterrupted regime spell.
+    
+    Regime-conditional slicing and statistics then cost O(segments) instead
+    of a boolean mask over the full history.
+    
+    Args:
+        regimes (pd.Series): Labels as returned by label_regimes.
         
-    latest = features_df.iloc[-1]
-    
-    vix = latest.get('vix_close', 20)  # Default to 20 if VIX is not available
-    mom63d = latest.get('momentum_63d', 0)
-    
-    # Heuristic rules
-    if vix > 30:
-        if mom63d < -0.10:
-            return "Crisis-Bear"
-        else:
-            return "HighVol-Uncertain"
-    elif vix > 20 and vix <= 30:
-        if mom63d > 0.05:
-            return "MidVol-Bull"
-        elif mom63d < -0.05:
-            return "MidVol-Bear"
-        else:
-            return "MidVol-MeanRevert"
-    else: # VIX <= 20
-        if mom63d > 0.05:
-            return "LowVol-Bull"
-        else:
-            return "LowVol-MeanRevert"
-            
-    return "Unknown"
+    Returns:
+        pd.DataFrame: Columns regime, start, end (first / last timestamp),
+        start_pos, end_pos (positional, end exclusive) and bars.
+    """
+    values = pd.Series(regimes).astype('category')
+    codes = values.cat.codes.to_numpy()
+    n = len(codes)
+    if n == 0:
+        return pd.DataFrame(columns=['regime', 'start', 'end', 'start_pos', 'end_pos', 'bars'])
+    starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+    ends = np.r_[starts[1:], n]
+    return pd.DataFrame({
+        'regime': pd.Categorical.from_codes(codes[starts], categories=values.cat.categories),
+        'start': values.index[starts],
+        'end': values.index[ends - 1],
+        'start_pos': starts,
+        'end_pos': ends,
+        'bars': ends - starts,
+    })
+
+
+def regime_slices(segments, regime):
+    """Positional slices of every spell of `regime`, for `df.iloc[s]` without scanning the history."""
+    rows = segments[segments['regime'] == regime]
+    return [slice(int(a), int(b)) for a, b in zip(rows['start_pos'], rows['end_pos'])]
+
+
+def regime_statistics(returns, segments):
+    """
+    Per-regime return statistics from segment sums (one reduceat pass).
+    
+    Args:
+        returns (pd.Series): Per-bar returns on the same index as the labels.
+        segments (pd.DataFrame): Output of regime_segments.
+        
+    Returns:
+        pd.DataFrame: Indexed by regime with bars, segments, mean_return and volatility (per bar).
+    """
+    if segments.empty:
+        return pd.DataFrame(columns=['bars', 'segments', 'mean_return', 'volatility'])
+    values = np.nan_to_num(np.asarray(returns, dtype='float64'))
+    starts = segments['start_pos'].to_numpy()
+    per_segment = pd.DataFrame({
+        'regime': segments['regime'],
+        'bars': segments['bars'].to_numpy(),
+        'segments': 1,
+        'sum': np.add.reduceat(values, starts),
+        'sum_sq': np.add.reduceat(values * values, starts),
+    })
+    stats = per_segment.groupby('regime', observed=True)[['bars', 'segments', 'sum', 'sum_sq']].sum()
+    stats['mean_return'] = stats['sum'] / stats['bars']
+    var = (stats['sum_sq'] - stats['bars'] * stats['mean_return'] ** 2) / (stats['bars'] - 1)
+    stats['volatility'] = np.sqrt(var.clip(lower=0))
+    return stats[['bars', 'segments', 'mean_return', 'volatility']]
 
 if __name__ == '__main__':
     from src.data.ingest import fetch_ohlcv_data
     from src.features.engine import compute_features
+    from src.features.hmm import current_regime
     from src.utils.config import config
     
     ohlcv = fetch_ohlcv_data()
     features = compute_features(ohlcv, config['reference_asset'], config['vix_ticker'])
     
-    regime = detect_regime(features)
+    regime = current_regime(features)
     print(f"Latest Features:\n{features.iloc[-1]}")
     print(f"\nCurrent Detected Regime: {regime}")
\ No newline at end of file
@@ -0,0 +1,179 @@
+"""
+src/features/registry.py
+
+Declarative feature registry and dependency graph behind `compute_features`.
+
+- Every node (feature or shared intermediate) declares its inputs and its own
+  lookback in bars; the warmup of a feature is its lookback plus the warmup
+  of its inputs
+- Intermediates such as bar returns are computed once per call and shared by
+  every feature that needs them
+- `evaluate` resolves only the sub-graph behind the requested columns, so
+  adding features does not slow down consumers that ask for a subset
+
+Source nodes are 'close' (reference asset Close) and 'vix' (VIX Close, may
+be missing). Context values (e.g. the annualisation factor) are passed in
+`ctx`.
+
+Usage:
+    from src.features.registry import evaluate, feature_warmup
+    values = evaluate(['vix_close', 'momentum_63d'], {'close': close, 'vix': vix}, {'ann': 15.87})
+    feature_warmup('momentum_252d')   # 252
+"""
+
+import logging
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from src.features.kernels import rolling_rank
+
+logger = logging.getLogger(__name__)
+
+SOURCES = ('close', 'vix')
+
+
+@dataclass(frozen=True)
+class FeatureNode:
+    """One node of the feature graph: `fn(ctx, *inputs) -> pd.Series`."""
+    name: str
+    inputs: Tuple[str, ...]
+    fn: Callable[..., pd.Series]
+    lookback: int = 0
+    public: bool = True
+
+
+_REGISTRY: Dict[str, FeatureNode] = {}
+
+
+def register(name: str, inputs: Sequence[str], lookback: int = 0, public: bool = True):
+    """Decorator adding a node to the registry; features are listed in registration order."""
+    def decorator(fn):
+        missing = [i for i in inputs if i not in SOURCES and i not in _REGISTRY]
+        if missing:
+            raise ValueError(f"Feature '{name}' depends on unknown nodes {missing}")
+        _REGISTRY[name] = FeatureNode(name, tuple(inputs), fn, int(lookback), public)
+        return fn
+    return decorator
+
+
+def get_node(name: str) -> FeatureNode:
+    try:
+        return _REGISTRY[name]
+    except KeyError:
+        raise KeyError(f"Unknown feature '{name}'. Registered: {registered_features()}") from None
+
+
+def registered_features() -> List[str]:
+    """Public feature names in registration (output column) order."""
+    return [n for n, node in _REGISTRY.items() if node.public]
+
+
+def feature_warmup(name: str) -> int:
+    """Bars of history `name` needs before its first valid value."""
+    if name in SOURCES:
+        return 0
+    node = get_node(name)
+    return node.lookback + max((feature_warmup(i) for i in node.inputs), default=0)
+
+
+def required_warmup(columns: Iterable[str]) -> int:
+    return max((feature_warmup(c) for c in columns if c in _REGISTRY), default=0)
+
+
+def sources_for(columns: Iterable[str]) -> set:
+    """Source nodes the sub-graph behind `columns` reads."""
+    out, stack = set(), list(columns)
+    while stack:
+        name = stack.pop()
+        if name in SOURCES:
+            out.add(name)
+        else:
+            stack.extend(get_node(name).inputs)
+    return out
+
+
+def evaluate(columns: Sequence[str], sources: Dict[str, Optional[pd.Series]], ctx: Optional[dict] = None) -> Dict[str, pd.Series]:
+    """
+    Computes `columns` and nothing else besides their dependencies.
+
+    Features whose sources are missing (None) are skipped with a debug log,
+    mirroring how `compute_features` omits vix_close without VIX data.
+
+    Returns:
+        {column: Series} in the order of `columns`, for the columns that could be computed.
+    """
+    ctx = ctx or {}
+    memo: Dict[str, Optional[pd.Series]] = {s: sources.get(s) for s in SOURCES}
+
+    def resolve(name: str) -> Optional[pd.Series]:
+        if name in memo:
+            return memo[name]
+        node = get_node(name)
+        args = [resolve(i) for i in node.inputs]
+        if any(a is None for a in args):
+            logger.debug("Skipping feature %s: missing inputs", name)
+            memo[name] = None
+        else:
+            memo[name] = node.fn(ctx, *args).rename(name)
+        return memo[name]
+
+    out = {}
+    for c in columns:
+        value = resolve(c)
+        if value is not None:
+            out[c] = value
+    return out
+
+
+# --- Shared intermediates ---
+
+@register('returns', ['close'], lookback=1, public=False)
+def _returns(ctx, close):
+    return close.pct_change(fill_method=None)  # a missing close is not padded (pandas 2 pads by default)
+
+
+# --- Features ---
+
+def _register_volatility(window: int) -> None:
+    @register(f'volatility_{window}d', ['returns'], lookback=window - 1)
+    def _vol(ctx, returns):
+        return returns.rolling(window=window).std() * ctx.get('ann', 1.0)
+
+
+def _register_momentum(periods: int) -> None:
+    @register(f'momentum_{periods}d', ['close'], lookback=periods)
+    def _mom(ctx, close):
+        return close.pct_change(periods=periods, fill_method=None)
+
+
+def _register_sma(window: int) -> None:
+    @register(f'sma_{window}', ['close'], lookback=window - 1)
+    def _sma(ctx, close):
+        return close.rolling(window=window).mean()
+
+
+for _w in (21, 63):
+    _register_volatility(_w)
+for _p in (21, 63, 252):
+    _register_momentum(_p)
+for _w in (21, 63):
+    _register_sma(_w)
+
+
+@register('price_vs_sma63', ['close', 'sma_63'])
+def _price_vs_sma63(ctx, close, sma_63):
+    return close / sma_63 - 1
+
+
+@register('vix_close', ['close', 'vix'])
+def _vix_close(ctx, close, vix):
+    # Aligned to the reference calendar and carried forward over VIX holidays
+    return vix.reindex(close.index).ffill()
+
+
+@register('vix_percentile_252d', ['vix_close'], lookback=251)
+def _vix_percentile(ctx, vix_close):
+    # Percentile rank of today's VIX within the trailing year, in (0, 1]
+    return rolling_rank(vix_close, 252)
@@ -1,4 +1,8 @@
+import numpy as np
 import pandas as pd
+
+from src.features.indicators import indicator_index
+
 try:
     import vectorbt as vbt
 except Exception:  # pragma: no cover
@@ -25,8 +29,9 @@ def create_momentum_signals(close_prices, fast_window=21, slow_window=63):
         return entries, exits
 
     # Fallback: pure pandas implementation
-    fast = close_prices.rolling(window=fast_window).mean()
-    slow = close_prices.rolling(window=slow_window).mean()
+    indicators = indicator_index(close_prices)
+    fast = indicators.sma(fast_window)
+    slow = indicators.sma(slow_window)
     prev_fast = fast.shift(1)
     prev_slow = slow.shift(1)
     
@@ -44,4 +49,87 @@ def create_momentum_signals(close_prices, fast_window=21, slow_window=63):
 
     entries = entries.fillna(False)
     exits = exits.fillna(False)
-    return entries, exits
\ No newline at end of file
+    return entries, exits
+
+def momentum_grid_pairs(fast_windows, slow_windows, product=True):
+    """
+    (fast, slow) window pairs of a crossover grid as two int arrays.
+    
+    Args:
+        fast_windows, slow_windows: Window values (int or array-like).
+        product (bool): All combinations with fast < slow if True, otherwise
+            the windows are paired element-wise.
+    """
+    fast = np.atleast_1d(np.asarray(fast_windows, dtype=np.int64))
+    slow = np.atleast_1d(np.asarray(slow_windows, dtype=np.int64))
+    if product:
+        fast, slow = (g.ravel() for g in np.meshgrid(fast, slow, indexing='ij'))
+        keep = fast < slow
+        fast, slow = fast[keep], slow[keep]
+    elif len(fast) != len(slow):
+        raise ValueError(f"fast and slow windows must pair up, got {len(fast)} and {len(slow)}")
+    if len(fast) == 0:
+        raise ValueError("Parameter grid is empty (need at least one fast < slow pair)")
+    if (np.r_[fast, slow] < 1).any():
+        raise ValueError("Moving-average windows must be >= 1")
+    return fast, slow
+
+
+def moving_average_grid(close_prices, fast, slow):
+    """
+    Moving averages for every distinct window of a grid, each computed once.
+    
+    Returns:
+        tuple: (sma matrix (dates x distinct windows), fast column index, slow column index)
+    """
+    windows = np.unique(np.r_[fast, slow])
+    indicators = indicator_index(close_prices)
+    sma = np.column_stack([indicators.sma(int(w)).to_numpy() for w in windows])
+    return sma, np.searchsorted(windows, fast), np.searchsorted(windows, slow)
+
+
+def create_momentum_signal_grid(close_prices, fast_windows, slow_windows, product=True, chunk_size=1024):
+    """
+    Crossover entries / exits for a whole (fast, slow) parameter grid in one pass.
+    
+    Same signals as the pandas path of `create_momentum_signals` for every
+    pair, including the forced entry when fast is already above slow at the
+    slow average's first valid bar. Each distinct window's moving average is
+    computed once and broadcast to every pair using it; pairs are processed
+    in column blocks of `chunk_size` to bound temporary memory.
+    
+    Args:
+        close_prices (pd.Series): Series of close prices.
+        fast_windows, slow_windows: Window values (see `momentum_grid_pairs`).
+        product (bool): Sweep all fast < slow combinations (True) or zip the windows.
+        chunk_size (int): Pairs per vectorised block.
+        
+    Returns:
+        tuple: entries and exits boolean DataFrames (dates x pairs), columns
+        MultiIndex (fast_window, slow_window).
+    """
+    fast, slow = momentum_grid_pairs(fast_windows, slow_windows, product)
+    sma, fast_col, slow_col = moving_average_grid(close_prices, fast, slow)
+    n_bars, n_pairs = sma.shape[0], len(fast)
+    
+    valid = ~np.isnan(sma)
+    has_valid = valid.any(axis=0)
+    first_valid = valid.argmax(axis=0)
+    
+    entries = np.zeros((n_bars, n_pairs), dtype=bool)
+    exits = np.zeros((n_bars, n_pairs), dtype=bool)
+    for start in range(0, n_pairs, chunk_size):
+        cols = np.arange(start, min(start + chunk_size, n_pairs))
+        f, s = sma[:, fast_col[cols]], sma[:, slow_col[cols]]
+        above, below = f > s, f < s
+        # Crossover against the previous bar; NaN comparisons are False, as in pandas
+        entries[1:, cols] = above[1:] & (f[:-1] <= s[:-1])
+        exits[1:, cols] = below[1:] & (f[:-1] >= s[:-1])
+        # State-based initialisation: long from the first bar both averages exist if fast > slow
+        ok = has_valid[slow_col[cols]]
+        rows = first_valid[slow_col[cols]][ok]
+        entries[rows, cols[ok]] |= above[rows, np.flatnonzero(ok)]
+    
+    columns = pd.MultiIndex.from_arrays([fast, slow], names=['fast_window', 'slow_window'])
+    return (pd.DataFrame(entries, index=close_prices.index, columns=columns),
+            pd.DataFrame(exits, index=close_prices.index, columns=columns))
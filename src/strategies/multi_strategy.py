@@ -26,10 +26,22 @@ Dependencies:
 Author: AgentQuant Development Team
 License: MIT
 """
+import logging
 from typing import Dict, List, Optional, Any
 import pandas as pd
 import numpy as np
 
+from src.data.schemas import is_canonical_ohlcv
+from src.features.cross_section import rank_pct
+from src.features.engine import compute_panel_features
+from src.features.indicators import indicator_index
+from src.features.kernels import rolling_max, rolling_min
+from src.features.regime import RegimePanel, label_regime_panel
+from src.strategies.momentum import momentum_grid_pairs, moving_average_grid
+from src.utils.frequency import periods_per_year
+
+logger = logging.getLogger(__name__)
+
 
 def _get_col(df: pd.DataFrame, candidates: List[str]) -> pd.Series:
     """
@@ -53,6 +65,11 @@ def _get_col(df: pd.DataFrame, candidates: List[str]) -> pd.Series:
         - Coerces data to numeric format and drops NaN values
         - Provides fallback mechanism for edge cases
     """
+    if is_canonical_ohlcv(df):
+        # Canonical frames from the ingest layer: exact names, already numeric
+        for name in candidates:
+            if name in df.columns:
+                return df[name].dropna()
     # Build a case-insensitive mapping from stringified column names to original
     try:
         col_map = {str(c).lower(): c for c in df.columns}
@@ -112,8 +129,9 @@ def calculate_momentum_signal(data: pd.DataFrame, fast_window: int, slow_window:
     """
     # Calculate moving averages
     close = _get_close(data)
-    fast_ma = close.rolling(window=fast_window).mean()
-    slow_ma = close.rolling(window=slow_window).mean()
+    indicators = indicator_index(close)
+    fast_ma = indicators.sma(fast_window)
+    slow_ma = indicators.sma(slow_window)
     
     # Generate signals
     signal = pd.Series(0, index=data.index)
@@ -123,6 +141,39 @@ def calculate_momentum_signal(data: pd.DataFrame, fast_window: int, slow_window:
     return signal
 
 
+def calculate_momentum_signal_grid(
+    data: pd.DataFrame,
+    fast_windows: Any,
+    slow_windows: Any,
+    product: bool = True
+) -> pd.DataFrame:
+    """
+    Calculate momentum signals for a whole (fast, slow) parameter grid at once.
+    
+    Each distinct window's moving average is computed once; column j equals
+    `calculate_momentum_signal(data, fast_j, slow_j)`.
+    
+    Args:
+        data: DataFrame with OHLCV data
+        fast_windows: Fast moving average windows
+        slow_windows: Slow moving average windows
+        product: All fast < slow combinations (True) or element-wise pairs (False)
+        
+    Returns:
+        int8 DataFrame (dates x pairs) of signals, columns MultiIndex (fast_window, slow_window)
+    """
+    close = _get_close(data)
+    fast, slow = momentum_grid_pairs(fast_windows, slow_windows, product)
+    sma, fast_col, slow_col = moving_average_grid(close, fast, slow)
+    
+    # sign(fast - slow) without materialising float differences; NaN warmup -> 0
+    signal = (sma[:, fast_col] > sma[:, slow_col]).astype(np.int8)
+    signal -= (sma[:, fast_col] < sma[:, slow_col]).astype(np.int8)
+    
+    columns = pd.MultiIndex.from_arrays([fast, slow], names=['fast_window', 'slow_window'])
+    return pd.DataFrame(signal, index=data.index, columns=columns)
+
+
 def calculate_mean_reversion_signal(data: pd.DataFrame, window: int, num_std: float) -> pd.Series:
     """
     Calculate mean reversion signal based on Bollinger Bands.
@@ -135,16 +186,9 @@ def calculate_mean_reversion_signal(data: pd.DataFrame, window: int, num_std: fl
     Returns:
         Series with mean reversion signals (1 for buy, -1 for sell, 0 for neutral)
     """
-    # Calculate middle band (SMA)
+    # Middle band (SMA) +/- num_std rolling standard deviations
     close = _get_close(data)
-    middle_band = close.rolling(window=window).mean()
-    
-    # Calculate standard deviation
-    std = close.rolling(window=window).std()
-    
-    # Calculate upper and lower bands
-    upper_band = middle_band + (std * num_std)
-    lower_band = middle_band - (std * num_std)
+    middle_band, upper_band, lower_band = indicator_index(close).bollinger(window, num_std)
     
     # Generate signals
     signal = pd.Series(0, index=data.index)
@@ -166,12 +210,10 @@ def calculate_volatility_signal(data: pd.DataFrame, window: int, vol_threshold:
     Returns:
         Series with volatility signals (1 for buy, 0 for neutral)
     """
-    # Calculate daily returns
     close = _get_close(data)
-    returns = close.pct_change()
     
-    # Calculate rolling volatility
-    volatility = returns.rolling(window=window).std()
+    # Calculate rolling volatility of bar returns
+    volatility = indicator_index(close).return_std(window)
     
     # Generate signals
     signal = pd.Series(0, index=data.index)
@@ -200,9 +242,10 @@ def calculate_trend_following_signal(
     """
     # Calculate moving averages
     close = _get_close(data)
-    short_ma = close.rolling(window=short_window).mean()
-    medium_ma = close.rolling(window=medium_window).mean()
-    long_ma = close.rolling(window=long_window).mean()
+    indicators = indicator_index(close)
+    short_ma = indicators.sma(short_window)
+    medium_ma = indicators.sma(medium_window)
+    long_ma = indicators.sma(long_window)
     
     # Generate signals
     signal = pd.Series(0, index=data.index)
@@ -242,8 +285,8 @@ def calculate_breakout_signal(
     idx = close.index
     high = high.reindex(idx).ffill()
     low = low.reindex(idx).ffill()
-    rolling_high = high.rolling(window=window).max()
-    rolling_low = low.rolling(window=window).min()
+    rolling_high = rolling_max(high, window)
+    rolling_low = rolling_min(low, window)
     
     # Calculate threshold values
     upper_threshold = rolling_high * (1 + threshold_pct)
@@ -257,6 +300,47 @@ def calculate_breakout_signal(
     return signal
 
 
+def _regime_sub_strategy(regime_type: str) -> str:
+    """Sub-strategy used in a regime: 'momentum', 'mean_reversion' or 'volatility'."""
+    regime_type = regime_type.lower()
+    if "bull" in regime_type or "uptrend" in regime_type:
+        # In bull market or uptrend, use momentum strategy
+        return "momentum"
+    elif "bear" in regime_type or "downtrend" in regime_type:
+        # In bear market or downtrend, use mean reversion strategy
+        return "mean_reversion"
+    elif "volatility" in regime_type or "high_vol" in regime_type:
+        # In high volatility regime, use volatility strategy
+        return "volatility"
+    # Default to momentum strategy
+    return "momentum"
+
+
+def _sub_strategy_signal(
+    data: pd.DataFrame,
+    sub_strategy: str,
+    momentum_params: dict,
+    mean_reversion_params: dict
+) -> pd.Series:
+    if sub_strategy == "mean_reversion":
+        return calculate_mean_reversion_signal(
+            data, 
+            mean_reversion_params.get("window", 20), 
+            mean_reversion_params.get("num_std", 2.0)
+        )
+    elif sub_strategy == "volatility":
+        return calculate_volatility_signal(
+            data,
+            momentum_params.get("window", 20),
+            momentum_params.get("vol_threshold", 0.02)
+        )
+    return calculate_momentum_signal(
+        data, 
+        momentum_params.get("fast_window", 20), 
+        momentum_params.get("slow_window", 50)
+    )
+
+
 def calculate_regime_based_signal(
     data: pd.DataFrame, 
     regime_data: Any, 
@@ -266,17 +350,25 @@ def calculate_regime_based_signal(
     """
     Calculate regime-based signal that switches between momentum and mean reversion.
     
+    With a single regime (string or dict) one sub-strategy is used for the
+    whole history. With a regime Series (e.g. `label_regimes` output, or
+    `RegimePanel.asset(ticker)`) the sub-strategy is chosen per bar: every
+    candidate signal is computed once and the regime at each bar selects
+    between them. Bars before the first regime label (warmup) are flat.
+    
     Args:
         data: DataFrame with OHLCV data
-        regime_data: Dictionary with regime information
+        regime_data: Regime label, dict with a 'name' field, or Series of labels per bar
         momentum_params: Parameters for momentum strategy
         mean_reversion_params: Parameters for mean reversion strategy
         
     Returns:
         Series with regime-based signals
     """
-    # Debug: Print regime_data type and value
-    print(f"DEBUG regime_based_signal: regime_data type={type(regime_data)}, value={regime_data}")
+    if isinstance(regime_data, pd.Series):
+        return _time_varying_regime_signal(data, regime_data, momentum_params, mean_reversion_params)
+    
+    logger.debug("regime_based_signal: regime_data type=%s, value=%s", type(regime_data), regime_data)
     
     # Accept either a string (e.g., from detect_regime) or a dict with a 'name' field
     if isinstance(regime_data, str):
@@ -294,34 +386,81 @@ def calculate_regime_based_signal(
     else:
         regime_type = str(regime_data).lower() if regime_data is not None else ""
     
-    if "bull" in regime_type or "uptrend" in regime_type:
-        # In bull market or uptrend, use momentum strategy
-        return calculate_momentum_signal(
-            data, 
-            momentum_params.get("fast_window", 20), 
-            momentum_params.get("slow_window", 50)
-        )
-    elif "bear" in regime_type or "downtrend" in regime_type:
-        # In bear market or downtrend, use mean reversion strategy
-        return calculate_mean_reversion_signal(
-            data, 
-            mean_reversion_params.get("window", 20), 
-            mean_reversion_params.get("num_std", 2.0)
-        )
-    elif "volatility" in regime_type or "high_vol" in regime_type:
-        # In high volatility regime, use volatility strategy
-        return calculate_volatility_signal(
-            data,
-            momentum_params.get("window", 20),
-            momentum_params.get("vol_threshold", 0.02)
-        )
-    else:
-        # Default to momentum strategy
-        return calculate_momentum_signal(
-            data, 
-            momentum_params.get("fast_window", 20), 
-            momentum_params.get("slow_window", 50)
-        )
+    return _sub_strategy_signal(data, _regime_sub_strategy(regime_type), momentum_params, mean_reversion_params)
+
+
+def _time_varying_regime_signal(
+    data: pd.DataFrame,
+    regimes: pd.Series,
+    momentum_params: dict,
+    mean_reversion_params: dict
+) -> pd.Series:
+    """Per-bar selection between sub-strategy signals according to `regimes`."""
+    # The label known at each bar (labels are computed from data up to that bar)
+    labels = regimes.reindex(data.index, method='ffill').astype('category')
+    categories = [str(c) for c in labels.cat.categories]
+    names = sorted({_regime_sub_strategy(c) for c in categories})
+    
+    # Column 0 is flat (no regime yet); each needed sub-strategy is computed once
+    candidates = np.zeros((len(data.index), len(names) + 1))
+    for j, name in enumerate(names, start=1):
+        sub = _sub_strategy_signal(data, name, momentum_params, mean_reversion_params)
+        candidates[:, j] = sub.reindex(data.index).fillna(0).to_numpy()
+    # Code -1 (missing label) indexes the trailing 0 -> flat column
+    column_of_code = np.array([1 + names.index(_regime_sub_strategy(c)) for c in categories] + [0])
+    choice = column_of_code[labels.cat.codes.to_numpy()]
+    signal = candidates[np.arange(len(choice)), choice].astype(np.int64)
+    return pd.Series(signal, index=data.index)
+
+
+def _asset_regimes(data: Dict[str, pd.DataFrame], asset_tickers: List[str], params: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Regime for each asset: `params['regimes']` if given (label, label Series,
+    dates x tickers DataFrame or RegimePanel), otherwise per-bar regimes
+    labelled from the assets' own features and the VIX in `data` if present.
+    """
+    regimes = params.get("regimes")
+    if regimes is None:
+        vix_ticker = params.get("vix_ticker", "^VIX")
+        frames = {t: data[t] for t in asset_tickers}
+        if vix_ticker in data:
+            frames[vix_ticker] = data[vix_ticker]
+        regimes = label_regime_panel(compute_panel_features(frames, tickers=asset_tickers, vix_ticker=vix_ticker))
+    if isinstance(regimes, RegimePanel):
+        return {t: regimes.asset(t) for t in asset_tickers}
+    if isinstance(regimes, pd.DataFrame):
+        return {t: regimes[t] for t in asset_tickers}
+    return {t: regimes for t in asset_tickers}
+
+
+def calculate_cross_sectional_momentum_signals(
+    data: Dict[str, pd.DataFrame],
+    asset_tickers: List[str],
+    lookback: int = 63,
+    top_fraction: float = 0.5
+) -> Dict[str, pd.Series]:
+    """
+    Calculate cross-sectional momentum signals: long the assets whose
+    `lookback`-bar return ranks in the top `top_fraction` of the universe.
+    
+    Ranks are computed for all assets and dates in one array pass; assets
+    without a return yet are left out of the ranking and hold no position.
+    
+    Args:
+        data: Dictionary of DataFrames with OHLCV data for each asset
+        asset_tickers: Universe to rank
+        lookback: Momentum lookback in bars
+        top_fraction: Share of the universe held long
+        
+    Returns:
+        Dictionary of 0/1 signal Series for each asset
+    """
+    close = pd.DataFrame({ticker: _get_close(data[ticker]) for ticker in asset_tickers})
+    momentum = close / close.shift(lookback) - 1
+    ranks = rank_pct(momentum.to_numpy(dtype='float64'))
+    with np.errstate(invalid='ignore'):
+        held = (ranks > 1.0 - top_fraction).astype(int)
+    return {ticker: pd.Series(held[:, j], index=close.index) for j, ticker in enumerate(asset_tickers)}
 
 
 def calculate_portfolio_weights(
@@ -376,7 +515,8 @@ def run_multi_asset_strategy(
     strategy_type: str,
     params: Dict[str, Any],
     allocation_weights: Optional[Dict[str, float]] = None,
-    initial_capital: float = 10000.0
+    initial_capital: float = 10000.0,
+    bar_freq: Optional[str] = None
 ) -> Dict[str, Any]:
     """
     Run a multi-asset strategy backtest.
@@ -388,6 +528,7 @@ def run_multi_asset_strategy(
         params: Strategy parameters
         allocation_weights: Optional allocation weights for each asset
         initial_capital: Initial capital for the backtest
+        bar_freq: Bar size ('1m', '1h', '1d', ...) used for annualisation; inferred if None
         
     Returns:
         Dictionary with backtest results
@@ -402,52 +543,60 @@ def run_multi_asset_strategy(
     
     # Generate signals for each asset
     signals = {}
-    for ticker in asset_tickers:
-        asset_data = data[ticker]
+    if strategy_type == "cross_sectional_momentum":
+        signals = calculate_cross_sectional_momentum_signals(
+            data,
+            asset_tickers,
+            params.get("lookback", 63),
+            params.get("top_fraction", 0.5)
+        )
+    else:
+        asset_regimes = None
+        for ticker in asset_tickers:
+            asset_data = data[ticker]
         
-        if strategy_type == "momentum":
-            signals[ticker] = calculate_momentum_signal(
-                asset_data, 
-                params.get("fast_window", 20), 
-                params.get("slow_window", 50)
-            )
-        elif strategy_type == "mean_reversion":
-            signals[ticker] = calculate_mean_reversion_signal(
-                asset_data, 
-                params.get("window", 20), 
-                params.get("num_std", 2.0)
-            )
-        elif strategy_type == "volatility":
-            signals[ticker] = calculate_volatility_signal(
-                asset_data,
-                params.get("window", 20),
-                params.get("vol_threshold", 0.02)
-            )
-        elif strategy_type == "trend_following":
-            signals[ticker] = calculate_trend_following_signal(
-                asset_data,
-                params.get("short_window", 10),
-                params.get("medium_window", 30),
-                params.get("long_window", 90)
-            )
-        elif strategy_type == "breakout":
-            signals[ticker] = calculate_breakout_signal(
-                asset_data,
-                params.get("window", 20),
-                params.get("threshold_pct", 0.02)
-            )
-        elif strategy_type == "regime_based":
-            # This is a placeholder - in a real implementation, 
-            # we would need to pass regime data
-            regime_data = {"name": "bull"}  # Default to bull regime
-            signals[ticker] = calculate_regime_based_signal(
-                asset_data,
-                regime_data,
-                {"fast_window": params.get("fast_window", 20), "slow_window": params.get("slow_window", 50)},
-                {"window": params.get("mr_window", 20), "num_std": params.get("mr_num_std", 2.0)}
-            )
-        else:
-            raise ValueError(f"Unknown strategy type: {strategy_type}")
+            if strategy_type == "momentum":
+                signals[ticker] = calculate_momentum_signal(
+                    asset_data, 
+                    params.get("fast_window", 20), 
+                    params.get("slow_window", 50)
+                )
+            elif strategy_type == "mean_reversion":
+                signals[ticker] = calculate_mean_reversion_signal(
+                    asset_data, 
+                    params.get("window", 20), 
+                    params.get("num_std", 2.0)
+                )
+            elif strategy_type == "volatility":
+                signals[ticker] = calculate_volatility_signal(
+                    asset_data,
+                    params.get("window", 20),
+                    params.get("vol_threshold", 0.02)
+                )
+            elif strategy_type == "trend_following":
+                signals[ticker] = calculate_trend_following_signal(
+                    asset_data,
+                    params.get("short_window", 10),
+                    params.get("medium_window", 30),
+                    params.get("long_window", 90)
+                )
+            elif strategy_type == "breakout":
+                signals[ticker] = calculate_breakout_signal(
+                    asset_data,
+                    params.get("window", 20),
+                    params.get("threshold_pct", 0.02)
+                )
+            elif strategy_type == "regime_based":
+                if asset_regimes is None:
+                    asset_regimes = _asset_regimes(data, asset_tickers, params)
+                signals[ticker] = calculate_regime_based_signal(
+                    asset_data,
+                    asset_regimes[ticker],
+                    {"fast_window": params.get("fast_window", 20), "slow_window": params.get("slow_window", 50)},
+                    {"window": params.get("mr_window", 20), "num_std": params.get("mr_num_std", 2.0)}
+                )
+            else:
+                raise ValueError(f"Unknown strategy type: {strategy_type}")
     
     # Calculate portfolio weights
     weights = calculate_portfolio_weights(asset_tickers, data, signals, allocation_weights)
@@ -464,7 +613,8 @@ def run_multi_asset_strategy(
     
     # Calculate performance metrics
     total_return = (equity_curve.iloc[-1] / equity_curve.iloc[0]) - 1
-    annual_return = (1 + total_return) ** (252 / len(equity_curve)) - 1
+    ppy = periods_per_year(bar_freq, equity_curve.index)
+    annual_return = (1 + total_return) ** (ppy / len(equity_curve)) - 1
     
     # Calculate drawdown
     roll_max = equity_curve.cummax()
@@ -472,7 +622,7 @@ def run_multi_asset_strategy(
     max_drawdown = drawdown.min()
     
     # Calculate Sharpe ratio (assuming risk-free rate of 0)
-    sharpe_ratio = np.sqrt(252) * portfolio_returns.mean() / portfolio_returns.std()
+    sharpe_ratio = np.sqrt(ppy) * portfolio_returns.mean() / portfolio_returns.std()
     
     # Return results
     return {
@@ -0,0 +1,133 @@
+"""
+Bar Frequency Utilities
+=======================
+
+Single source of truth for bar sizes, so annualisation and calendar logic is
+no longer hard-wired to daily bars (`sqrt(252)`, `freq='D'`).
+
+Bar frequencies use yfinance-style codes: '1m', '5m', '15m', '30m', '1h',
+'1d', '1wk'. Common pandas aliases ('1min', '5T', 'h', 'D', 'B', 'W') are
+accepted and normalised by `parse_bar_freq`.
+
+Intraday bars are counted per regular US equity session (09:30-16:00, 390
+minutes), so one year of 1m bars is 252 * 390 periods and one year of 1h
+bars is 252 * 7 (the last hourly bar of a session is a half hour).
+
+Usage:
+    from src.utils.frequency import annualization_factor, periods_per_year
+    vol = returns.std() * annualization_factor('5m')
+    periods_per_year(index=df.index)   # inferred from bar spacing
+
+Author: AgentQuant Development Team
+License: MIT
+"""
+import math
+import re
+from typing import Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from src.utils.config import config
+
+TRADING_DAYS_PER_YEAR = 252
+WEEKS_PER_YEAR = 52
+SESSION_START = "09:30"
+SESSION_MINUTES = 390
+
+_FREQ_RE = re.compile(r"^(\d*)\s*([a-z]+)$")
+_UNIT_ALIASES = {
+    "m": "m", "min": "m", "t": "m",
+    "h": "h", "hr": "h",
+    "d": "d", "b": "d",
+    "wk": "wk", "w": "wk",
+}
+
+FreqLike = Union[str, pd.Timedelta, None]
+
+
+def _split(freq: str) -> Tuple[int, str]:
+    match = _FREQ_RE.match(str(freq).strip().lower())
+    unit = _UNIT_ALIASES.get(match.group(2)) if match else None
+    if unit is None:
+        raise ValueError(f"Unsupported bar frequency '{freq}'. Use e.g. '1m', '5m', '1h', '1d' or '1wk'.")
+    return int(match.group(1) or 1), unit
+
+
+def parse_bar_freq(freq: FreqLike) -> str:
+    """Normalises a bar frequency to its canonical code ('5min' -> '5m', '60m' -> '1h', 'B' -> '1d')."""
+    if isinstance(freq, pd.Timedelta):
+        minutes = freq.total_seconds() / 60
+        freq = f"{int(minutes)}m" if minutes < 24 * 60 else f"{int(minutes // (24 * 60))}d"
+    n, unit = _split(freq)
+    if unit == "m" and n % 60 == 0:
+        n, unit = n // 60, "h"
+    return f"{n}{unit}"
+
+
+def default_bar_freq() -> str:
+    """The configured `data.bar_freq` (daily unless set otherwise)."""
+    return parse_bar_freq(config.get('data', {}).get('bar_freq') or "1d")
+
+
+def is_intraday(freq: FreqLike) -> bool:
+    return _split(parse_bar_freq(freq))[1] in ("m", "h")
+
+
+def bar_timedelta(freq: FreqLike) -> pd.Timedelta:
+    """Nominal length of one bar, e.g. for vectorbt's `freq` or bucket flooring."""
+    n, unit = _split(parse_bar_freq(freq))
+    return pd.Timedelta(**{{"m": "minutes", "h": "hours", "d": "days", "wk": "weeks"}[unit]: n})
+
+
+def bars_per_session(freq: FreqLike) -> int:
+    """Intraday bars in one regular session (a trailing partial bar counts)."""
+    minutes = bar_timedelta(freq).total_seconds() / 60
+    return int(math.ceil(SESSION_MINUTES / minutes))
+
+
+def infer_bar_freq(index: pd.Index) -> Optional[str]:
+    """Guesses the bar frequency from the median spacing of a DatetimeIndex; None if it cannot tell."""
+    if not isinstance(index, pd.DatetimeIndex) or len(index) < 2:
+        return None
+    stamps = index[: 10_000].values.astype("datetime64[ns]").view("int64")
+    step = pd.Timedelta(int(np.median(np.diff(stamps))))
+    if step < pd.Timedelta(days=1):
+        minutes = max(1, int(round(step.total_seconds() / 60)))
+        return parse_bar_freq(f"{minutes}m")
+    if step < pd.Timedelta(days=5):
+        return "1d"
+    return "1wk"
+
+
+def periods_per_year(freq: FreqLike = None, index: Optional[pd.Index] = None) -> float:
+    """
+    Bars per year for `freq`.
+
+    If `freq` is None it is inferred from `index`, falling back to the
+    configured `data.bar_freq`.
+    """
+    if freq is None and index is not None:
+        freq = infer_bar_freq(index)
+    freq = parse_bar_freq(freq) if freq is not None else default_bar_freq()
+    n, unit = _split(freq)
+    if unit in ("m", "h"):
+        return float(TRADING_DAYS_PER_YEAR * bars_per_session(freq))
+    if unit == "d":
+        return TRADING_DAYS_PER_YEAR / n
+    return WEEKS_PER_YEAR / n
+
+
+def annualization_factor(freq: FreqLike = None, index: Optional[pd.Index] = None) -> float:
+    """sqrt(periods_per_year): scales per-bar volatility / Sharpe to annual figures."""
+    return float(np.sqrt(periods_per_year(freq, index)))
+
+
+def session_calendar(start, end, freq: FreqLike) -> pd.DatetimeIndex:
+    """Bar open times of every regular session between `start` and `end` (business days)."""
+    days = pd.bdate_range(start=start, end=end).astype("datetime64[ns]")
+    if not is_intraday(freq):
+        return pd.DatetimeIndex(days, name="Date")
+    offsets = pd.Timedelta(SESSION_START + ":00").value + bar_timedelta(freq).value * np.arange(bars_per_session(freq))
+    stamps = days.asi8[:, None] + offsets[None, :]
+    return pd.DatetimeIndex(stamps.ravel().view("datetime64[ns]"), name="Date")
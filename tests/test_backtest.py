@@ -3,6 +3,7 @@ import pandas as pd
 import numpy as np
 from src.backtest.runner import run_backtest
 
+
 @pytest.fixture
 def sample_trending_data():
     """Creates a sample OHLCV DataFrame with a clear upward trend."""
@@ -12,6 +13,7 @@ def sample_trending_data():
     df = pd.DataFrame({'Close': close_prices}, index=dates)
     return df
 
+
 def test_run_backtest_momentum(sample_trending_data):
     """Tests that a momentum strategy is profitable on clearly trending data."""
     params = {'fast_window': 10, 'slow_window': 30}
@@ -28,6 +30,7 @@ def test_run_backtest_momentum(sample_trending_data):
     assert stats['Sharpe Ratio'] > 1.0 # Should be a good Sharpe
     assert stats['Num Trades'] > 0 # Should have made trades
 
+
 def test_run_backtest_invalid_strategy(sample_trending_data):
     """Tests that the runner raises an error for a non-existent strategy."""
     params = {'fast_window': 10, 'slow_window': 30}
@@ -37,4 +40,80 @@ def test_run_backtest_invalid_strategy(sample_trending_data):
             asset_ticker='TREND',
             strategy_name='non_existent_strat',
             params=params
-        )
\ No newline at end of file
+        )
+
+
+def test_regime_based_signal_switches_per_bar():
+    """A regime Series selects momentum in bull bars and mean reversion in bear bars, flat before the first label."""
+    from src.strategies.multi_strategy import (calculate_mean_reversion_signal, calculate_momentum_signal,
+                                               calculate_regime_based_signal, run_multi_asset_strategy)
+
+    rng = np.random.default_rng(2)
+    dates = pd.bdate_range('2020-01-01', periods=300)
+    data = pd.DataFrame({'Close': 100 * np.exp(np.cumsum(rng.normal(0, 0.02, 300)))}, index=dates)
+    regimes = pd.Series(['LowVol-Bull'] * 100 + ['MidVol-Bear'] * 100 + ['LowVol-Bull'] * 50, index=dates[50:])
+
+    mom_params, mr_params = {'fast_window': 5, 'slow_window': 20}, {'window': 20, 'num_std': 1.0}
+    signal = calculate_regime_based_signal(data, regimes, mom_params, mr_params)
+    momentum = calculate_momentum_signal(data, 5, 20)
+    reversion = calculate_mean_reversion_signal(data, 20, 1.0)
+    assert (signal.iloc[:50] == 0).all()
+    pd.testing.assert_series_equal(signal.iloc[50:150], momentum.iloc[50:150], check_dtype=False)
+    pd.testing.assert_series_equal(signal.iloc[150:250], reversion.iloc[150:250], check_dtype=False)
+    assert signal.iloc[150:250].ne(momentum.iloc[150:250]).any()
+
+    # Multi-asset: regimes are labelled per asset instead of assuming a bull market
+    other = pd.DataFrame({'Close': 100 * np.exp(np.cumsum(rng.normal(-0.002, 0.02, 300)))}, index=dates)
+    result = run_multi_asset_strategy({'A': data, 'B': other}, ['A', 'B'], 'regime_based',
+                                      {'fast_window': 5, 'slow_window': 20})
+    assert (result['signals']['A'].iloc[:63] == 0).all()
+    bull = run_multi_asset_strategy({'A': data, 'B': other}, ['A', 'B'], 'regime_based',
+                                    {'fast_window': 5, 'slow_window': 20, 'regimes': pd.Series('bull', index=dates)})
+    pd.testing.assert_series_equal(bull['signals']['A'], calculate_momentum_signal(data, 5, 20), check_dtype=False)
+
+
+def test_momentum_signal_grid_matches_single_calls():
+    """Every column of the batched grid equals the one-pair signal functions."""
+    from src.strategies.momentum import create_momentum_signal_grid, create_momentum_signals, vbt
+    from src.strategies.multi_strategy import calculate_momentum_signal, calculate_momentum_signal_grid
+
+    rng = np.random.default_rng(9)
+    dates = pd.bdate_range('2019-01-01', periods=400)
+    data = pd.DataFrame({'Close': 100 * np.exp(np.cumsum(rng.normal(0, 0.015, 400)))}, index=dates)
+
+    entries, exits = create_momentum_signal_grid(data['Close'], [5, 10, 30], [10, 30, 60], chunk_size=2)
+    assert list(entries.columns) == [(5, 10), (5, 30), (5, 60), (10, 30), (10, 60), (30, 60)]
+    signals = calculate_momentum_signal_grid(data, [5, 10, 30], [10, 30, 60])
+    for fast, slow in entries.columns:
+        pd.testing.assert_series_equal(signals[(fast, slow)], calculate_momentum_signal(data, fast, slow),
+                                       check_names=False, check_dtype=False)
+        single_entries, single_exits = create_momentum_signals(data['Close'], fast, slow)
+        if vbt is None:  # the grid reproduces the pandas path
+            pd.testing.assert_series_equal(entries[(fast, slow)], single_entries, check_names=False)
+            pd.testing.assert_series_equal(exits[(fast, slow)], single_exits, check_names=False)
+
+    zipped, _ = create_momentum_signal_grid(data['Close'], [5, 20], [50, 100], product=False)
+    assert list(zipped.columns) == [(5, 50), (20, 100)]
+    with pytest.raises(ValueError):
+        create_momentum_signal_grid(data['Close'], [50], [10])
+
+
+def test_momentum_grid_backtest_matches_run_backtest(monkeypatch):
+    """Grid metrics per pair equal run_backtest's pandas simulation of that pair."""
+    from src.backtest import runner
+    from src.strategies import momentum
+
+    monkeypatch.setattr(runner, 'vbt', None)
+    monkeypatch.setattr(momentum, 'vbt', None)
+    rng = np.random.default_rng(25)
+    dates = pd.bdate_range('2019-01-01', periods=300)
+    data = {t: pd.DataFrame({'Close': 100 * np.exp(np.cumsum(rng.normal(0.0005, 0.012, 300)))}, index=dates)
+            for t in ('A', 'B')}
+    weights = {'A': 0.7, 'B': 0.3}
+
+    grid = runner.run_momentum_grid_backtest(data, ['A', 'B'], [5, 12], [30, 60], product=False,
+                                             allocation_weights=weights)
+    for fast, slow in grid.index:
+        single = run_backtest(data, ['A', 'B'], 'momentum', {'fast_window': fast, 'slow_window': slow}, weights)
+        for metric in ('total_return', 'sharpe_ratio', 'max_drawdown', 'num_trades'):
+            assert grid.loc[(fast, slow), metric] == pytest.approx(single['metrics'][metric], rel=1e-9)
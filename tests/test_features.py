@@ -1,7 +1,9 @@
+import json
 import pytest
 import pandas as pd
 import numpy as np
-from src.features.engine import compute_features
+from src.features.engine import FEATURE_COLUMNS, compute_features, compute_panel_features
+
 
 @pytest.fixture
 def sample_ohlcv_data():
@@ -22,6 +24,7 @@ def sample_ohlcv_data():
     
     return {'SPY': df, '^VIX': vix_data}
 
+
 def test_compute_features_columns(sample_ohlcv_data):
     """Tests if the feature computation creates the expected columns."""
     features = compute_features(sample_ohlcv_data, 'SPY', '^VIX')
@@ -34,6 +37,7 @@ def test_compute_features_columns(sample_ohlcv_data):
     for col in expected_cols:
         assert col in features.columns
 
+
 def test_compute_features_no_vix(sample_ohlcv_data):
     """Tests that feature computation runs without VIX data."""
     ohlcv_no_vix = {'SPY': sample_ohlcv_data['SPY']}
@@ -41,6 +45,7 @@ def test_compute_features_no_vix(sample_ohlcv_data):
     assert 'vix_close' not in features.columns
     assert 'momentum_63d' in features.columns # Ensure other features were still made
 
+
 def test_compute_features_values(sample_ohlcv_data):
     """Tests a specific calculated value for correctness."""
     df = sample_ohlcv_data['SPY']
@@ -51,4 +56,517 @@ def test_compute_features_values(sample_ohlcv_data):
     features = compute_features(sample_ohlcv_data, 'SPY', '^VIX')
     
     # Compare with a tolerance for floating point errors
-    assert np.isclose(features['momentum_21d'].iloc[-1], expected_mom)
\ No newline at end of file
+    assert np.isclose(features['momentum_21d'].iloc[-1], expected_mom)
+
+
+def test_macro_features_are_point_in_time():
+    """FRED values are joined as of their publication date and derived columns are added."""
+    from src.features.macro import align_macro
+
+    dates = pd.bdate_range(start="2022-01-03", periods=300)
+    close = 100 + np.cumsum(np.random.randn(300))
+    spy = pd.DataFrame({'Open': close, 'High': close + 1, 'Low': close - 1,
+                        'Close': close, 'Volume': 1000}, index=dates)
+    # Weekly observations on Fridays: a bar may only see a value from the next business day on
+    obs_dates = pd.date_range("2021-12-03", dates[-1], freq="W-FRI")
+    fred = {
+        'DGS10': pd.DataFrame({'DGS10': np.arange(len(obs_dates), dtype=float)}, index=obs_dates),
+        'T10Y2Y': pd.DataFrame({'T10Y2Y': np.linspace(1, -1, len(obs_dates))}, index=obs_dates),
+    }
+
+    features = compute_features({'SPY': spy}, 'SPY', '^VIX', macro_data=fred)
+    for col in ['dgs10', 'dgs10_chg_21d', 'yield_curve_slope', 'yield_curve_inverted']:
+        assert col in features.columns
+
+    visible = pd.Series(np.arange(len(obs_dates), dtype=float), index=obs_dates + pd.offsets.BDay(1))
+    expected = visible.reindex(features.index, method='ffill')
+    np.testing.assert_array_equal(features['dgs10'].to_numpy(), expected.to_numpy())
+    assert ((features['yield_curve_slope'] < 0) == (features['yield_curve_inverted'] == 1)).all()
+
+    # A Friday and a Saturday print both become public on Monday: the later observation wins,
+    # and a series without a collision keeps its value
+    fri, sat, mon = pd.Timestamp("2022-01-07"), pd.Timestamp("2022-01-08"), pd.Timestamp("2022-01-10")
+    aligned = align_macro({'DGS10': pd.Series([1.0, 2.0], index=[fri, sat]), 'DGS2': pd.Series([5.0], index=[fri])},
+                          pd.bdate_range(fri, periods=3), use_cache=False)
+    assert np.isnan(aligned.loc[fri, 'dgs10'])
+    assert aligned.loc[mon, ['dgs10', 'dgs2']].tolist() == [2.0, 5.0]
+
+
+def test_panel_features_match_single_ticker():
+    """The 2D panel pass reproduces compute_features ticker by ticker, in both layouts, across gaps."""
+    rng = np.random.default_rng(0)
+    ohlcv = {}
+    for i, start in enumerate(["2021-01-04", "2021-03-01", "2021-01-04"]):
+        dates = pd.bdate_range(start=start, periods=400 - 20 * i)
+        close = 100 * np.exp(np.cumsum(0.01 * rng.standard_normal(len(dates))))
+        ohlcv[f'T{i}'] = pd.DataFrame({'Open': close, 'High': close, 'Low': close,
+                                       'Close': close, 'Volume': 1000}, index=dates)
+    # A ten-bar halt inside the union calendar: T0's windows must span its own bars only
+    ohlcv['T0'] = ohlcv['T0'].drop(ohlcv['T0'].index[150:160])
+    vix_dates = pd.bdate_range(start="2021-01-04", periods=400)
+    ohlcv['^VIX'] = pd.DataFrame({'Close': 20 + rng.standard_normal(400)}, index=vix_dates)
+
+    wide = compute_panel_features(ohlcv)
+    long = compute_panel_features(ohlcv, layout='long')
+    assert set(wide.columns.get_level_values('ticker')) == {'T0', 'T1', 'T2'}
+    for t in ['T0', 'T1', 'T2']:
+        single = compute_features(ohlcv, t, '^VIX')
+        cols = [c for c in single.columns if c in FEATURE_COLUMNS or c == 'vix_close']
+        panel_t = wide.xs(t, axis=1, level='ticker').loc[single.index, cols]
+        pd.testing.assert_frame_equal(panel_t, single[cols], check_freq=False, check_names=False, rtol=1e-7)
+        pd.testing.assert_frame_equal(long.xs(t, level='ticker')[cols], single[cols],
+                                      check_freq=False, check_names=False, rtol=1e-7)
+
+    # Panel rolling std stays exact on long, high-priced columns (no prefix-sum cancellation)
+    from src.features.engine import _LocalMoments
+    prices = 4000 + np.cumsum(0.05 * rng.standard_normal((100_000, 2)), axis=0)
+    prices[500:505, 1] = np.nan
+    for w in (3, 21, 63):
+        exact = np.lib.stride_tricks.sliding_window_view(prices, w, axis=0).std(axis=-1, ddof=1)
+        np.testing.assert_allclose(_LocalMoments(prices).std(w)[w - 1:], exact, rtol=1e-8)
+
+
+def test_online_feature_state_matches_batch():
+    """Streaming bars through FeatureState reproduces the batch feature rows."""
+    from src.features.online import FeatureState
+
+    rng = np.random.default_rng(1)
+    dates = pd.bdate_range(start="2020-01-01", periods=420).astype("datetime64[ns]")
+    close = 100 * np.exp(np.cumsum(0.01 * rng.standard_normal(len(dates))))
+    spy = pd.DataFrame({'Open': close, 'High': close * 1.01, 'Low': close * 0.99,
+                        'Close': close, 'Volume': 1000.0}, index=dates)
+    vix = pd.DataFrame({'Close': 20 + rng.standard_normal(len(dates))}, index=dates)
+
+    batch = compute_features({'SPY': spy, '^VIX': vix}, 'SPY', '^VIX')
+    split = 350
+    state = FeatureState.from_history({'SPY': spy.iloc[:split], '^VIX': vix.iloc[:split]}, 'SPY', '^VIX')
+    assert state.ready
+    rows = [state.update(spy.iloc[i], vix_close=vix['Close'].iloc[i]) for i in range(split, len(dates))]
+    streamed = pd.DataFrame(rows)
+    expected = batch.loc[streamed.index, streamed.columns]
+    pd.testing.assert_frame_equal(streamed, expected, check_freq=False, check_names=False, rtol=1e-9)
+
+
+def test_incremental_features_stream_new_bars(tmp_path, monkeypatch):
+    """A second run streams only the new bars (through a missing close) and matches compute_features."""
+    from src.features import engine
+    from src.features.cache import FeatureStore
+    from src.features.online import incremental_features
+
+    rng = np.random.default_rng(12)
+    dates = pd.bdate_range(start="2019-01-01", periods=800).astype("datetime64[ns]")
+    close = 100 * np.exp(np.cumsum(0.01 * rng.standard_normal(len(dates))))
+    close[500] = np.nan
+    spy = pd.DataFrame({'Open': close, 'High': close * 1.01, 'Low': close * 0.99,
+                        'Close': close, 'Volume': 1000.0}, index=dates)
+    vix = pd.DataFrame({'Close': 20 + rng.standard_normal(len(dates))}, index=dates)
+    expected = compute_features({'SPY': spy, '^VIX': vix}, 'SPY', '^VIX')
+
+    store = FeatureStore(tmp_path)
+    incremental_features({'SPY': spy.iloc[:700], '^VIX': vix.iloc[:700]}, 'SPY', '^VIX', store=store)
+    monkeypatch.setattr(engine, 'compute_features', lambda *args, **kwargs: pytest.fail("history was recomputed"))
+    features = incremental_features({'SPY': spy, '^VIX': vix}, 'SPY', '^VIX', store=store)
+    pd.testing.assert_frame_equal(features, expected, check_freq=False, rtol=1e-9)
+    assert features.index[-1] == dates[-1]
+
+
+def test_feature_store_reuses_and_evicts(sample_ohlcv_data, tmp_path):
+    """Features are computed once per data/spec key, reloaded from disk, and evicted LRU."""
+    from src.features.cache import FeatureStore, cached_compute_features
+
+    store = FeatureStore(tmp_path / "features", max_entries=2)
+    first = cached_compute_features(sample_ohlcv_data, 'SPY', '^VIX', store=store)
+    again = cached_compute_features(sample_ohlcv_data, 'SPY', '^VIX', store=store)
+    pd.testing.assert_frame_equal(again, first, check_freq=False)
+    assert (store.hits, store.misses) == (1, 1)
+
+    # A fresh process sees the persisted entry
+    reopened = FeatureStore(tmp_path / "features", max_entries=2)
+    cached_compute_features(sample_ohlcv_data, 'SPY', '^VIX', store=reopened)
+    assert reopened.stats()['hit_rate'] == 1.0
+
+    changed = dict(sample_ohlcv_data, SPY=sample_ohlcv_data['SPY'] * 1.01)
+    cached_compute_features(changed, 'SPY', '^VIX', store=reopened)
+    cached_compute_features(sample_ohlcv_data, 'SPY', None, store=reopened)
+    assert reopened.stats()['entries'] == 2
+    assert len(list((tmp_path / "features").glob("*.parquet"))) == 2
+
+    # Lookups leave the index file alone; flushing merges the totals of stores sharing it
+    index = tmp_path / "features" / "index.json"
+    written = index.read_bytes()
+    cached_compute_features(sample_ohlcv_data, 'SPY', None, store=reopened)
+    assert index.read_bytes() == written
+    store.flush()
+    reopened.flush()
+    totals = json.loads(index.read_text())['totals']
+    assert totals == {'hits': store.hits + reopened.hits, 'misses': store.misses + reopened.misses}
+    assert set(json.loads(index.read_text())['entries']) == set(reopened.entries)
+
+
+def test_compute_features_column_subset():
+    """A column subset returns the same values and only drops rows its own warmup needs."""
+    from src.features.registry import feature_warmup, required_warmup
+
+    rng = np.random.default_rng(2)
+    dates = pd.bdate_range(start="2020-01-01", periods=300)
+    close = 100 * np.exp(np.cumsum(0.01 * rng.standard_normal(len(dates))))
+    ohlcv = {'SPY': pd.DataFrame({'Close': close}, index=dates),
+             '^VIX': pd.DataFrame({'Close': 20 + rng.standard_normal(len(dates))}, index=dates)}
+
+    full = compute_features(ohlcv, 'SPY', '^VIX')
+    subset = compute_features(ohlcv, 'SPY', '^VIX', columns=['vix_close', 'momentum_63d', 'volatility_21d'])
+    assert list(subset.columns) == ['vix_close', 'momentum_63d', 'volatility_21d']
+    assert len(subset) == len(dates) - required_warmup(subset.columns) == len(dates) - 63
+    pd.testing.assert_frame_equal(subset.loc[full.index], full[subset.columns], check_freq=False)
+    assert feature_warmup('volatility_21d') == 21 and feature_warmup('momentum_252d') == 252
+
+
+def test_point_in_time_view_matches_per_slice_features():
+    """Slicing once-computed features reproduces compute_features on each sliced window."""
+    from src.features.point_in_time import PointInTimeFeatures
+
+    rng = np.random.default_rng(3)
+    dates = pd.bdate_range(start="2019-01-01", periods=700)
+    close = 100 * np.exp(np.cumsum(0.01 * rng.standard_normal(len(dates))))
+    spy = pd.DataFrame({'Open': close, 'High': close, 'Low': close, 'Close': close, 'Volume': 1000.0}, index=dates)
+
+    pit = PointInTimeFeatures.from_ohlcv({'SPY': spy}, 'SPY', '^VIX', use_cache=False)
+    for start, end in [(dates[0], dates[299]), (dates[150], dates[500]), ("2019-07-06", "2021-05-01")]:
+        per_slice = compute_features({'SPY': spy.loc[start:end]}, 'SPY', '^VIX')
+        pd.testing.assert_frame_equal(pit.window(start, end), per_slice, check_freq=False, rtol=1e-9)
+    assert len(pit.window(dates[300], dates[500], warmup='history')) == 201
+
+    as_of = pit.as_of(dates[400] + pd.Timedelta(hours=12))
+    expected = compute_features({'SPY': spy.loc[:dates[400]]}, 'SPY', '^VIX').iloc[-1]
+    pd.testing.assert_series_equal(as_of, expected, rtol=1e-9)
+
+
+def test_indicator_index_matches_rolling(monkeypatch):
+    """Prefix-sum indicators equal pandas rolling statistics at any window, NaNs included."""
+    from src.features import indicators
+    from src.features.indicators import indicator_index
+    from src.utils.config import config
+
+    rng = np.random.default_rng(4)
+    dates = pd.bdate_range(start="2000-01-03", periods=5000)
+    close = pd.Series(100 * np.exp(np.cumsum(0.01 * rng.standard_normal(len(dates)))), index=dates, name='Close')
+    close.iloc[[50, 51, 3000]] = np.nan
+
+    idx = indicator_index(close)
+    assert indicator_index(close.copy()) is idx
+    for w in (2, 21, 63, 200):
+        pd.testing.assert_series_equal(idx.sma(w), close.rolling(w).mean(), rtol=1e-10)
+        # Exact two-pass reference (pandas' own online rolling std drifts by ~1e-8 on small windows)
+        windows = np.lib.stride_tricks.sliding_window_view(close.to_numpy(), w)
+        exact = pd.Series(np.r_[np.full(w - 1, np.nan), windows.std(axis=1, ddof=1)], index=dates, name='Close')
+        pd.testing.assert_series_equal(idx.rolling_std(w), exact, rtol=1e-7)
+        pd.testing.assert_series_equal(idx.return_std(w), (close / close.shift(1) - 1).rolling(w).std(), rtol=1e-7)
+    mid, upper, lower = idx.bollinger(20, num_std=2.0)
+    pd.testing.assert_series_equal(upper - mid, 2.0 * close.rolling(20).std(), rtol=1e-7)
+    pd.testing.assert_series_equal(idx.zscore(20), (close - close.rolling(20).mean()) / close.rolling(20).std(),
+                                   rtol=1e-6)
+
+    # Short windows stay exact on a long, high-priced series (where differenced second moments cancel)
+    minute = pd.Series(4000 + np.cumsum(0.05 * rng.standard_normal(200_000)))
+    for w in (2, 5):
+        windows = np.lib.stride_tricks.sliding_window_view(minute.to_numpy(), w)
+        np.testing.assert_allclose(indicator_index(minute).rolling_std(w).to_numpy()[w - 1:],
+                                   windows.std(axis=1, ddof=1), rtol=1e-12)
+
+    # Equal values on a different calendar / name get their own index
+    shifted = close.copy()
+    shifted.index = dates[:100].append(dates[101:]).append(pd.DatetimeIndex([dates[-1] + pd.offsets.BDay(1)]))
+    other = indicator_index(shifted.rename('QQQ'))
+    assert other is not idx
+    assert other.sma(2).name == 'QQQ' and other.sma(2).index.equals(shifted.index)
+
+    # Cached indexes and their memoised windows stay within the configured budget
+    monkeypatch.setitem(config.setdefault('features', {}), 'indicator_cache_mb', 0.5)
+    budget = 512 * 1024
+    for w in range(2, 40):
+        idx.sma(w)
+    assert idx._arrays_bytes <= budget // 4
+    latest = indicator_index(minute)  # larger than the budget on its own
+    assert list(indicators._index_cache.values()) == [latest]
+
+
+def test_rolling_kernels_match_pandas():
+    """Rolling extrema and rank kernels agree with pandas on 1D and 2D inputs, NaNs included."""
+    from src.features import kernels
+
+    rng = np.random.default_rng(5)
+    values = rng.standard_normal((400, 3))
+    values[[10, 11, 200], 1] = np.nan
+    values[:, 2] = np.round(values[:, 2], 1)  # ties
+    frame = pd.DataFrame(values)
+    for w in (1, 5, 63, 400, 401):
+        pd.testing.assert_frame_equal(kernels.rolling_max(frame, w), frame.rolling(w).max())
+        pd.testing.assert_frame_equal(kernels.rolling_min(frame, w), frame.rolling(w).min())
+        np.testing.assert_allclose(kernels.rolling_max(values[:, 0], w), frame[0].rolling(w).max().to_numpy())
+    pd.testing.assert_frame_equal(kernels.rolling_rank(frame, 63), frame.rolling(63).rank(pct=True))
+
+    # Compiled-path kernels, run as plain Python, reproduce the same results
+    filled = np.where(np.isnan(values), -np.inf, values)
+    deque_max = kernels._deque_max_kernel(filled, 20)
+    deque_max[kernels._nan_windows(values, 20)] = np.nan
+    np.testing.assert_allclose(deque_max, frame.rolling(20).max().to_numpy())
+    with np.errstate(invalid='ignore'):
+        ranks = kernels._fenwick_rank_kernel(values, 20, 0.0, 0)
+        quantiles = kernels._fenwick_rank_kernel(values, 20, 0.3, 1)
+    for out, expected in ((ranks, frame.rolling(20).rank(pct=True)), (quantiles, frame.rolling(20).quantile(0.3))):
+        out[kernels._nan_windows(values, 20)] = np.nan
+        np.testing.assert_allclose(out, expected.to_numpy())
+
+
+def test_recursive_filters_match_reference_loops():
+    """EMA / KAMA / trailing stop agree with pandas and the plain per-bar loops, per column and per n."""
+    from src.features import filters
+
+    rng = np.random.default_rng(11)
+    prices = pd.DataFrame(100 * np.exp(np.cumsum(rng.normal(0, 0.01, (600, 3)), axis=0)),
+                          index=pd.bdate_range('2015-01-01', periods=600), columns=['A', 'B', 'C'])
+    pd.testing.assert_frame_equal(filters.ema(prices, span=21), prices.ewm(span=21, adjust=False).mean())
+
+    def kama_loop(price, n, fast=2, slow=30):
+        er = (price.diff(n).abs() / price.diff().abs().rolling(n).sum()).fillna(0).to_numpy()
+        sc = (er * (2 / (fast + 1) - 2 / (slow + 1)) + 2 / (slow + 1)) ** 2
+        p = price.to_numpy()
+        out = np.full(len(p), np.nan)
+        out[n - 1] = p[n - 1]
+        for i in range(n, len(p)):
+            out[i] = out[i - 1] + sc[i] * (p[i] - out[i - 1])
+        return out
+
+    grid = filters.kama(prices, n=[10, 30])
+    assert list(grid.columns.get_level_values('n').unique()) == [10, 30]
+    for n in (10, 30):
+        for ticker in prices.columns:
+            np.testing.assert_allclose(grid[(n, ticker)].to_numpy(), kama_loop(prices[ticker], n), rtol=1e-12)
+    pd.testing.assert_series_equal(filters.kama(prices['A'], 10), grid[(10, 'A')].rename('A'))
+
+    # Compiled-path kernel, run as plain Python, matches the NumPy fallback
+    arr = prices.to_numpy()
+    alpha = rng.uniform(0.05, 0.5, arr.shape)
+    start, seed = np.array([0, 5, 599]), arr[[0, 5, 599], [0, 1, 2]]
+    np.testing.assert_allclose(filters._linear_filter_kernel(arr, alpha, seed, start),
+                               filters._linear_filter_numpy(arr, alpha, seed, start))
+
+    stop = filters.trailing_stop(prices, 2.0)
+    distance = np.full(arr.shape, 2.0)
+    np.testing.assert_allclose(stop.to_numpy(), filters._trailing_stop_kernel(arr, distance, 1.0))
+    # A long stop never loosens while price holds above it
+    held = prices >= stop.shift(1)
+    assert ((stop.diff() >= 0) | ~held).all().all()
+
+
+def test_cross_sectional_features_match_pandas():
+    """Row-wise ranks / z-scores match pandas; breadth feeds detect_regime; CS momentum holds the leaders."""
+    from src.features.cross_section import compute_cross_sectional_features, rank_pct, zscore
+    from src.features.regime import detect_regime
+    from src.strategies.multi_strategy import calculate_cross_sectional_momentum_signals
+
+    rng = np.random.default_rng(3)
+    values = np.round(rng.standard_normal((200, 6)), 1)  # ties
+    values[rng.random(values.shape) < 0.1] = np.nan
+    values[0] = np.nan
+    frame = pd.DataFrame(values)
+    np.testing.assert_allclose(rank_pct(values), frame.rank(axis=1, pct=True).to_numpy())
+    np.testing.assert_allclose(zscore(values), frame.sub(frame.mean(axis=1), axis=0).div(frame.std(axis=1), axis=0))
+
+    dates = pd.bdate_range('2018-01-01', periods=300)
+    drifts = {'A': 0.002, 'B': 0.001, 'C': -0.001, 'D': -0.002}
+    ohlcv = {t: pd.DataFrame({'Close': 100 * np.exp(np.cumsum(d + rng.normal(0, 0.005, 300)))}, index=dates)
+             for t, d in drifts.items()}
+    per_asset, market = compute_cross_sectional_features(ohlcv)
+    latest = per_asset.iloc[-1]['xs_momentum_rank_63d']
+    assert latest['A'] == 1.0 and latest['D'] == 0.25
+    assert market['xs_breadth_sma63'].iloc[-1] == 0.5
+
+    bull = pd.DataFrame({'vix_close': [15.0], 'momentum_63d': [0.08]})
+    assert detect_regime(bull) == 'LowVol-Bull'
+    assert detect_regime(bull.assign(xs_breadth_sma63=0.25)) == 'LowVol-MeanRevert'
+
+    signals = calculate_cross_sectional_momentum_signals(ohlcv, list(drifts), lookback=63, top_fraction=0.5)
+    assert [signals[t].iloc[-1] for t in drifts] == [1, 1, 0, 0]
+    assert signals['A'].iloc[:63].eq(0).all()
+
+
+def test_covariance_engine_matches_pandas():
+    """Rolling / EWMA engines match pandas cov; snapshots are float32 upper triangles; summary is the mean correlation."""
+    from src.features.covariance import CovarianceEngine, average_correlation
+
+    rng = np.random.default_rng(8)
+    dates = pd.bdate_range('2019-01-01', periods=260)
+    returns = pd.DataFrame(rng.normal(0, 0.01, (260, 4)), index=dates, columns=['A', 'B', 'C', 'D'])
+    returns['B'] += returns['A']
+    returns.iloc[:30, 2] = np.nan  # late listing
+
+    rolling = CovarianceEngine.from_returns(returns, method='rolling', window=40, store_every=10)
+    expected = returns.rolling(40).cov()
+    for ts in (dates[50], dates[250]):
+        np.testing.assert_allclose(rolling.matrix(ts).to_numpy(), expected.loc[ts].to_numpy(), rtol=1e-5, atol=1e-12)
+    assert next(iter(rolling.snapshots.values())).dtype == np.float32
+    assert len(next(iter(rolling.snapshots.values()))) == 10
+    pd.testing.assert_frame_equal(rolling.covariance(), expected.loc[dates[-1]].rename_axis(None), rtol=1e-9,
+                                  check_names=False)
+
+    corr = returns.iloc[-40:].corr().to_numpy()
+    assert rolling.summary()['avg_correlation'].iloc[-1] == pytest.approx(corr[np.triu_indices(4, 1)].mean())
+    assert rolling.summary()['n_assets'].iloc[45] == 3
+
+    complete = returns[['A', 'B', 'D']]
+    ewma = CovarianceEngine.from_returns(complete, method='ewma', halflife=10, min_periods=1)
+    ewm_expected = complete.ewm(halflife=10, adjust=False).cov(bias=True).loc[dates[-1]]
+    np.testing.assert_allclose(ewma.covariance().to_numpy(), ewm_expected.to_numpy(), rtol=1e-10)
+
+    shrunk = CovarianceEngine.from_returns(complete, method='ewma', shrinkage=0.5).covariance()
+    np.testing.assert_allclose(np.diag(shrunk), np.diag(ewma.covariance()), rtol=0.2)
+    assert shrunk.loc['A', 'B'] == pytest.approx(0.5 * CovarianceEngine.from_returns(complete).covariance().loc['A', 'B'])
+    prices = (1 + complete).cumprod()
+    stress = average_correlation(prices, method='rolling', window=40)
+    last = (prices / prices.shift(1) - 1).iloc[-40:].corr().to_numpy()
+    assert stress.iloc[:40].isna().all()
+    assert stress.iloc[-1] == pytest.approx(last[np.triu_indices(3, 1)].mean())
+
+
+def test_label_regimes_matches_scalar_rules_and_segments():
+    """Vectorised labels equal detect_regime row by row; the segment index reproduces the labels and stats."""
+    from src.features.regime import (REGIME_LABELS, detect_regime, label_regimes, regime_segments,
+                                     regime_slices, regime_statistics)
+
+    rng = np.random.default_rng(21)
+    n = 400
+    features = pd.DataFrame({
+        'vix_close': np.repeat(rng.choice([12.0, 20.0, 25.0, 30.0, 35.0, np.nan], n // 10), 10),
+        'momentum_63d': np.repeat(rng.choice([-0.2, -0.1, -0.05, 0.0, 0.05, 0.08, np.nan], n // 10), 10),
+        'xs_breadth_sma63': np.repeat(rng.choice([0.1, 0.3, 0.6, np.nan], n // 10), 10),
+    }, index=pd.bdate_range('2020-01-01', periods=n))
+
+    def scalar_rules(row):
+        vix, mom, breadth = row.get('vix_close', 20), row.get('momentum_63d', 0), row.get('xs_breadth_sma63', np.nan)
+        narrow = breadth < 0.4
+        if vix > 30:
+            return 'Crisis-Bear' if mom < -0.10 or breadth < 0.2 else 'HighVol-Uncertain'
+        if 20 < vix <= 30:
+            if mom > 0.05 and not narrow:
+                return 'MidVol-Bull'
+            return 'MidVol-Bear' if mom < -0.05 else 'MidVol-MeanRevert'
+        return 'LowVol-Bull' if mom > 0.05 and not narrow else 'LowVol-MeanRevert'
+
+    labels = label_regimes(features)
+    assert list(labels.cat.categories) == REGIME_LABELS
+    assert list(labels.astype(str)) == [scalar_rules(row) for _, row in features.iterrows()]
+    for i in range(0, n, 50):
+        assert detect_regime(features.iloc[:i + 1]) == labels.iloc[i]
+    assert label_regimes(features[['momentum_63d']]).iloc[-1] == detect_regime(features[['momentum_63d']])
+    assert detect_regime(features.iloc[:0]) == 'Unknown'
+
+    segments = regime_segments(labels)
+    assert segments['bars'].sum() == n
+    assert (segments['regime'].to_numpy()[1:] != segments['regime'].to_numpy()[:-1]).all()
+    rebuilt = np.repeat(segments['regime'].astype(str).to_numpy(), segments['bars'].to_numpy())
+    assert (rebuilt == labels.astype(str).to_numpy()).all()
+
+    regime = segments['regime'].iloc[0]
+    picked = pd.concat([features.iloc[s] for s in regime_slices(segments, regime)])
+    assert picked.index.equals(labels.index[labels == regime])
+
+    returns = pd.Series(rng.normal(0, 0.01, n), index=features.index)
+    stats = regime_statistics(returns, segments)
+    grouped = returns.groupby(labels, observed=True)
+    np.testing.assert_allclose(stats['mean_return'], grouped.mean().loc[stats.index])
+    np.testing.assert_allclose(stats['volatility'], grouped.std().loc[stats.index])
+
+
+def test_regime_hmm_fit_filter_and_online_updates(tmp_path, monkeypatch):
+    """HMM recovers two simulated regimes; the O(K^2) online filter reproduces the batch filter."""
+    from src.features.hmm import GaussianHMM, OnlineRegimeFilter, current_regime
+    from src.features.regime import detect_regime
+    from src.utils.config import config
+
+    rng = np.random.default_rng(4)
+    n = 600
+    states = np.zeros(n, dtype=int)
+    for t in range(1, n):
+        states[t] = states[t - 1] if rng.random() < 0.97 else 1 - states[t - 1]
+    features = pd.DataFrame({
+        'momentum_21d': np.where(states == 1, -0.06, 0.04) + rng.normal(0, 0.02, n),
+        'volatility_21d': np.where(states == 1, 0.35, 0.12) + rng.normal(0, 0.03, n),
+    }, index=pd.bdate_range('2015-01-01', periods=n))
+    features.iloc[100, 0] = np.nan
+
+    model = GaussianHMM(n_states=2).fit(features)
+    assert sorted(model.state_labels) == ['Crisis-Bear', 'LowVol-Bull']
+    labels = model.label_regimes(features)
+    truth = np.where(states == 1, 'Crisis-Bear', 'LowVol-Bull')
+    assert (labels.astype(str).to_numpy() == truth).mean() > 0.95
+    probs = model.regime_probabilities(features)
+    np.testing.assert_allclose(probs.sum(axis=1), 1.0)
+
+    live = model.online(features.iloc[:400])
+    for ts, row in features.iloc[400:].iterrows():
+        streamed = live.update(row)
+    pd.testing.assert_series_equal(streamed, probs.iloc[-1].rename('probability'), check_names=False, rtol=1e-9)
+    assert detect_regime(features, model=model) == live.regime == labels.iloc[-1]
+
+    model.save(tmp_path / 'hmm.json')
+    restored = GaussianHMM.load(tmp_path / 'hmm.json')
+    pd.testing.assert_frame_equal(restored.filter(features), model.filter(features))
+
+    # Persisted filter state: later runs only advance over the new bars
+    monkeypatch.setitem(config, 'regime', {'model': 'hmm', 'hmm': {'n_states': 2, 'path': 'hmm.json'}})
+    batch = model.filter(features).to_numpy()[-1]
+    current_regime(features.iloc[:400], tmp_path)
+    monkeypatch.setattr(GaussianHMM, 'filter', lambda *args: pytest.fail("history was filtered again"))
+    assert current_regime(features, tmp_path) == labels.iloc[-1]
+    saved = OnlineRegimeFilter.load(restored, tmp_path / 'hmm.filter.json')
+    assert saved.timestamp == features.index[-1]
+    np.testing.assert_allclose(saved.state_probabilities, batch, rtol=1e-9)
+
+
+def test_label_regime_panel_matches_per_asset_labels():
+    """The int8 regime panel equals label_regimes on each asset's own features."""
+    from src.features.regime import label_regime_panel, label_regimes
+
+    rng = np.random.default_rng(13)
+    dates = pd.bdate_range('2016-01-01', periods=400)
+    drifts = {'A': 0.001, 'B': -0.001, 'C': 0.0}
+    ohlcv = {t: pd.DataFrame({'Close': 100 * np.exp(np.cumsum(d + rng.normal(0, 0.01, 400)))}, index=dates)
+             for t, d in drifts.items()}
+    ohlcv['^VIX'] = pd.DataFrame({'Close': rng.uniform(10, 40, 400)}, index=dates)
+    ohlcv['C'] = ohlcv['C'].iloc[100:]  # listed later
+
+    panel_features = compute_panel_features(ohlcv)
+    breadth = pd.Series(rng.uniform(0, 1, 400), index=dates)
+    regimes = label_regime_panel(panel_features, breadth)
+    assert regimes.codes.dtype == np.int8 and regimes.codes.shape == (400, 3)
+    for ticker in drifts:
+        single = panel_features.xs(ticker, axis=1, level='ticker')[['vix_close', 'momentum_63d']]
+        single = single.assign(xs_breadth_sma63=breadth).dropna(subset=['momentum_63d'])
+        pd.testing.assert_series_equal(regimes.asset(ticker).loc[single.index], label_regimes(single),
+                                       check_names=False)
+    assert (regimes.codes[:163, 2] == -1).all()
+    assert regimes.at(dates[50])['C'] == 'Unknown'
+    assert regimes.latest() == {t: str(regimes.asset(t).iloc[-1]) for t in drifts}
+
+
+def test_rolling_covariance_divides_by_joint_observations():
+    """With min_periods < window and gaps, each pair uses its own joint bars, as pandas rolling cov does."""
+    from src.features.covariance import CovarianceEngine
+
+    rng = np.random.default_rng(20)
+    dates = pd.bdate_range('2020-01-01', periods=120)
+    returns = pd.DataFrame(rng.normal(0, 0.02, (120, 3)), index=dates, columns=['A', 'B', 'C'])
+    returns.iloc[70:75, 1] = np.nan  # 5-bar gap inside the last window
+    returns.iloc[:100, 2] = np.nan  # short history
+
+    short = CovarianceEngine.from_returns(returns.iloc[:30], method='rolling', window=63, min_periods=20)
+    expected = returns.iloc[:30].rolling(63, min_periods=20).cov().loc[dates[29]]
+    np.testing.assert_allclose(short.covariance().to_numpy(), expected.to_numpy(), rtol=1e-10)
+
+    engine = CovarianceEngine.from_returns(returns, method='rolling', window=63, min_periods=50, store_every=1)
+    expected = returns.rolling(63, min_periods=50).cov()
+    for ts in (dates[80], dates[-1]):
+        np.testing.assert_allclose(engine.matrix(ts).to_numpy(), expected.loc[ts].to_numpy(), rtol=1e-5, atol=1e-12)
+    assert np.isnan(engine.covariance().loc['C', 'A'])
+    assert engine.summary()['avg_correlation'].iloc[-1] == pytest.approx(engine.correlation().loc['A', 'B'])
@@ -0,0 +1,262 @@
+import time
+import pytest
+import pandas as pd
+import numpy as np
+from src.data import ingest
+from src.data import store
+from src.data.catalog import get_catalog
+from src.data.fetcher import RateLimiter
+from src.data.panel import build_panel, load_panel, save_panel
+from src.data.schemas import is_canonical_ohlcv, normalize_ohlcv
+from src.data.sources import LocalDirectorySource, SyntheticSource
+from src.data.resample import resample_ohlcv, resample_store
+from src.utils.config import config
+from src.utils.frequency import periods_per_year
+
+
+def _make_bars(start, periods):
+    dates = pd.bdate_range(start=start, periods=periods, name="Date").astype("datetime64[ns]")
+    close = 100 + np.arange(periods, dtype=float)
+    return pd.DataFrame({
+        'Open': close - 0.5,
+        'High': close + 1,
+        'Low': close - 1,
+        'Close': close,
+        'Volume': np.full(periods, 1000, dtype='int64')
+    }, index=dates)
+
+
+class FakeProvider:
+    """Local stand-in for yfinance that serves slices of a fixed history."""
+
+    def __init__(self, history):
+        self.history = history
+        self.calls = []
+
+    def __call__(self, ticker, start=None, end=None, period=None):
+        self.calls.append((ticker, start, end))
+        df = self.history
+        if start is not None:
+            df = df[df.index >= pd.Timestamp(start)]
+        if end is not None:
+            df = df[df.index < pd.Timestamp(end)]
+        return df.copy()
+
+
+@pytest.fixture(params=['flat', 'partitioned'])
+def data_dir(request, tmp_path, monkeypatch):
+    monkeypatch.setitem(config, 'data_path', str(tmp_path))
+    monkeypatch.setitem(config['data'], 'store_layout', request.param)
+    return tmp_path
+
+
+def test_refresh_appends_only_missing_tail(data_dir):
+    """An incremental refresh fetches from the overlap window and appends new bars."""
+    full = _make_bars("2024-01-01", 60)
+    ingest._save_cached('TEST', full.iloc[:50], data_dir)
+
+    provider = FakeProvider(full)
+    out = ingest.refresh_ohlcv_data(['TEST'], provider=provider)
+
+    assert len(provider.calls) == 1
+    _, start, _ = provider.calls[0]
+    assert pd.Timestamp(start) == full.index[50 - ingest.REFRESH_OVERLAP_BARS]
+    assert out == {'TEST': 10}
+    stored = ingest.fetch_ohlcv_data('TEST', provider=provider)
+    pd.testing.assert_frame_equal(stored, full, check_freq=False, check_names=False)
+
+
+def test_refresh_redownloads_when_overlap_changes(data_dir):
+    """A re-adjusted history triggers a full download instead of a mixed append."""
+    full = _make_bars("2024-01-01", 60)
+    stale = full.iloc[:50].copy()
+    stale['Close'] *= 0.98
+    ingest._save_cached('TEST', stale, data_dir)
+
+    provider = FakeProvider(full)
+    out = ingest.refresh_ohlcv_data(['TEST'], provider=provider)
+
+    assert len(provider.calls) == 2
+    assert out == {'TEST': 60}
+    stored = ingest.fetch_ohlcv_data('TEST', provider=provider)
+    pd.testing.assert_frame_equal(stored, full, check_freq=False, check_names=False)
+
+
+class LatencyProvider(FakeProvider):
+    """Fake provider that sleeps per call and fails permanently or transiently for chosen tickers."""
+
+    def __init__(self, history, latency=0.05, broken=(), flaky=()):
+        super().__init__(history)
+        self.latency = latency
+        self.broken = set(broken)
+        self.flaky = set(flaky)
+
+    def __call__(self, ticker, start=None, end=None, period=None):
+        time.sleep(self.latency)
+        if ticker in self.broken:
+            raise ConnectionError(f"{ticker} unavailable")
+        if ticker in self.flaky:
+            self.flaky.discard(ticker)
+            raise TimeoutError(f"{ticker} timed out")
+        return super().__call__(ticker, start, end, period)
+
+
+def test_fetch_ohlcv_concurrent_with_failure_isolation(data_dir, monkeypatch):
+    """Downloads overlap in time, transient errors are retried and one dead ticker does not sink the batch."""
+    monkeypatch.setitem(config['data'], 'fetch', {'max_workers': 8, 'max_retries': 2, 'backoff_seconds': 0.0})
+    tickers = [f"T{i}" for i in range(16)]
+    monkeypatch.setitem(config, 'universe', tickers)
+    monkeypatch.setitem(config, 'vix_ticker', '^VIX')
+    provider = LatencyProvider(_make_bars("2024-01-01", 30), latency=0.05, broken={'T3'}, flaky={'T5'})
+
+    t0 = time.perf_counter()
+    out = ingest.fetch_ohlcv_data(provider=provider)
+    elapsed = time.perf_counter() - t0
+
+    assert list(out) == [t for t in tickers + ['^VIX'] if t != 'T3']
+    assert elapsed < 17 * 0.05 / 2
+    assert ingest._has_cached('^VIX', data_dir)
+    assert not ingest._has_cached('T3', data_dir)
+
+
+def test_rate_limiter_spaces_calls():
+    limiter = RateLimiter(rate=50, burst=1)
+    t0 = time.perf_counter()
+    for _ in range(6):
+        limiter.acquire()
+    assert time.perf_counter() - t0 >= 5 / 50 * 0.9
+
+
+def test_migrate_and_pushdown_read(tmp_path):
+    """Legacy per-ticker files migrate into year partitions and range reads only return the slice."""
+    full = _make_bars("2019-06-03", 600)
+    legacy = full.copy()
+    legacy.columns = pd.MultiIndex.from_product([legacy.columns, ['SPY']])
+    legacy.to_parquet(tmp_path / "SPY.parquet")
+
+    assert store.migrate_flat_store(tmp_path) == {'SPY': 600}
+    root = store.get_store_root(tmp_path)
+    years = sorted(p.name for p in (root / "ticker=SPY").iterdir())
+    assert years == ['year=2019', 'year=2020', 'year=2021']
+
+    sliced = store.read_ohlcv('SPY', '2020-03-01', '2020-08-31', columns=['Close'], root=root)
+    expected = full.loc['2020-03-01':'2020-08-31', ['Close']]
+    pd.testing.assert_frame_equal(sliced, expected, check_freq=False, check_names=False)
+    assert store.last_timestamp('SPY', root) == full.index[-1]
+
+
+def test_price_panel_roundtrip_is_memory_mapped(tmp_path):
+    """Panels align differing calendars and reload as read-only memory maps."""
+    a = _make_bars("2024-01-01", 40)
+    b = _make_bars("2024-01-15", 40)
+    panel = build_panel({'A': a, 'B': b}, dtype='float32')
+    assert panel.field('Close').shape == (len(a.index.union(b.index)), 2)
+
+    save_panel(panel, tmp_path / "panel")
+    loaded = load_panel(tmp_path / "panel")
+    close = loaded.field('Close')
+    assert isinstance(close, np.memmap) and close.dtype == np.float32
+    assert not close.flags.writeable
+    assert np.shares_memory(loaded.frame('Close').to_numpy(), close)
+    np.testing.assert_allclose(loaded['B']['Close'].dropna().to_numpy(), b['Close'].to_numpy())
+    assert list(loaded.slice('2024-02-01', '2024-02-29').dates.month.unique()) == [2]
+
+
+def test_frame_cache_hits_and_invalidates_on_rewrite(data_dir):
+    """Repeated reads are served from memory, frames are read-only, and rewriting the file invalidates the entry."""
+    ingest.frame_cache.clear()
+    downloaded = ingest.fetch_ohlcv_data('TEST', provider=FakeProvider(_make_bars("2024-01-01", 30)))
+    with pytest.raises(ValueError):
+        np.asarray(downloaded['Close'])[0] = -1.0
+
+    first = ingest.fetch_ohlcv_data('TEST', start_date='2024-01-05')
+    second = ingest.fetch_ohlcv_data('TEST', start_date='2024-01-05')
+    assert ingest.frame_cache.stats()['hits'] == 1
+    pd.testing.assert_frame_equal(first, second)
+    with pytest.raises(ValueError):
+        second['Close'].to_numpy()[0] = -1.0
+    second['extra'] = 1.0
+    assert 'extra' not in ingest.fetch_ohlcv_data('TEST', start_date='2024-01-05').columns
+
+    time.sleep(0.01)
+    ingest._save_cached('TEST', _make_bars("2024-01-01", 31), data_dir)
+    assert len(ingest.fetch_ohlcv_data('TEST', start_date='2024-01-05')) == 27
+    assert ingest.frame_cache.stats()['misses'] == 2
+
+
+def test_catalog_tracks_coverage_without_reading_data(data_dir):
+    """Ingest keeps the manifest current so coverage and staleness are metadata lookups."""
+    full = _make_bars("2024-01-01", 60)
+    provider = FakeProvider(full.iloc[:50])
+    ingest.fetch_ohlcv_data('TEST', provider=provider)
+
+    catalog = get_catalog(data_dir)
+    assert (data_dir / "manifest.json").exists()
+    assert catalog.coverage('TEST') == {'first': full.index[0], 'last': full.index[49], 'rows': 50}
+    assert catalog.get('TEST')['schema']['Close'] == 'float64'
+    assert catalog.stale(as_of=full.index[-1]) == ['TEST']
+    checksum = catalog.get('TEST')['checksum']
+
+    provider.history = full
+    ingest.refresh_ohlcv_data(['TEST'], provider=provider)
+    catalog = get_catalog(data_dir)
+    assert catalog.coverage('TEST')['rows'] == 60
+    assert catalog.get('TEST')['checksum'] != checksum
+    assert catalog.stale(as_of=full.index[-1]) == []
+
+
+def test_normalize_ohlcv_produces_canonical_frame():
+    """Provider quirks (MultiIndex columns, tz-aware index, duplicates, Adj Close only) are normalised once."""
+    bars = _make_bars("2024-01-01", 10)
+    raw = bars.rename(columns={'Close': 'Adj Close'}).astype({'Volume': 'float64'})
+    raw.index = raw.index.tz_localize('America/New_York')
+    raw = pd.concat([raw, raw.iloc[[3]]]).iloc[::-1]
+    raw.columns = pd.MultiIndex.from_product([raw.columns, ['SPY']])
+
+    out = normalize_ohlcv(raw)
+    assert is_canonical_ohlcv(out)
+    assert list(out.columns) == ['Open', 'High', 'Low', 'Close', 'Volume']
+    np.testing.assert_allclose(out['Close'].to_numpy(), bars['Close'].to_numpy())
+    assert normalize_ohlcv(out) is out
+
+
+def test_offline_sources_drive_ingest(data_dir, monkeypatch):
+    """Synthetic bars are deterministic per ticker and round-trip through a local-directory source."""
+    monkeypatch.setitem(config['data'], 'fred_series', {'DGS10': '10y'})
+    source = SyntheticSource(seed=3, start='2015-01-01', end='2020-12-31', model='jump')
+    a = ingest.fetch_ohlcv_data('SYN1', provider=source)
+    b = SyntheticSource(seed=3, start='2015-01-01', end='2020-12-31', model='jump')('SYN1', start='2018-01-01')
+    assert is_canonical_ohlcv(a)
+    pd.testing.assert_frame_equal(a.loc['2018-01-01':], b, check_freq=False)
+    assert get_catalog(data_dir).get('SYN1')['source'] == 'synthetic'
+    np.testing.assert_array_equal(source.panel(['SYN0', 'SYN1']).frame('Close')['SYN1'].to_numpy(), a['Close'].to_numpy())
+    assert ingest.fetch_fred_data(source=source)['DGS10'].index.equals(source.dates)
+
+    snapshot = data_dir / "snapshot"
+    snapshot.mkdir()
+    a.to_csv(snapshot / "SYN1.csv")
+    local = LocalDirectorySource(snapshot)
+    out = ingest.fetch_ohlcv_data('SYN1', force_download=True, provider=local)
+    pd.testing.assert_frame_equal(out, a, check_freq=False, check_names=False)
+    assert local('SYN1', period='1y').index[0] >= a.index[-1] - pd.DateOffset(years=1)
+
+
+def test_intraday_store_and_streaming_resample(data_dir):
+    """Minute bars land in their own store and stream-resample to the same result as an in-memory resample."""
+    source = SyntheticSource(seed=5, start='2023-12-27', end='2024-01-05', freq='1m')
+    assert ingest.fetch_intraday_data('SYN', interval='1m', provider=source) == {'SYN': len(source.dates)}
+    root_1m = store.get_store_root(data_dir, '1m')
+    assert store.list_tickers(root_1m) == ['SYN'] and not store.has_ticker('SYN', store.get_store_root(data_dir))
+
+    minute = store.read_ohlcv('SYN', root=root_1m)
+    for freq, offset in [('5m', None), ('1h', '30min'), ('1d', None)]:
+        written = resample_store('SYN', freq, source_freq='1m', data_path=data_dir, offset=offset, batch_size=777)
+        streamed = store.read_ohlcv('SYN', root=store.get_store_root(data_dir, freq))
+        expected = resample_ohlcv(minute, freq, offset)
+        assert written == len(expected)
+        pd.testing.assert_frame_equal(streamed, expected, check_freq=False, check_names=False)
+
+    daily = store.read_ohlcv('SYN', root=store.get_store_root(data_dir, '1d'))
+    assert list(daily.index.year.unique()) == [2023, 2024]
+    assert periods_per_year(index=minute.index) == 252 * 390
+    assert periods_per_year(index=daily.index) == 252